@@ -0,0 +1,12 @@
+"""
+The scheduled tasks. Each task directory holds scripts run by path, which import the modules next to them by name and
+the shared runtime as `runtime`. `python -m tasks` runs several of them in one process, see __main__.py.
+"""
+
+import os
+import sys
+
+# Makes `runtime` importable when the tasks are imported as a package
+TASKS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TASKS_DIR not in sys.path:
+    sys.path.append(TASKS_DIR)
@@ -0,0 +1,134 @@
+"""
+Run several tasks in one process and at the same time, so a Heroku Scheduler job boots a dyno and loads Python and the
+shared dependencies once instead of once per task.
+
+Usage: python -m tasks TASK [TASK ...] [--max-workers N]
+
+Each TASK is the name of a task, followed by its own arguments in the same quoted argument:
+python -m tasks typeform "heroku_pipelines_check --profile"
+
+Tasks only import their modules once they start, and each still checks which days it runs on. A failing task doesn't
+stop the others, but makes the exit code 1.
+"""
+
+import argparse
+import importlib
+import os
+import shlex
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from tasks import TASKS_DIR
+
+import runtime
+
+# The directory and module of each task. The module's main(argv) runs the task.
+TASKS = {
+    "typeform": ("typeform", "delete_responses"),
+    "typeform_async": ("typeform", "async_delete_responses"),
+    "heroku_pipelines_check": ("heroku_pipelines_check", "slack_webhook"),
+    "clone_foundation_site": ("clone_foundation_site", "clone"),
+}
+
+
+class TaskExit(Exception):
+    """
+    A task exited with an error code, after printing why
+    """
+
+
+def parse_task(spec):
+    """
+    :param spec: str
+        A task name and its arguments, like "heroku_pipelines_check --profile"
+    :return: (str, list)
+        The task name and its arguments
+    """
+    name, *argv = shlex.split(spec) or [""]
+    if name not in TASKS:
+        raise argparse.ArgumentTypeError(
+            f"unknown task {name!r}, choose from {', '.join(TASKS)}"
+        )
+    return name, argv
+
+
+def run_task(name, argv):
+    """
+    Import a task's module and run it, like running its script
+
+    :raises TaskExit:
+        If the task exited with an error code
+    """
+    module = importlib.import_module(TASKS[name][1])
+    try:
+        module.main(argv)
+    except SystemExit as err:
+        # The scripts exit when they are misconfigured, which mustn't end the other tasks
+        if err.code not in (None, 0):
+            raise TaskExit(f"exited with code {err.code}") from None
+
+
+def run_tasks(tasks, task_run, max_workers=None, run=run_task):
+    """
+    :param tasks: list
+        The (name, argv) of each task to run
+    :param task_run: runtime.TaskRun
+        Where each task is logged as a step
+    :param max_workers: int
+        How many tasks run at once, defaults to all of them
+    :param run: function
+        Runs a task from its name and arguments, like run_task
+    :return: list
+        Whether each task succeeded, in order
+    """
+    # The task scripts import the modules next to them by name, as if they were run from their own directory
+    for name, _ in tasks:
+        task_dir = os.path.join(TASKS_DIR, TASKS[name][0])
+        if task_dir not in sys.path:
+            sys.path.insert(0, task_dir)
+
+    def run_one(task):
+        name, argv = task
+        try:
+            with task_run.step(shlex.join([name, *argv])):
+                run(name, argv)
+            return True
+        except TaskExit as err:
+            print(f"Task {name} {err}", flush=True)
+            return False
+        except Exception:
+            print(f"Task {name} failed:", flush=True)
+            traceback.print_exc()
+            return False
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(tasks))) as executor:
+        return list(executor.map(run_one, tasks))
+
+
+def main(argv=None, environ=os.environ):
+    parser = argparse.ArgumentParser(
+        prog="python -m tasks", description="Run several tasks in one process"
+    )
+    parser.add_argument(
+        "tasks",
+        nargs="+",
+        type=parse_task,
+        metavar="TASK",
+        help=f"a task and its arguments, one of: {', '.join(TASKS)}",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="how many tasks run at once, all of them by default",
+    )
+    options = parser.parse_args(argv)
+
+    task_run = runtime.TaskRun.from_environ("tasks", environ)
+    results = run_tasks(options.tasks, task_run, max_workers=options.max_workers)
+    task_run.finish("ok" if all(results) else "error")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+#!/usr/bin/env bash
+
+# Benchmark the user scrub of cleanup.sql against the per-user loop it replaced, on a local Postgres loaded with
+# synthetic users. Each script gets a freshly loaded scratch database, which is dropped at the end.
+#
+# Usage: ./tasks/clone_foundation_site/benchmark/run.sh [number of users]
+#
+# Connects with the usual libpq environment variables (PGHOST, PGPORT, PGUSER, PGPASSWORD). The scratch database is
+# called cleanup_benchmark unless BENCHMARK_DB is set.
+
+set -e
+
+users=${1:-100000}
+benchmark_db=${BENCHMARK_DB:-cleanup_benchmark}
+benchmark_dir=$(cd "$(dirname "$0")" && pwd)
+
+trap 'dropdb --if-exists ${benchmark_db}' 0
+
+run_benchmark() {
+    label=$1
+    script=$2
+
+    dropdb --if-exists ${benchmark_db}
+    createdb ${benchmark_db}
+    psql -q -v ON_ERROR_STOP=1 -v users=${users} -d ${benchmark_db} -f ${benchmark_dir}/synthetic_users.sql
+
+    start=$(date +%s.%N)
+    psql -q -v ON_ERROR_STOP=1 -d ${benchmark_db} -f ${script} > /dev/null
+    end=$(date +%s.%N)
+
+    # Every non-staff user must be anonymised, with unique usernames and emails and no usable password
+    checks=$(psql -At -d ${benchmark_db} -c "
+        SELECT
+            count(*) FILTER (WHERE email LIKE '%@example.org') AS not_scrubbed,
+            count(*) - count(DISTINCT username) AS duplicate_usernames,
+            count(*) - count(DISTINCT email) AS duplicate_emails,
+            count(*) FILTER (WHERE email NOT LIKE '%@mozillafoundation.org' AND password LIKE 'pbkdf2%') AS usable
+        FROM auth_user")
+
+    printf "%-10s %10.2fs   not scrubbed|duplicate usernames|duplicate emails|usable passwords: %s\n" \
+        "${label}" "$(awk "BEGIN { print ${end} - ${start} }")" "${checks}"
+}
+
+echo "Scrubbing ${users} synthetic users"
+run_benchmark "per-row" ${benchmark_dir}/cleanup_per_row.sql
+run_benchmark "set-based" ${benchmark_dir}/../cleanup.sql
@@ -0,0 +1,75 @@
+-- noinspection SqlNoDataSourceInspectionForFile
+
+-- The tables cleanup.sql touches, shaped like the site's Django tables, filled with synthetic users.
+-- About 1% of the users are staff, with a @mozillafoundation.org email, and every user has a social auth row.
+-- Usage: psql -v users=100000 -f synthetic_users.sql
+
+CREATE TABLE auth_user (
+    id serial PRIMARY KEY,
+    password varchar(128) NOT NULL,
+    last_login timestamp with time zone,
+    is_superuser boolean NOT NULL,
+    username varchar(150) NOT NULL UNIQUE,
+    first_name varchar(150) NOT NULL,
+    last_name varchar(150) NOT NULL,
+    email varchar(254) NOT NULL,
+    is_staff boolean NOT NULL,
+    is_active boolean NOT NULL,
+    date_joined timestamp with time zone NOT NULL
+);
+CREATE INDEX auth_user_username_like ON auth_user (username varchar_pattern_ops);
+
+CREATE TABLE social_auth_usersocialauth (
+    id serial PRIMARY KEY,
+    provider varchar(32) NOT NULL,
+    uid varchar(255) NOT NULL,
+    extra_data text NOT NULL,
+    user_id integer NOT NULL REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+    UNIQUE (provider, uid)
+);
+CREATE INDEX social_auth_usersocialauth_user_id ON social_auth_usersocialauth (user_id);
+
+CREATE TABLE django_session (
+    session_key varchar(40) PRIMARY KEY,
+    session_data text NOT NULL,
+    expire_date timestamp with time zone NOT NULL
+);
+
+CREATE TABLE django_site (
+    id serial PRIMARY KEY,
+    domain varchar(100) NOT NULL UNIQUE,
+    name varchar(50) NOT NULL
+);
+
+CREATE TABLE wagtailcore_site (
+    id serial PRIMARY KEY,
+    hostname varchar(255) NOT NULL,
+    port integer NOT NULL
+);
+
+INSERT INTO auth_user (password, is_superuser, username, first_name, last_name, email, is_staff, is_active, date_joined)
+SELECT
+    -- the shape of a Django PBKDF2 hash
+    concat('pbkdf2_sha256$150000$', md5(n::text), '$', md5((n + 1)::text)),
+    false,
+    concat('user', n),
+    concat('First', n),
+    concat('Last', n),
+    CASE WHEN n % 100 = 0 THEN concat('staff', n, '@mozillafoundation.org') ELSE concat('user', n, '@example.org') END,
+    n % 100 = 0,
+    true,
+    now() - n * interval '1 minute'
+FROM generate_series(1, :users) AS n;
+
+INSERT INTO social_auth_usersocialauth (provider, uid, extra_data, user_id)
+SELECT 'google-oauth2', email, '{}', id
+FROM auth_user;
+
+INSERT INTO django_session (session_key, session_data, expire_date)
+SELECT md5(n::text), repeat('x', 200), now() + interval '2 weeks'
+FROM generate_series(1, :users / 10) AS n;
+
+INSERT INTO django_site (domain, name) VALUES ('foundation.mozilla.org', 'foundation');
+INSERT INTO wagtailcore_site (hostname, port) VALUES ('foundation.mozilla.org', 443), ('www.mozillafestival.org', 443);
+
+ANALYZE;
@@ -1,15 +1,7 @@
 -- noinspection SqlNoDataSourceInspectionForFile
 
-CREATE EXTENSION IF NOT EXISTS pgcrypto;
-
 CREATE OR REPLACE FUNCTION clean_user_data()
 RETURNS VOID AS $$
-DECLARE
-    user_row RECORD;
-    new_email varchar;
-    new_hash varchar;
-    new_username varchar;
-    counter integer := 1;
 BEGIN
 --     scrub the user table
     TRUNCATE django_session;
@@ -31,31 +23,24 @@ BEGIN
     SET hostname = 'mozillafestival.mofostaging.net'
     WHERE hostname = 'www.mozillafestival.org';
 
---     Iterate over each non-staff user and remove any PII
-    FOR user_row IN
-        SELECT id
+--     Remove any PII from every non-staff user in a single statement.
+--     Users are numbered in id order, which keeps the anonymised usernames and emails unique.
+--     Django treats any password starting with "!" as unusable, so one shared marker locks every account without
+--     hashing a random password per user.
+    UPDATE auth_user
+    SET
+      email = concat('anonymouse', numbered.counter, '@example.com'),
+      password = '!',
+      username = concat('anonymouse', numbered.counter),
+      first_name = 'anony',
+      last_name = 'mouse'
+    FROM (
+        SELECT id, row_number() OVER (ORDER BY id) AS counter
         FROM auth_user
         WHERE email NOT LIKE '%@mozillafoundation.org'
-    LOOP
-        new_email := concat(encode(gen_random_bytes(12), 'base64'), '@example.com');
-        new_hash := crypt(encode(gen_random_bytes(32), 'base64'), gen_salt('bf', 6));
-        new_username := concat('anonymouse', counter::varchar);
-
-        UPDATE auth_user
-        SET
-          email = new_email,
-          password = new_hash,
-          username = new_username,
-          first_name = 'anony',
-          last_name = 'mouse'
-        Where id = user_row.id;
-
---         Increase the counter
-        counter := counter + 1;
-    END LOOP;
+    ) AS numbered
+    WHERE auth_user.id = numbered.id;
 END;
 $$ LANGUAGE plpgsql;
 
 SELECT clean_user_data();
-
-
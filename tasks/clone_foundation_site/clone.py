@@ -0,0 +1,224 @@
+"""
+Clone and scrub the production foundation site.
+
+The steps run as a dependency graph, so the production backup, the staging backup and the S3 sync all start at once
+instead of waiting on each other. If any step fails, staging is rolled back and brought back online.
+
+Usage: python tasks/clone_foundation_site/clone.py [--only-monday]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from datetime import date
+
+if __name__ == "__main__":
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+from stage_graph import Stage, StageError, StageGraph  # noqa: E402
+
+CLEANUP_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleanup.sql")
+SCRUB_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrub.py")
+
+
+def run(command, capture=False):
+    """
+    :param command: list
+        The command to run and its arguments
+    :param capture: bool
+        Whether to return the command's output instead of letting it print
+    :raises subprocess.CalledProcessError:
+        If the command exits with a non-zero exit code
+    """
+    if capture:
+        return subprocess.run(
+            command, check=True, stdout=subprocess.PIPE, text=True
+        ).stdout.strip()
+    subprocess.run(command, check=True)
+
+
+class CloneFoundationSite:
+    def __init__(self, environ, run=run):
+        """
+        :param environ: dict
+            The environment variables configuring the clone, as listed in the README
+        :param run: function
+            Runs a command, like the module's run function
+        """
+        self.environ = environ
+        self.production_app = environ["PRODUCTION_APP_NAME"]
+        self.staging_app = environ["STAGING_APP_NAME"]
+        # "stream" scrubs the users with scrub.py instead of cleanup.sql
+        self.scrub_engine = environ.get("SCRUB_ENGINE", "sql")
+        self.run = run
+        self.graph = None
+
+    def heroku(self, *args, capture=False):
+        return self.run(["heroku", *args], capture=capture)
+
+    def maintenance_on(self):
+        print("Enabling maintenance mode on the staging app...")
+        self.heroku("maintenance:on", "-a", self.staging_app)
+        print("Scaling web dynos on staging to 0...")
+        self.heroku("ps:scale", "-a", self.staging_app, "web=0")
+
+    def backup_production(self):
+        print("Backing up production DB...")
+        self.heroku("pg:backups:capture", "-a", self.production_app)
+
+    def backup_staging(self):
+        print("Backing up staging DB...")
+        self.heroku("pg:backups:capture", "-a", self.staging_app)
+
+    def restore(self):
+        print("Restoring the latest Production backup to staging...")
+        backup_url = self.heroku(
+            "pg:backups:url", "-a", self.production_app, capture=True
+        )
+        self.heroku(
+            "pg:backups:restore",
+            "--confirm",
+            self.staging_app,
+            "-a",
+            self.staging_app,
+            backup_url,
+        )
+
+    def cleanup(self):
+        staging_db = self.heroku(
+            "config:get", "-a", self.staging_app, "DATABASE_URL", capture=True
+        )
+        if self.scrub_engine == "stream":
+            print("Streaming the user scrub...")
+            self.run([sys.executable, SCRUB_SCRIPT, staging_db])
+        else:
+            print("Executing cleanup SQL script..")
+            self.run(["psql", staging_db, "-f", CLEANUP_SQL])
+
+    def sync_s3(self):
+        # boto3 takes a while to import, so only when the sync runs
+        import s3_sync
+
+        print("Syncing S3 Buckets")
+        s3_sync.from_environ(self.environ).execute()
+
+    def migrate(self):
+        print("Running migrations...")
+        self.heroku(
+            "run",
+            "-a",
+            self.staging_app,
+            "--",
+            "python",
+            "manage.py",
+            "migrate",
+            "--no-input",
+        )
+
+    def update_hostnames(self):
+        print("Resetting wagtail site bindings to point to staging hostnames...")
+        self.heroku(
+            "run",
+            "-a",
+            self.staging_app,
+            "--",
+            "python",
+            "manage.py",
+            "update_staging_site_hostnames",
+        )
+
+    def maintenance_off(self):
+        print("Scaling web dynos on staging to 1...")
+        self.heroku("ps:scale", "-a", self.staging_app, "web=1")
+        print("Disabling maintenance mode on staging..")
+        self.heroku("maintenance:off", "-a", self.staging_app)
+
+    def get_stages(self):
+        return [
+            Stage("maintenance on", self.maintenance_on),
+            Stage("backup production", self.backup_production),
+            Stage("backup staging", self.backup_staging),
+            Stage("sync s3", self.sync_s3),
+            Stage(
+                "restore",
+                self.restore,
+                depends_on=["maintenance on", "backup production", "backup staging"],
+            ),
+            Stage("cleanup", self.cleanup, depends_on=["restore"]),
+            Stage("migrate", self.migrate, depends_on=["cleanup"]),
+            Stage("update hostnames", self.update_hostnames, depends_on=["migrate"]),
+            # Staging only comes back once its media is in sync too
+            Stage(
+                "maintenance off",
+                self.maintenance_off,
+                depends_on=["update hostnames", "sync s3"],
+            ),
+        ]
+
+    def rollback(self):
+        """
+        Bring staging back the way it was before the clone, and back online
+        """
+        # Until the restore starts, the staging database hasn't been touched
+        if "restore" in self.graph.started:
+            print("Rolling back staging...")
+            self.heroku(
+                "pg:backups:restore",
+                "-a",
+                self.staging_app,
+                "--confirm",
+                self.staging_app,
+            )
+
+        print("Scaling web dynos on staging to 1...")
+        self.heroku("ps:scale", "-a", self.staging_app, "web=1")
+        print("Disabling maintenance mode on the staging app...")
+        self.heroku("maintenance:off", "-a", self.staging_app)
+
+    def execute(self, clock=time.perf_counter):
+        """
+        :raises StageError:
+            If a stage failed, once staging has been rolled back
+        """
+        print("Beginning database transfer process...")
+        self.graph = StageGraph(self.get_stages(), clock=clock)
+        try:
+            self.graph.run()
+        except StageError:
+            self.rollback()
+            raise
+        finally:
+            print("Stage timings:")
+            print(self.graph.get_timing_summary())
+
+        print("task complete!")
+
+
+def main(argv=None, environ=os.environ, today=date.today):
+    parser = argparse.ArgumentParser(
+        description="Clone and scrub the production foundation site"
+    )
+    parser.add_argument(
+        "--only-monday",
+        action="store_true",
+        help="only run the task on Mondays",
+    )
+    options = parser.parse_args(argv)
+
+    if options.only_monday:
+        print("Checking the day of the week...")
+        if not runtime.should_run(runtime.MONDAY, today):
+            print("The clone foundation DB task only executes on Mondays")
+            return
+        print("Happy Monday! Beginning database transfer process...")
+
+    runtime.install_heroku_cli()
+    CloneFoundationSite(environ).execute()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Sync the production media to staging with server-side copies, only copying what changed since the last sync.
+
+The ETag of every source object is kept in a manifest after each sync. The next sync lists the source, and compares it
+to the manifest instead of listing the destination too. Only new and changed objects are copied, from a thread pool,
+and S3 copies them without the data passing through us. Without a manifest yet, the destination is listed and compared
+by size and modification time, like `aws s3 sync` does: a copy gets an ETag of its own, so objects uploaded in parts
+never have the ETag of their copy.
+
+The manifest can be a local file, or an S3 object (s3://bucket/key) so it outlives the dyno. As the manifest is trusted,
+objects deleted from the destination by hand won't be copied back until the manifest is removed.
+
+Usage: python tasks/clone_foundation_site/s3_sync.py [--manifest PATH] [--workers N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+if __name__ == "__main__":
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+
+# CopyObject only copies objects up to 5GB, bigger ones need a multipart copy
+MAX_COPY_OBJECT_SIZE = 5 * 1024**3
+
+S3Object = namedtuple("S3Object", ["key", "etag", "size", "last_modified"])
+
+
+def normalize_prefix(prefix):
+    """
+    Treat prefixes as folders, like `aws s3 sync` does
+    """
+    prefix = (prefix or "").lstrip("/")
+    return prefix if not prefix or prefix.endswith("/") else prefix + "/"
+
+
+class SyncManifest:
+    def __init__(self, client, location):
+        """
+        :param client: boto3 S3 client
+        :param location: str
+            A local path, or an s3://bucket/key URL
+        """
+        self.client = client
+        self.location = location
+
+    def get_s3_location(self):
+        bucket, _, key = self.location[len("s3://") :].partition("/")
+        return bucket, key
+
+    def load(self):
+        """
+        :return: dict
+            The source ETag of every object synced by the last sync, by key relative to the source prefix, or None if
+            there is no manifest yet
+        """
+        if self.location.startswith("s3://"):
+            bucket, key = self.get_s3_location()
+            try:
+                response = self.client.get_object(Bucket=bucket, Key=key)
+            except ClientError as err:
+                if err.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                    return None
+                raise
+            return json.loads(response["Body"].read())
+
+        if not os.path.exists(self.location):
+            return None
+        with open(self.location) as manifest_file:
+            return json.load(manifest_file)
+
+    def save(self, etags):
+        if self.location.startswith("s3://"):
+            bucket, key = self.get_s3_location()
+            self.client.put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=json.dumps(etags, sort_keys=True).encode(),
+                ContentType="application/json",
+            )
+            return
+
+        runtime.write_json_atomic(self.location, etags, sort_keys=True)
+
+
+class S3Sync:
+    def __init__(
+        self,
+        client,
+        source_bucket,
+        source_prefix,
+        destination_bucket,
+        destination_prefix,
+        manifest=None,
+        max_workers=16,
+        clock=time.perf_counter,
+    ):
+        """
+        :param client: boto3 S3 client
+            Its connection pool should hold max_workers connections
+        :param manifest: SyncManifest
+            Where the state of the last sync is kept, if anywhere
+        :param max_workers: int
+            How many objects are copied at once
+        :param clock: function
+            Returns the current time in seconds, for the transfer rates
+        """
+        self.client = client
+        self.source_bucket = source_bucket
+        self.source_prefix = normalize_prefix(source_prefix)
+        self.destination_bucket = destination_bucket
+        self.destination_prefix = normalize_prefix(destination_prefix)
+        self.manifest = manifest
+        self.max_workers = max_workers
+        self.clock = clock
+        self.stats_lock = threading.Lock()
+        self.num_copied = 0
+        self.bytes_copied = 0
+
+    def list_objects(self, bucket, prefix):
+        """
+        :return: dict
+            An S3Object for every object under the prefix, by key relative to the prefix
+        """
+        objects = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                key = item["Key"][len(prefix) :]
+                objects[key] = S3Object(
+                    key, item["ETag"], item["Size"], item["LastModified"]
+                )
+        return objects
+
+    def get_synced_keys(self, source):
+        """
+        :param source: dict
+            The source objects, by relative key
+        :return: set
+            The relative keys of the source objects that are already in sync
+        """
+        etags = self.manifest.load() if self.manifest is not None else None
+        if etags is not None:
+            print(f"Comparing against the manifest of {len(etags)} objects")
+            return {key for key, item in source.items() if etags.get(key) == item.etag}
+
+        print("No manifest yet, listing the destination")
+        destination = self.list_objects(
+            self.destination_bucket, self.destination_prefix
+        )
+        return {
+            key
+            for key, item in source.items()
+            if key in destination
+            and destination[key].size == item.size
+            and destination[key].last_modified >= item.last_modified
+        }
+
+    def copy(self, item):
+        copy_source = {
+            "Bucket": self.source_bucket,
+            "Key": self.source_prefix + item.key,
+        }
+        destination_key = self.destination_prefix + item.key
+        if item.size > MAX_COPY_OBJECT_SIZE:
+            self.client.copy(copy_source, self.destination_bucket, destination_key)
+        else:
+            self.client.copy_object(
+                CopySource=copy_source,
+                Bucket=self.destination_bucket,
+                Key=destination_key,
+            )
+
+        with self.stats_lock:
+            self.num_copied += 1
+            self.bytes_copied += item.size
+
+    def execute(self):
+        """
+        :return: int
+            The number of objects copied
+        """
+        started_at = self.clock()
+        source = self.list_objects(self.source_bucket, self.source_prefix)
+        synced_keys = self.get_synced_keys(source)
+        changed = [item for key, item in source.items() if key not in synced_keys]
+        print(
+            f"{len(source)} objects in the source, {len(changed)} new or changed",
+            flush=True,
+        )
+
+        # Unchanged objects stay in the manifest, and copied ones are added as they succeed
+        etags = {key: source[key].etag for key in synced_keys}
+        copy_started_at = self.clock()
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.copy, item): item for item in changed}
+            for future, item in futures.items():
+                try:
+                    future.result()
+                    etags[item.key] = item.etag
+                except Exception as err:
+                    print(f"Failed to copy {item.key}: {err!r}", flush=True)
+                    failure = failure or err
+
+        if self.manifest is not None:
+            self.manifest.save(etags)
+
+        print(self.get_report(copy_started_at, started_at), flush=True)
+        if failure is not None:
+            raise failure
+
+        return self.num_copied
+
+    def get_report(self, copy_started_at, started_at):
+        now = self.clock()
+        copy_seconds = now - copy_started_at
+        if copy_seconds > 0:
+            objects_rate = self.num_copied / copy_seconds
+            megabytes_rate = self.bytes_copied / copy_seconds / 1024**2
+        else:
+            objects_rate = megabytes_rate = 0
+        return (
+            f"Copied {self.num_copied} objects, {self.bytes_copied / 1024 ** 2:.1f} MB in {copy_seconds:.2f}s "
+            f"({objects_rate:.1f} objects/s, {megabytes_rate:.1f} MB/s), {now - started_at:.2f}s in total"
+        )
+
+
+def from_environ(environ, manifest=None, max_workers=None):
+    """
+    Configure a sync from the clone task's environment variables
+
+    :return: S3Sync
+    """
+    max_workers = max_workers or runtime.get_setting(
+        environ, "S3_SYNC_WORKERS", int, 16
+    )
+    client = boto3.client(
+        "s3",
+        region_name=environ["S3_REGION"],
+        # A local S3 compatible server, for testing
+        endpoint_url=environ.get("S3_ENDPOINT_URL") or None,
+        config=Config(max_pool_connections=max_workers),
+    )
+    manifest = manifest or environ.get("S3_SYNC_MANIFEST")
+    return S3Sync(
+        client,
+        environ["PRODUCTION_S3_BUCKET"],
+        environ["PRODUCTION_S3_PREFIX"],
+        environ["STAGING_S3_BUCKET"],
+        environ["STAGING_S3_PREFIX"],
+        manifest=SyncManifest(client, manifest) if manifest else None,
+        max_workers=max_workers,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sync the production S3 media to staging"
+    )
+    parser.add_argument(
+        "--manifest", help="a local path or s3:// URL for the sync manifest"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="how many objects are copied at once"
+    )
+    options = parser.parse_args(argv)
+
+    from_environ(
+        os.environ, manifest=options.manifest, max_workers=options.workers
+    ).execute()
+
+
+if __name__ == "__main__":
+    main()
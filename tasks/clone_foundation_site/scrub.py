@@ -0,0 +1,332 @@
+"""
+Scrub the personal data out of a restored copy of the foundation site database, streaming over the user tables.
+
+The rows to scrub are read with a server-side cursor on one connection, so memory stays bounded however big the tables
+are, and written back in batches on another connection: each batch is COPY'd into a temporary table and applied with a
+single UPDATE (or DELETE). The writes are committed every `commit_every` rows, so a failure only loses the last
+uncommitted rows. The anonymised values only depend on each row's ID, which makes re-running the scrub harmless, and
+with a checkpoint file a re-run skips the rows already committed.
+
+Usage: python tasks/clone_foundation_site/scrub.py DATABASE_URL [--rules rules.json] [--checkpoint scrub.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+if __name__ == "__main__":
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+
+# Applied before the user tables are scrubbed, like in cleanup.sql
+PREPARATION_SQL = """
+TRUNCATE django_session;
+
+UPDATE django_site
+SET domain = 'foundation.mofostaging.net'
+WHERE domain = 'foundation.mozilla.org';
+
+UPDATE wagtailcore_site
+SET hostname = 'foundation.mofostaging.net'
+WHERE hostname = 'foundation.mozilla.org';
+
+UPDATE wagtailcore_site
+SET hostname = 'mozillafestival.mofostaging.net'
+WHERE hostname = 'www.mozillafestival.org';
+"""
+
+# For every table, in the order they are scrubbed:
+# - keep: the rows left alone, the ones where `column` ends with `suffix`
+# - columns: the new value of each column, a template where {id} is replaced by the row's ID
+# - delete: whether to delete the rows instead
+# Django treats any password starting with "!" as unusable.
+DEFAULT_RULES = {
+    "auth_user": {
+        "keep": {"column": "email", "suffix": "@mozillafoundation.org"},
+        "columns": {
+            "username": "anonymouse{id}",
+            "email": "anonymouse{id}@example.com",
+            "password": "!",
+            "first_name": "anony",
+            "last_name": "mouse",
+        },
+    },
+    "social_auth_usersocialauth": {
+        "keep": {"column": "uid", "suffix": "@mozillafoundation.org"},
+        "delete": True,
+    },
+}
+
+
+def load_rules(path):
+    """
+    :param path: str
+        A JSON file laid out like DEFAULT_RULES
+    :return: dict
+    :raises ValueError:
+        If a table has neither columns to anonymise nor is to be deleted
+    """
+    with open(path) as rules_file:
+        rules = json.load(rules_file)
+
+    for table, rule in rules.items():
+        if not rule.get("delete") and not rule.get("columns"):
+            raise ValueError(f"The rule for {table} has no columns and doesn't delete")
+
+    return rules
+
+
+def copy_escape(value):
+    """
+    Escape a value for COPY's text format
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class ScrubCheckpoint:
+    """
+    The last ID committed in each table, kept in a JSON file so an interrupted scrub can pick up where it stopped
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.last_ids = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.last_ids = json.load(checkpoint_file)
+
+    def get(self, table):
+        return self.last_ids.get(table, 0)
+
+    def save(self, table, last_id):
+        self.last_ids[table] = last_id
+        if self.path is None:
+            return
+        runtime.write_json_atomic(self.path, self.last_ids)
+
+    def clear(self):
+        self.last_ids = {}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Scrubber:
+    def __init__(
+        self,
+        reader,
+        writer,
+        rules=DEFAULT_RULES,
+        batch_size=1000,
+        commit_every=10000,
+        checkpoint=None,
+        clock=time.perf_counter,
+    ):
+        """
+        :param reader: connection
+            The connection the rows to scrub are streamed from
+        :param writer: connection
+            The connection the anonymised rows are written with. It must not be the reader, as committing would close
+            the server-side cursor.
+        :param rules: dict
+            What to do with each table, laid out like DEFAULT_RULES
+        :param batch_size: int
+            How many rows are fetched, and written, at once
+        :param commit_every: int
+            How many rows are written between commits, rounded up to whole batches
+        :param checkpoint: ScrubCheckpoint
+            Where the last committed ID of each table is kept, if anywhere
+        :param clock: function
+            Returns the current time in seconds, for the progress reports
+        """
+        self.reader = reader
+        self.writer = writer
+        self.rules = rules
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.checkpoint = checkpoint or ScrubCheckpoint(None)
+        self.clock = clock
+
+    def iter_batches(self, table, rule, after_id):
+        """
+        Stream the IDs of the rows to scrub, in ID order
+
+        :return: generator
+            Lists of up to batch_size IDs
+        """
+        query = sql.SQL("SELECT id FROM {table} WHERE id > %s").format(
+            table=sql.Identifier(table)
+        )
+        params = [after_id]
+        keep = rule.get("keep")
+        if keep:
+            query += sql.SQL(" AND {column} NOT LIKE %s").format(
+                column=sql.Identifier(keep["column"])
+            )
+            params.append("%" + keep["suffix"].replace("%", "\\%").replace("_", "\\_"))
+        query += sql.SQL(" ORDER BY id")
+
+        with self.reader.cursor(name=f"scrub_{table}") as cursor:
+            cursor.itersize = self.batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    return
+                yield [row[0] for row in rows]
+
+    def prepare_updates(self, cursor, table, columns):
+        cursor.execute("DROP TABLE IF EXISTS scrub_batch")
+        # Same column types as the table, so the update needs no casts
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMPORARY TABLE scrub_batch AS SELECT id, {columns} FROM {table} LIMIT 0"
+            ).format(
+                columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                table=sql.Identifier(table),
+            )
+        )
+
+    def write_updates(self, cursor, table, columns, ids):
+        buffer = io.StringIO()
+        for row_id in ids:
+            values = [row_id] + [
+                template.format(id=row_id) for template in columns.values()
+            ]
+            buffer.write("\t".join(map(copy_escape, values)) + "\n")
+        buffer.seek(0)
+
+        cursor.copy_expert(
+            sql.SQL("COPY scrub_batch (id, {columns}) FROM STDIN").format(
+                columns=sql.SQL(", ").join(map(sql.Identifier, columns))
+            ),
+            buffer,
+        )
+        cursor.execute(
+            sql.SQL(
+                "UPDATE {table} SET {assignments} FROM scrub_batch WHERE {table}.id = scrub_batch.id"
+            ).format(
+                table=sql.Identifier(table),
+                assignments=sql.SQL(", ").join(
+                    sql.SQL("{column} = scrub_batch.{column}").format(
+                        column=sql.Identifier(column)
+                    )
+                    for column in columns
+                ),
+            )
+        )
+        cursor.execute("TRUNCATE scrub_batch")
+
+    def write_deletes(self, cursor, table, ids):
+        cursor.execute(
+            sql.SQL("DELETE FROM {table} WHERE id = ANY(%s)").format(
+                table=sql.Identifier(table)
+            ),
+            [ids],
+        )
+
+    def scrub_table(self, table, rule):
+        """
+        :return: int
+            The number of rows scrubbed
+        """
+        columns = rule.get("columns", {})
+        after_id = self.checkpoint.get(table)
+        if after_id:
+            print(f"{table}: resuming after ID {after_id}")
+
+        num_rows = 0
+        num_uncommitted = 0
+        last_id = after_id
+        started_at = self.clock()
+
+        with self.writer.cursor() as cursor:
+            if not rule.get("delete"):
+                self.prepare_updates(cursor, table, columns)
+
+            def commit():
+                self.writer.commit()
+                self.checkpoint.save(table, last_id)
+                elapsed = self.clock() - started_at
+                rate = num_rows / elapsed if elapsed > 0 else 0
+                print(
+                    f"{table}: {num_rows} rows scrubbed, {rate:.0f} rows/s", flush=True
+                )
+
+            for ids in self.iter_batches(table, rule, after_id):
+                if rule.get("delete"):
+                    self.write_deletes(cursor, table, ids)
+                else:
+                    self.write_updates(cursor, table, columns, ids)
+
+                num_rows += len(ids)
+                num_uncommitted += len(ids)
+                last_id = ids[-1]
+                if num_uncommitted >= self.commit_every:
+                    commit()
+                    num_uncommitted = 0
+
+            commit()
+
+        return num_rows
+
+    def execute(self):
+        with self.writer.cursor() as cursor:
+            cursor.execute(PREPARATION_SQL)
+        self.writer.commit()
+
+        for table, rule in self.rules.items():
+            self.scrub_table(table, rule)
+
+        self.checkpoint.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrub personal data out of a copy of the foundation site database"
+    )
+    parser.add_argument("database_url", help="the database to scrub")
+    parser.add_argument(
+        "--rules", help="a JSON file of anonymisation rules, replacing the default ones"
+    )
+    parser.add_argument(
+        "--checkpoint", help="a file to resume an interrupted scrub from"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--commit-every", type=int, default=10000)
+    options = parser.parse_args(argv)
+
+    rules = load_rules(options.rules) if options.rules else DEFAULT_RULES
+    reader = psycopg2.connect(options.database_url)
+    writer = psycopg2.connect(options.database_url)
+    try:
+        Scrubber(
+            reader,
+            writer,
+            rules=rules,
+            batch_size=options.batch_size,
+            commit_every=options.commit_every,
+            checkpoint=ScrubCheckpoint(options.checkpoint),
+        ).execute()
+    finally:
+        reader.close()
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
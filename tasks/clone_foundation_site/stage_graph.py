@@ -0,0 +1,146 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class StageError(Exception):
+    def __init__(self, stage, error):
+        """
+        :param stage: str
+            The name of the stage that failed
+        :param error: Exception
+            What the stage raised
+        """
+        super().__init__(f"Stage {stage} failed: {error!r}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    def __init__(self, name, run, depends_on=()):
+        """
+        :param name: str
+            A unique name for the stage, used in logs and by dependent stages
+        :param run: function
+            Called without arguments to run the stage
+        :param depends_on: iterable
+            The names of the stages that must have finished before this one starts
+        """
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+
+class StageGraph:
+    """
+    Runs stages as soon as the stages they depend on have finished, so independent stages run at the same time.
+
+    If a stage fails, no further stage is started, the running ones are waited for and the failure is raised as a
+    StageError.
+    """
+
+    def __init__(self, stages, max_workers=None, clock=time.perf_counter):
+        """
+        :param stages: list
+            The Stage objects to run
+        :param max_workers: int
+            How many stages can run at once, defaults to as many as there are stages
+        :param clock: function
+            Returns the current time in seconds, to time the stages with
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.max_workers = max_workers or max(1, len(stages))
+        self.clock = clock
+        self.check_dependencies()
+
+        # The stages that were started, whether they finished or not
+        self.started = set()
+        self.finished = set()
+        # The duration of every finished or failed stage, in the order they ended
+        self.timings = {}
+
+    def check_dependencies(self):
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(
+                        f"Stage {stage.name} depends on unknown stage {dependency}"
+                    )
+
+        # Taking away the stages whose dependencies are all gone must eventually take away every stage
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [
+                name
+                for name, stage in remaining.items()
+                if not set(stage.depends_on) & remaining.keys()
+            ]
+            if not ready:
+                raise ValueError(
+                    f"Dependency cycle between stages: {', '.join(sorted(remaining))}"
+                )
+            for name in ready:
+                del remaining[name]
+
+    def get_ready_stages(self):
+        return [
+            stage
+            for name, stage in self.stages.items()
+            if name not in self.started
+            and all(dependency in self.finished for dependency in stage.depends_on)
+        ]
+
+    def run_stage(self, stage):
+        print(f"[{stage.name}] started", flush=True)
+        started_at = self.clock()
+        try:
+            stage.run()
+        finally:
+            self.timings[stage.name] = self.clock() - started_at
+        print(f"[{stage.name}] finished in {self.timings[stage.name]:.2f}s", flush=True)
+
+    def run(self):
+        """
+        :raises StageError:
+            If a stage failed. The stages that didn't start by then never will.
+        """
+        failure = None
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if failure is None:
+                    for stage in self.get_ready_stages():
+                        self.started.add(stage.name)
+                        running[executor.submit(self.run_stage, stage)] = stage.name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.finished.add(name)
+                    else:
+                        print(
+                            f"[{name}] failed after {self.timings[name]:.2f}s: {error!r}",
+                            flush=True,
+                        )
+                        if failure is None:
+                            failure = StageError(name, error)
+
+        if failure is not None:
+            raise failure
+
+    def get_timing_summary(self):
+        """
+        :return: str
+            A line per stage that ran with its duration, in the order the stages ended
+        """
+        width = max((len(name) for name in self.timings), default=0)
+        return "\n".join(
+            f"{name:<{width}}  {seconds:8.2f}s"
+            for name, seconds in self.timings.items()
+        )
@@ -0,0 +1,110 @@
+import subprocess
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from clone import CloneFoundationSite
+from stage_graph import StageError
+
+ENVIRON = {
+    "PRODUCTION_APP_NAME": "foundation-prod",
+    "STAGING_APP_NAME": "foundation-staging",
+    "S3_REGION": "us-east-1",
+    "PRODUCTION_S3_BUCKET": "prod-bucket",
+    "PRODUCTION_S3_PREFIX": "media",
+    "STAGING_S3_BUCKET": "staging-bucket",
+    "STAGING_S3_PREFIX": "media",
+}
+
+
+class FakeRun:
+    """
+    Records the commands run, failing the ones containing `fail_on`
+    """
+
+    def __init__(self, fail_on=None):
+        self.commands = []
+        self.fail_on = fail_on
+
+    def __call__(self, command, capture=False):
+        self.commands.append(command)
+        if self.fail_on is not None and self.fail_on in command:
+            raise subprocess.CalledProcessError(1, command)
+        return "postgres://staging" if capture else None
+
+    def heroku_commands(self):
+        return [command[1] for command in self.commands if command[0] == "heroku"]
+
+
+class TestCloneFoundationSite(TestCase):
+    def setUp(self):
+        for target in ["builtins.print", "s3_sync.from_environ"]:
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_success(self):
+        fake_run = FakeRun()
+        CloneFoundationSite(ENVIRON, run=fake_run).execute()
+
+        commands = fake_run.heroku_commands()
+        self.assertLess(
+            commands.index("pg:backups:capture"), commands.index("pg:backups:restore")
+        )
+        self.assertLess(
+            commands.index("pg:backups:restore"), commands.index("config:get")
+        )
+        self.assertEqual(commands[-1], "maintenance:off")
+        self.assertIn(
+            ["psql", "postgres://staging", "-f"], [c[:3] for c in fake_run.commands]
+        )
+        # staging's own backup is never restored
+        self.assertEqual(commands.count("pg:backups:restore"), 1)
+
+    def test_stream_scrub(self):
+        fake_run = FakeRun()
+        CloneFoundationSite(
+            dict(ENVIRON, SCRUB_ENGINE="stream"), run=fake_run
+        ).execute()
+
+        scrub_commands = [c for c in fake_run.commands if c[1].endswith("scrub.py")]
+        self.assertEqual(len(scrub_commands), 1)
+        self.assertEqual(scrub_commands[0][2], "postgres://staging")
+        self.assertNotIn("psql", [command[0] for command in fake_run.commands])
+
+    def test_rollback_after_restore(self):
+        fake_run = FakeRun(fail_on="psql")
+        with self.assertRaises(StageError):
+            CloneFoundationSite(ENVIRON, run=fake_run).execute()
+
+        self.assertIn(
+            [
+                "heroku",
+                "pg:backups:restore",
+                "-a",
+                "foundation-staging",
+                "--confirm",
+                "foundation-staging",
+            ],
+            fake_run.commands,
+        )
+        self.assertEqual(
+            fake_run.heroku_commands()[-2:], ["ps:scale", "maintenance:off"]
+        )
+        self.assertNotIn(
+            "migrate", [arg for command in fake_run.commands for arg in command]
+        )
+
+    def test_rollback_before_restore(self):
+        fake_run = FakeRun(fail_on="pg:backups:capture")
+        with self.assertRaises(StageError):
+            CloneFoundationSite(ENVIRON, run=fake_run).execute()
+
+        commands = fake_run.heroku_commands()
+        # the staging database was never touched, so there's nothing to restore
+        self.assertNotIn("pg:backups:restore", commands)
+        self.assertEqual(commands[-2:], ["ps:scale", "maintenance:off"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from s3_sync import S3Sync, SyncManifest, from_environ, normalize_prefix
+
+
+@mock_aws
+class TestS3Sync(TestCase):
+    def setUp(self):
+        patcher = patch("builtins.print")
+        self.mock_print = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manifest_path = os.path.join(self.tmp_dir.name, "manifest.json")
+
+        self.client = boto3.client("s3", region_name="us-east-1")
+        self.client.create_bucket(Bucket="production")
+        self.client.create_bucket(Bucket="staging")
+        for number in range(5):
+            self.put("production", f"media/images/{number}.jpg", f"image {number}")
+        self.put("production", "other/ignored.txt", "outside the prefix")
+
+    def put(self, bucket, key, body):
+        self.client.put_object(Bucket=bucket, Key=key, Body=body.encode())
+
+    def get(self, bucket, key):
+        return self.client.get_object(Bucket=bucket, Key=key)["Body"].read().decode()
+
+    def staging_keys(self):
+        response = self.client.list_objects_v2(Bucket="staging")
+        return sorted(item["Key"] for item in response.get("Contents", []))
+
+    def make_sync(self, manifest_location=None, use_manifest=True):
+        manifest = None
+        if use_manifest:
+            manifest = SyncManifest(
+                self.client, manifest_location or self.manifest_path
+            )
+        return S3Sync(
+            self.client,
+            "production",
+            "media",
+            "staging",
+            "media-staging",
+            manifest=manifest,
+            max_workers=4,
+        )
+
+    def test_first_sync_lists_destination(self):
+        # Already in sync, so it isn't copied
+        self.put("staging", "media-staging/images/0.jpg", "image 0")
+        # Out of date
+        self.put("staging", "media-staging/images/1.jpg", "old image 1")
+
+        self.assertEqual(self.make_sync().execute(), 4)
+        self.assertEqual(
+            self.staging_keys(),
+            [f"media-staging/images/{number}.jpg" for number in range(5)],
+        )
+        self.assertEqual(self.get("staging", "media-staging/images/1.jpg"), "image 1")
+        with open(self.manifest_path) as manifest_file:
+            self.assertEqual(len(json.load(manifest_file)), 5)
+
+    def test_sync_with_manifest_only_copies_changes(self):
+        self.make_sync().execute()
+        self.put("production", "media/images/2.jpg", "new image 2")
+        self.put("production", "media/documents/report.pdf", "report")
+
+        sync = self.make_sync()
+        listed = []
+        original_list_objects = sync.list_objects
+
+        def spy(bucket, prefix):
+            listed.append(bucket)
+            return original_list_objects(bucket, prefix)
+
+        sync.list_objects = spy
+        self.assertEqual(sync.execute(), 2)
+        # only the source was listed
+        self.assertEqual(listed, ["production"])
+        self.assertEqual(
+            self.get("staging", "media-staging/images/2.jpg"), "new image 2"
+        )
+        self.assertEqual(
+            self.get("staging", "media-staging/documents/report.pdf"), "report"
+        )
+        self.mock_print.assert_any_call(
+            "6 objects in the source, 2 new or changed", flush=True
+        )
+
+    def test_without_manifest_parts_uploads_are_not_copied_again(self):
+        key = "media/videos/intro.mp4"
+        upload = self.client.create_multipart_upload(Bucket="production", Key=key)
+        parts = []
+        for number in range(1, 4):
+            body = bytes([number]) * (5 * 1024**2 if number < 3 else 2 * 1024**2)
+            part = self.client.upload_part(
+                Bucket="production",
+                Key=key,
+                UploadId=upload["UploadId"],
+                PartNumber=number,
+                Body=body,
+            )
+            parts.append({"PartNumber": number, "ETag": part["ETag"]})
+        self.client.complete_multipart_upload(
+            Bucket="production",
+            Key=key,
+            UploadId=upload["UploadId"],
+            MultipartUpload={"Parts": parts},
+        )
+        self.assertTrue(
+            self.client.head_object(Bucket="production", Key=key)["ETag"].endswith(
+                '-3"'
+            )
+        )
+
+        self.assertEqual(self.make_sync(use_manifest=False).execute(), 6)
+        copied = self.client.head_object(
+            Bucket="staging", Key="media-staging/videos/intro.mp4"
+        )
+        self.assertFalse(copied["ETag"].endswith('-3"'))
+        self.assertEqual(self.make_sync(use_manifest=False).execute(), 0)
+
+    def test_without_manifest_size_changes_are_copied(self):
+        self.make_sync(use_manifest=False).execute()
+        self.put("production", "media/images/2.jpg", "new image 2")
+        self.assertEqual(self.make_sync(use_manifest=False).execute(), 1)
+        self.assertEqual(
+            self.get("staging", "media-staging/images/2.jpg"), "new image 2"
+        )
+
+    def test_manifest_in_s3(self):
+        location = "s3://staging/.sync/manifest.json"
+        self.make_sync(location).execute()
+        manifest = json.loads(self.get("staging", ".sync/manifest.json"))
+        self.assertEqual(
+            sorted(manifest), [f"images/{number}.jpg" for number in range(5)]
+        )
+        self.assertEqual(self.make_sync(location).execute(), 0)
+
+    def test_failed_copies_are_retried_next_time(self):
+        sync = self.make_sync()
+        original_copy = sync.copy
+
+        def fail_on_image_3(item):
+            if item.key == "images/3.jpg":
+                raise RuntimeError("copy failed")
+            original_copy(item)
+
+        sync.copy = fail_on_image_3
+        with self.assertRaises(RuntimeError):
+            sync.execute()
+
+        self.assertEqual(self.make_sync().execute(), 1)
+        self.assertEqual(self.get("staging", "media-staging/images/3.jpg"), "image 3")
+
+
+class TestNormalizePrefix(TestCase):
+    def test_from_environ_empty_settings(self):
+        # env.dist leaves the optional settings empty
+        sync = from_environ(
+            {
+                "S3_REGION": "us-east-1",
+                "S3_ENDPOINT_URL": "",
+                "S3_SYNC_MANIFEST": "",
+                "S3_SYNC_WORKERS": "",
+                "PRODUCTION_S3_BUCKET": "production",
+                "PRODUCTION_S3_PREFIX": "media",
+                "STAGING_S3_BUCKET": "staging",
+                "STAGING_S3_PREFIX": "media-staging",
+            }
+        )
+        self.assertEqual(sync.max_workers, 16)
+        self.assertIsNone(sync.manifest)
+
+    def test_normalize_prefix(self):
+        self.assertEqual(normalize_prefix(""), "")
+        self.assertEqual(normalize_prefix(None), "")
+        self.assertEqual(normalize_prefix("media"), "media/")
+        self.assertEqual(normalize_prefix("/media/"), "media/")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from scrub import DEFAULT_RULES, Scrubber, ScrubCheckpoint, copy_escape, load_rules
+
+
+class FakeCursor:
+    def __init__(self, connection, name=None):
+        self.connection = connection
+        self.name = name
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, query, params=None):
+        self.connection.executed.append((query, params))
+        if self.name is not None:
+            after_id = params[0]
+            self.rows = [
+                (row_id,)
+                for row_id in self.connection.ids[self.name]
+                if row_id > after_id
+            ]
+
+    def fetchmany(self, size):
+        self.connection.fetches += 1
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def copy_expert(self, query, buffer):
+        self.connection.copied.append(buffer.read())
+
+
+class FakeConnection:
+    def __init__(self, ids=None):
+        # IDs of the rows to scrub, by cursor name
+        self.ids = ids or {}
+        self.executed = []
+        self.copied = []
+        self.fetches = 0
+        self.commits = 0
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+
+class TestScrubber(TestCase):
+    def setUp(self):
+        patcher = patch("builtins.print")
+        self.mock_print = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.checkpoint_path = os.path.join(self.tmp_dir.name, "scrub.json")
+
+        self.reader = FakeConnection(
+            {
+                "scrub_auth_user": list(range(1, 26)),
+                "scrub_social_auth_usersocialauth": [3, 7],
+            }
+        )
+        self.writer = FakeConnection()
+
+    def make_scrubber(self, **kwargs):
+        return Scrubber(
+            self.reader,
+            self.writer,
+            batch_size=10,
+            commit_every=20,
+            checkpoint=ScrubCheckpoint(self.checkpoint_path),
+            **kwargs,
+        )
+
+    def test_scrub(self):
+        self.make_scrubber().execute()
+
+        # 3 batches of users, committed after the second and at the end
+        self.assertEqual(len(self.writer.copied), 3)
+        first_row = self.writer.copied[0].splitlines()[0]
+        self.assertEqual(
+            first_row.split("\t"),
+            ["1", "anonymouse1", "anonymouse1@example.com", "!", "anony", "mouse"],
+        )
+        self.assertEqual(
+            sum(len(copied.splitlines()) for copied in self.writer.copied), 25
+        )
+        # the preparation, two user commits and the social auth commit
+        self.assertEqual(self.writer.commits, 4)
+        self.assertIn(([[3, 7]]), [params for _, params in self.writer.executed])
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_keep_rows_are_filtered_in_the_query(self):
+        self.make_scrubber().execute()
+        params = [params for _, params in self.reader.executed]
+        self.assertEqual(
+            params, [[0, "%@mozillafoundation.org"], [0, "%@mozillafoundation.org"]]
+        )
+
+    def test_resume(self):
+        # a previous run committed up to user 20 before failing
+        with open(self.checkpoint_path, "w") as checkpoint_file:
+            json.dump({"auth_user": 20}, checkpoint_file)
+
+        self.make_scrubber().execute()
+        self.assertEqual(len(self.writer.copied), 1)
+        self.assertEqual(
+            [row.split("\t")[0] for row in self.writer.copied[0].splitlines()],
+            ["21", "22", "23", "24", "25"],
+        )
+
+    def test_failure_keeps_checkpoint(self):
+        scrubber = self.make_scrubber()
+        original_write = scrubber.write_updates
+        batches = []
+
+        def fail_on_third_batch(cursor, table, columns, ids):
+            batches.append(ids)
+            if len(batches) == 3:
+                raise RuntimeError("connection lost")
+            original_write(cursor, table, columns, ids)
+
+        scrubber.write_updates = fail_on_third_batch
+        with self.assertRaises(RuntimeError):
+            scrubber.execute()
+
+        self.assertEqual(ScrubCheckpoint(self.checkpoint_path).get("auth_user"), 20)
+
+    def test_progress(self):
+        clock = iter([0, 2, 4, 6, 8, 10])
+        self.make_scrubber(clock=lambda: next(clock)).scrub_table(
+            "auth_user", DEFAULT_RULES["auth_user"]
+        )
+        self.mock_print.assert_any_call(
+            "auth_user: 20 rows scrubbed, 10 rows/s", flush=True
+        )
+        self.mock_print.assert_any_call(
+            "auth_user: 25 rows scrubbed, 6 rows/s", flush=True
+        )
+
+
+class TestRules(TestCase):
+    def test_copy_escape(self):
+        self.assertEqual(copy_escape("a\tb\\c\nd"), "a\\tb\\\\c\\nd")
+        self.assertEqual(copy_escape(None), "\\N")
+        self.assertEqual(copy_escape(12), "12")
+
+    def test_load_rules(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "rules.json")
+            with open(path, "w") as rules_file:
+                json.dump(
+                    {"auth_user": {"keep": {"column": "email", "suffix": "@x.org"}}},
+                    rules_file,
+                )
+            with self.assertRaises(ValueError):
+                load_rules(path)
+
+            with open(path, "w") as rules_file:
+                json.dump(DEFAULT_RULES, rules_file)
+            self.assertEqual(load_rules(path), DEFAULT_RULES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import threading
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from stage_graph import Stage, StageError, StageGraph
+
+
+class TestStageGraph(TestCase):
+    def setUp(self):
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_in_dependency_order(self):
+        order = []
+        lock = threading.Lock()
+
+        def record(name):
+            def run():
+                with lock:
+                    order.append(name)
+
+            return run
+
+        graph = StageGraph(
+            [
+                Stage("d", record("d"), depends_on=["b", "c"]),
+                Stage("b", record("b"), depends_on=["a"]),
+                Stage("c", record("c"), depends_on=["a"]),
+                Stage("a", record("a")),
+            ]
+        )
+        graph.run()
+
+        self.assertEqual(order[0], "a")
+        self.assertEqual(set(order[1:3]), {"b", "c"})
+        self.assertEqual(order[3], "d")
+        self.assertEqual(set(graph.timings), {"a", "b", "c", "d"})
+
+    def test_independent_stages_run_at_once(self):
+        # Both stages wait for each other, so they can only finish if they run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        graph = StageGraph([Stage("a", barrier.wait), Stage("b", barrier.wait)])
+        graph.run()
+        self.assertEqual(graph.finished, {"a", "b"})
+
+    def test_failure_stops_later_stages(self):
+        started_b = threading.Event()
+        finish_b = threading.Event()
+
+        def fail():
+            started_b.wait(5)
+            raise RuntimeError("boom")
+
+        def slow():
+            started_b.set()
+            finish_b.wait(5)
+
+        def after_failure():
+            finish_b.set()
+
+        graph = StageGraph(
+            [
+                Stage("a", fail),
+                Stage("b", slow),
+                Stage("c", after_failure, depends_on=["a"]),
+                Stage("d", lambda: None, depends_on=["b"]),
+            ]
+        )
+        threading.Timer(0.2, finish_b.set).start()
+        with self.assertRaises(StageError) as context:
+            graph.run()
+
+        self.assertEqual(context.exception.stage, "a")
+        self.assertIsInstance(context.exception.error, RuntimeError)
+        # b was running, so it was waited for, but nothing started after the failure
+        self.assertEqual(graph.started, {"a", "b"})
+        self.assertEqual(graph.finished, {"b"})
+
+    def test_unknown_dependency(self):
+        with self.assertRaises(ValueError):
+            StageGraph([Stage("a", lambda: None, depends_on=["b"])])
+
+    def test_cycle(self):
+        with self.assertRaises(ValueError):
+            StageGraph(
+                [
+                    Stage("a", lambda: None, depends_on=["c"]),
+                    Stage("b", lambda: None, depends_on=["a"]),
+                    Stage("c", lambda: None, depends_on=["b"]),
+                ]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,4 @@
+"""
+pytest imports this as part of the tasks package, whose __init__ makes `runtime` importable for the tests in every task
+directory.
+"""
@@ -0,0 +1,236 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+import runtime
+from pipeline_diff import Commit, PipelineDiff
+
+HEROKU_API = "https://api.heroku.com"
+# The Heroku service that links pipelines to GitHub, which the CLI's pipelines:diff uses too
+KOLKRABBI_API = "https://kolkrabbi.heroku.com"
+GITHUB_API = "https://api.github.com"
+
+
+class PipelineHeads(NamedTuple):
+    """
+    A pipeline's apps and the slugs of their current releases, which is everything a diff needs from Heroku besides
+    the commits
+    """
+
+    pipeline_id: str
+    production_app_id: str
+    staging_slug_id: str
+    production_slug_id: str
+
+    def get_slugs(self):
+        """
+        :return: dict
+            The slug IDs of the staging and production apps, which only change when new code is released
+        """
+        return {"staging": self.staging_slug_id, "production": self.production_slug_id}
+
+
+class HerokuPlatformClient:
+    """
+    Fetches pipeline diffs straight from the Heroku Platform API and GitHub, without the Heroku CLI.
+
+    One pooled session is shared by every request, and diffs for several pipelines are fetched at once.
+    """
+
+    def __init__(self, api_key, github_token=None, pool_size=10, session=None):
+        """
+        :param api_key: str
+            A Heroku API key with access to the pipelines' apps
+        :param github_token: str
+            A GitHub token that can read the pipelines' repositories. Defaults to the token Heroku holds for the
+            GitHub integration, like the CLI.
+        :param pool_size: int
+            The number of keep-alive connections to hold open per host
+        :param session: requests.Session
+            The session to send requests with, instead of a new pooled one
+        """
+        self.api_key = api_key
+        self.github_token = github_token
+        self.github_token_lock = threading.Lock()
+        if session is None:
+            session = runtime.create_session(pool_size=pool_size)
+        self.session = session
+
+    def get_json(self, url, headers=None):
+        response = self.session.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def get_heroku(self, path, headers=None):
+        return self.get_json(
+            f"{HEROKU_API}{path}",
+            headers={
+                "Accept": "application/vnd.heroku+json; version=3",
+                "Authorization": f"Bearer {self.api_key}",
+                **(headers or {}),
+            },
+        )
+
+    def get_kolkrabbi(self, path):
+        return self.get_json(
+            f"{KOLKRABBI_API}{path}",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+
+    def get_github(self, path):
+        with self.github_token_lock:
+            if not self.github_token:
+                token = self.get_kolkrabbi("/account/github/token")
+                self.github_token = token["github"]["token"]
+
+        return self.get_json(
+            f"{GITHUB_API}{path}",
+            headers={
+                "Accept": "application/vnd.github+json",
+                "Authorization": f"Bearer {self.github_token}",
+            },
+        )
+
+    def get_current_slug_id(self, app_id):
+        """
+        :param app_id: str
+            The ID or name of a Heroku app
+        :return: str
+            The ID of the slug of the app's current release, which only changes when new code is released
+        """
+        releases = self.get_heroku(
+            f"/apps/{app_id}/releases",
+            headers={"Range": "version ..; order=desc, max=10"},
+        )
+        for release in releases:
+            # Config var changes make releases without a slug, so skip back to the last build
+            if release["status"] == "succeeded" and release.get("slug"):
+                return release["slug"]["id"]
+
+        raise ValueError(f"No release with a slug found for {app_id}")
+
+    def get_release_commit(self, app_id, slug_id=None):
+        """
+        :param app_id: str
+            The ID or name of a Heroku app
+        :param slug_id: str
+            The ID of the slug of the app's current release, if it is already known
+        :return: str
+            The commit SHA of the app's current release
+        """
+        if slug_id is None:
+            slug_id = self.get_current_slug_id(app_id)
+        return self.get_heroku(f"/apps/{app_id}/slugs/{slug_id}")["commit"]
+
+    def get_pipeline_apps(self, staging_app):
+        """
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :return: tuple
+            The ID of the pipeline and the ID of its production app
+        """
+        coupling = self.get_heroku(f"/apps/{staging_app}/pipeline-couplings")
+        pipeline_id = coupling["pipeline"]["id"]
+        couplings = self.get_heroku(f"/pipelines/{pipeline_id}/pipeline-couplings")
+        production = next(
+            (c["app"] for c in couplings if c["stage"] == "production"), None
+        )
+        if production is None:
+            raise ValueError(f"The pipeline of {staging_app} has no production app")
+
+        return pipeline_id, production["id"]
+
+    def get_pipeline_heads(self, staging_app):
+        """
+        A cheap way to tell whether a pipeline changed, without diffing it
+
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :return: PipelineHeads
+        """
+        pipeline_id, production_app_id = self.get_pipeline_apps(staging_app)
+        return PipelineHeads(
+            pipeline_id,
+            production_app_id,
+            self.get_current_slug_id(staging_app),
+            self.get_current_slug_id(production_app_id),
+        )
+
+    def get_pipeline_diff(self, staging_app, heads=None):
+        """
+        Compare the commit released on a staging app with the commit released on its pipeline's production app
+
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :param heads: PipelineHeads
+            The pipeline's heads, if they were already fetched, so its couplings and releases aren't fetched again
+        :return: PipelineDiff
+        """
+        if heads is None:
+            heads = self.get_pipeline_heads(staging_app)
+        production_app = self.get_heroku(f"/apps/{heads.production_app_id}")["name"]
+
+        staging_commit = self.get_release_commit(staging_app, heads.staging_slug_id)
+        production_commit = self.get_release_commit(
+            heads.production_app_id, heads.production_slug_id
+        )
+        repository = self.get_kolkrabbi(f"/pipelines/{heads.pipeline_id}/repository")[
+            "repository"
+        ]["name"]
+        diff_url = f"https://github.com/{repository}/compare/{production_commit}...{staging_commit}"
+
+        up_to_date = PipelineDiff(
+            f"{staging_app} is up to date with {production_app}", [], diff_url
+        )
+        if staging_commit == production_commit:
+            return up_to_date
+
+        comparison = self.get_github(
+            f"/repos/{repository}/compare/{production_commit}...{staging_commit}"
+        )
+        # Staging is behind production, e.g. after a hotfix, so there is nothing to promote, like the CLI says
+        if comparison["ahead_by"] == 0:
+            return up_to_date
+
+        commits = [
+            Commit(
+                c["sha"][:7],
+                datetime.fromisoformat(c["commit"]["author"]["date"]),
+                c["commit"]["author"]["name"],
+                c["commit"]["message"].splitlines()[0],
+            )
+            for c in comparison["commits"]
+        ]
+        noun = "commit" if comparison["ahead_by"] == 1 else "commits"
+        title = f"{staging_app} is ahead of {production_app} by {comparison['ahead_by']} {noun}"
+
+        return PipelineDiff(title, commits, diff_url)
+
+    def map_pipelines(self, function, staging_apps):
+        with ThreadPoolExecutor(max_workers=max(1, len(staging_apps))) as executor:
+            return list(executor.map(function, staging_apps))
+
+    def get_pipeline_diffs(self, staging_apps):
+        """
+        Fetch the diffs of several pipelines at once
+
+        :param staging_apps: list
+            The names of the staging apps of the pipelines
+        :return: list
+            A PipelineDiff per staging app, in the same order
+        :raises requests.RequestException:
+            If any of the requests fail
+        """
+        return self.map_pipelines(self.get_pipeline_diff, staging_apps)
+
+    def get_all_pipeline_heads(self, staging_apps):
+        """
+        Fetch the heads of several pipelines at once
+
+        :param staging_apps: list
+            The names of the staging apps of the pipelines
+        :return: list
+            The heads of each pipeline, as returned by get_pipeline_heads, in the same order
+        """
+        return self.map_pipelines(self.get_pipeline_heads, staging_apps)
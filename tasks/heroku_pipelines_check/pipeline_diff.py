@@ -0,0 +1,145 @@
+"""
+Parse the output of `heroku pipelines:diff` into typed records.
+
+The CLI prints something like:
+
+    === foundation-mofostaging-net is ahead of foundation-mofoprod by 2 commits
+    SHA      Date                  Author    Message
+    ───────  ────────────────────  ────────  ──────────────
+    1a2b3c4  2020-01-01T10:00:00Z  Jane Doe  Fix the footer
+    5d6e7f8  2020-01-02T11:00:00Z  Joe       Bump Django
+    https://github.com/mozilla/foundation.mozilla.org/compare/1a2b3c4...5d6e7f8
+
+Rather than relying on line positions, every part is matched by its own pattern, so blank lines, warnings or an extra
+separator line don't shift anything. Commit lines are found in one pass of a multiline pattern over the whole output,
+and their author and message are sliced at the column offsets of the table header, which stays cheap for release trains
+of hundreds of commits.
+"""
+
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+TITLE_PATTERN = re.compile(r"^=== (?P<title>.+?)[ \t]*$", re.MULTILINE)
+HEADER_PATTERN = re.compile(
+    r"^[ \t]*SHA[ \t]+Date[ \t]+(?P<author>Author[ \t]+)Message", re.MULTILINE
+)
+COMMIT_PATTERN = re.compile(
+    r"^[ \t]*(?P<sha>[0-9a-f]{7,40})[ \t]+"
+    r"(?P<timestamp>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z)[ \t]+"
+    r"(?P<rest>[^\n]*?)[ \t]*$",
+    re.MULTILINE,
+)
+DIFF_URL_PATTERN = re.compile(
+    r"^[ \t]*(?P<url>https://github\.com/\S+/compare/\S+?)[ \t]*$", re.MULTILINE
+)
+# When the columns can't be located from the header, the author and message are separated by two spaces or more
+COLUMN_SEPARATOR = re.compile(r"[ \t]{2,}")
+
+
+class Commit(NamedTuple):
+    sha: str
+    timestamp: datetime
+    author: str
+    title: str
+
+    @property
+    def summary(self):
+        """
+        The commit's author and title, as posted on Slack
+        """
+        return f"{self.author} {self.title}" if self.author else self.title
+
+
+class PipelineDiff(NamedTuple):
+    # Whether the staging app is ahead of production, like "x is ahead of y by 2 commits" or "x is up to date with y"
+    title: str
+    commits: List[Commit]
+    diff_url: Optional[str]
+
+    @property
+    def is_up_to_date(self):
+        return "is up to date" in self.title
+
+
+def split_author_title(line, match, columns):
+    """
+    Split the end of a commit line into the commit's author and title
+
+    :param line: str
+        The whole commit line
+    :param match: re.Match
+        The COMMIT_PATTERN match of the line
+    :param columns: tuple
+        The offsets of the author and message columns from the table header, or None
+    :return: tuple
+        The author and the title
+    """
+    if columns is not None:
+        author_column, message_column = columns
+        rest_start = match.start("rest") - match.start()
+        # The columns only apply if the line is aligned with the header
+        if rest_start == author_column and line[
+            message_column - 1 : message_column
+        ] in (" ", "\t"):
+            return (
+                line[author_column:message_column].strip(),
+                line[message_column:].strip(),
+            )
+
+    parts = COLUMN_SEPARATOR.split(match.group("rest"), maxsplit=1)
+    if len(parts) == 2:
+        return parts[0], parts[1]
+
+    # Single spaced columns are ambiguous with authors' full names, so keep everything as the title
+    return "", match.group("rest")
+
+
+def parse_commits(output):
+    """
+    :param output: str
+        The output of `heroku pipelines:diff`
+    :return: list
+        A Commit for every line of the commits table, in the order they are printed
+    """
+    header = HEADER_PATTERN.search(output)
+    columns = None
+    if header is not None:
+        columns = (
+            header.start("author") - header.start(),
+            header.end("author") - header.start(),
+        )
+
+    commits = []
+    for match in COMMIT_PATTERN.finditer(output):
+        author, title = split_author_title(match.group(0), match, columns)
+        commits.append(
+            Commit(
+                match.group("sha"),
+                datetime.fromisoformat(match.group("timestamp")),
+                author,
+                title,
+            )
+        )
+
+    return commits
+
+
+def parse_cli_diff(output):
+    """
+    :param output: str
+        The output of `heroku pipelines:diff`
+    :return: PipelineDiff
+        The parsed diff, or None if the output has no title, like when the CLI failed
+    """
+    title = TITLE_PATTERN.search(output)
+    if title is None:
+        return None
+
+    diff_url = DIFF_URL_PATTERN.search(output)
+
+    return PipelineDiff(
+        title.group("title"),
+        parse_commits(output),
+        diff_url.group("url") if diff_url else None,
+    )
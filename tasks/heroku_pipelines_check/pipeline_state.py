@@ -0,0 +1,72 @@
+import json
+import os
+
+import runtime
+
+
+class PipelineState:
+    """
+    What each pipeline looked like the last time it was checked, kept in a JSON file keyed by staging app.
+
+    For every pipeline it records:
+    - the heads of the pipeline, the slugs released on its staging and production apps, so a pipeline whose heads
+      haven't moved can be skipped without diffing it again (only available through the Platform API)
+    - the diff that was last seen, so the same "staging could be promoted" message isn't posted again
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str
+            The state file. It is loaded if it exists and created when the state is saved otherwise.
+        """
+        self.path = path
+        self.pipelines = {}
+
+        if os.path.exists(path):
+            with open(path) as state_file:
+                self.pipelines = json.load(state_file)
+
+    def heads_changed(self, staging_app, heads):
+        """
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :param heads: dict
+            The current heads of the pipeline
+        :return: bool
+            False if the pipeline's heads are the same as the last time it was diffed
+        """
+        return self.pipelines.get(staging_app, {}).get("heads") != heads
+
+    def diff_changed(self, staging_app, diff):
+        """
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :param diff: PipelineDiff
+            The pipeline's current diff
+        :return: bool
+            False if the diff is the same as the last time the pipeline was checked
+        """
+        last_seen = self.pipelines.get(staging_app, {}).get("diff")
+        return last_seen != self.get_signature(diff)
+
+    @staticmethod
+    def get_signature(diff):
+        # The compare URL holds the SHAs of both ends of the diff
+        return diff.diff_url or diff.title
+
+    def record(self, staging_app, diff, heads=None):
+        """
+        :param staging_app: str
+            The name of the staging app in the pipeline
+        :param diff: PipelineDiff
+            The pipeline's current diff
+        :param heads: dict
+            The current heads of the pipeline, if they were fetched
+        """
+        self.pipelines[staging_app] = {
+            "diff": self.get_signature(diff),
+            "heads": heads,
+        }
+
+    def save(self):
+        runtime.write_json_atomic(self.path, self.pipelines, indent=2, sort_keys=True)
@@ -0,0 +1,211 @@
+import time
+
+import runtime
+
+# Slack rejects messages with more blocks than this
+MAX_BLOCKS = 50
+# and section blocks with more text than this
+MAX_SECTION_TEXT = 3000
+# A long release train is split over several sections, and past this many the rest of the commits are left out
+MAX_COMMIT_SECTIONS = 4
+
+ERROR_TEXT = ":fire_engine: Error while running `slack_webhook.py` task on `mofo-cron`. Check logs in Scalyr."
+
+
+# We need an extra button to link to the Thunderbird donate pipeline
+def when(condition, button):
+    if condition:
+        return [button]
+    else:
+        return []
+
+
+def button(text, url):
+    return {
+        "type": "button",
+        "text": {"type": "plain_text", "text": text},
+        "url": url,
+    }
+
+
+def section(text):
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+
+def truncate(text, length):
+    return text if len(text) <= length else text[: length - 1] + "…"
+
+
+def chunk_lines(header, lines, more_text):
+    """
+    Pack lines into as few section texts as fit Slack's limits
+
+    :param header: str
+        The first line of the first section
+    :param lines: list
+        The lines to pack, each ending with a newline
+    :param more_text: function
+        Given the number of lines that didn't fit, returns the line saying so
+    :return: list
+        The texts of the sections
+    """
+    # Room for the note at the end of the last section, however many lines it mentions
+    note_room = len(more_text(len(lines)))
+    texts = []
+    text = header
+    for index, line in enumerate(lines):
+        line = truncate(line.rstrip("\n"), MAX_SECTION_TEXT - note_room - 1) + "\n"
+        is_last_section = len(texts) + 1 == MAX_COMMIT_SECTIONS
+        limit = MAX_SECTION_TEXT - note_room if is_last_section else MAX_SECTION_TEXT
+        if len(text) + len(line) > limit:
+            if is_last_section:
+                texts.append(text + more_text(len(lines) - index))
+                return texts
+            texts.append(text)
+            text = ""
+        text += line
+
+    texts.append(text)
+    return texts
+
+
+def build_pipeline_blocks(app, diff):
+    """
+    :param app: str
+        The name of the Heroku pipeline
+    :param diff: PipelineDiff
+        The pipeline's diff, with staging ahead of production
+    :return: list
+        The Slack blocks announcing the pipeline can be promoted
+    """
+    if len(diff.commits) >= 2:
+        lines = [f"- {commit.summary}\n" for commit in diff.commits]
+    else:
+        lines = [f"{commit.summary}\n" for commit in diff.commits]
+
+    texts = chunk_lines(
+        truncate(f":package: *{diff.title}:*", MAX_SECTION_TEXT - 1) + "\n",
+        lines,
+        lambda num_left: f"_…and {num_left} more, see the GitHub diff_\n",
+    )
+
+    buttons = [
+        button("View Github diff", f"{diff.diff_url}"),
+        button(
+            "View pipeline on Heroku", f"https://dashboard.heroku.com/pipelines/{app}"
+        ),
+    ] + when(
+        app == "donate-wagtail",
+        button(
+            "View Thunderbird pipeline",
+            "https://dashboard.heroku.com/pipelines/thunderbird-donate",
+        ),
+    )
+
+    return [section(text) for text in texts] + [
+        {"type": "actions", "elements": buttons}
+    ]
+
+
+class SlackMessageBuilder:
+    """
+    Gathers the results of every pipeline of a run and packs them into as few messages as Slack accepts
+    """
+
+    def __init__(self):
+        # One list of blocks per pipeline, which are never split between two messages
+        self.groups = []
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add_pipeline(self, app, diff):
+        self.groups.append(build_pipeline_blocks(app, diff))
+
+    def add_error(self, text=ERROR_TEXT):
+        self.groups.append([section(text)])
+
+    def build(self):
+        """
+        :return: list
+            The payloads to post, each within Slack's block limit
+        """
+        payloads = []
+        blocks = []
+        for group in self.groups:
+            # a divider between pipelines sharing a message
+            needed = len(group) + (1 if blocks else 0)
+            if blocks and len(blocks) + needed > MAX_BLOCKS:
+                payloads.append({"blocks": blocks})
+                blocks = []
+            if blocks:
+                blocks.append({"type": "divider"})
+            blocks.extend(group)
+
+        if blocks:
+            payloads.append({"blocks": blocks})
+
+        return payloads
+
+
+class SlackWebhook:
+    """
+    Posts messages to a Slack incoming webhook over one keep-alive session, retrying when Slack rate limits us
+    """
+
+    def __init__(
+        self, url, max_retries=5, backoff_factor=1.0, session=None, task_run=None
+    ):
+        """
+        :param url: str
+            The incoming webhook URL
+        :param max_retries: int
+            How many times a post answered with a 429 is retried
+        :param backoff_factor: float
+            The base of the exponential backoff between retries, when Slack sends no Retry-After header
+        :param session: requests.Session
+            The session to post with, instead of a new one
+        :param task_run: TaskRun
+            Where to count the retries, if anywhere
+        """
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        if session is None:
+            session = runtime.create_session(pool_size=1)
+        self.session = session
+        self.task_run = task_run
+
+    def post(self, payload):
+        """
+        :param payload: dict
+            The message to post
+        :raises requests.HTTPError:
+            If Slack rejects the message, or still rate limits us after every retry
+        """
+        for attempt in range(self.max_retries + 1):
+            response = self.session.post(
+                self.url, json=payload, headers={"Content-Type": "application/json"}
+            )
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            if self.task_run is not None:
+                self.task_run.count_retry()
+            time.sleep(
+                runtime.get_retry_delay(response.headers, attempt, self.backoff_factor)
+            )
+
+        response.raise_for_status()
+
+    def post_all(self, builder):
+        """
+        Post every message of a builder
+
+        :param builder: SlackMessageBuilder
+        :return: int
+            The number of messages posted
+        """
+        payloads = builder.build()
+        for payload in payloads:
+            self.post(payload)
+        return len(payloads)
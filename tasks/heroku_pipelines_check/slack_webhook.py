@@ -1,10 +1,27 @@
-import re
-import shutil
+"""
+Posts a message on Slack about the Heroku pipelines whose staging app could be promoted to production.
+
+Usage: python tasks/heroku_pipelines_check/slack_webhook.py [--profile]
+"""
+
+import argparse
+import os
 import subprocess
+import sys
+import time
 from datetime import date
 
 import requests
-import os
+
+if __name__ == "__main__":
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+from heroku_api import HerokuPlatformClient  # noqa: E402
+from pipeline_diff import parse_cli_diff  # noqa: E402
+from pipeline_state import PipelineState  # noqa: E402
+from slack_message import SlackMessageBuilder, SlackWebhook  # noqa: E402
 
 pipelines = {
     "foundation-site": "foundation-mofostaging-net",
@@ -13,139 +30,219 @@ pipelines = {
     "donate-wagtail": "donate-wagtail-staging",
 }
 
-slack_webhook = os.environ["SLACK_PIPELINES_WEBHOOK"]
-
-
-# Each commit line is divided into 4 columns, separated by two double spaces. We only keep the last two,
-# which contain the commit's author and title.
-def get_commits_info(commits):
-    result = []
-    for commit in commits:
-        # Since Heroku doesn't use 2 spaces anymore to separate the columns, we use a positive lookbehind to find
-        # everything that is after the commit hash and the time and date.
-        extra_spaces = re.compile(r"\s{2,}")
-        commit = re.sub(extra_spaces, " ", commit)
-        m = re.search(
-            r"(?<=[\w\d]{7}\s\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z\s).*", commit
-        )
-
-        result.append(m.group(0) + "\n")
-
-    return result
-
-
-# We need an extra button to link to the Thunderbird donate pipeline
-def when(condition, button):
-    if condition:
-        return [button]
-    else:
-        return []
-
-
-# Task only run from Monday to Thursday
-if date.today().weekday() in range(0, 4):
-
-    # Install HerokuCLI
-    if shutil.which("heroku"):
-        print("Heroku CLI is already installed")
-    else:
-        subprocess.run(
-            "curl https://cli-assets.heroku.com/heroku-linux-x64.tar.gz | tar -xz",
-            shell=True,
-            check=True,
-        )
-        os.environ["PATH"] += ":/app/heroku/bin"
-
-    for app in pipelines:
-        output = (
-            subprocess.check_output(["heroku", "pipelines:diff", "-a", pipelines[app]])
-            .decode()
-            .splitlines(keepends=True)
-        )
-
-        if not output:
-            requests.post(
-                f"{slack_webhook}",
-                json={
-                    "text": ":fire_engine: Error while running `slack_webhook.py` task on `mofo-cron`. Check logs in "
-                    "Scalyr."
-                },
-                headers={"Content-Type": "application/json"},
-            ).raise_for_status()
+
+def get_cli_diff(staging_app):
+    """
+    Run `heroku pipelines:diff` for a staging app and parse its output.
+    Returns None if the output couldn't be parsed, like when the CLI printed nothing.
+    """
+    output = subprocess.check_output(
+        ["heroku", "pipelines:diff", "-a", staging_app]
+    ).decode()
+
+    return parse_cli_diff(output)
+
+
+class CliDiffSource:
+    """
+    Diffs the pipelines one after the other with the Heroku CLI, installing it first if needed
+    """
+
+    def get_diffs(self, pipelines, state, task_run):
+        """
+        :param pipelines: dict
+            The staging app of each pipeline
+        :param state: PipelineState
+            What was last seen of each pipeline, or None. The CLI can't tell cheaply whether a pipeline changed, so
+            every pipeline is diffed.
+        :param task_run: TaskRun
+        :return: iterator
+            An (app, diff, heads) tuple per pipeline, with a None diff if it couldn't be parsed. Pipelines are only
+            diffed as the iterator is consumed, so there are no further CLI calls once a diff failed.
+        """
+        with task_run.step("cli install"):
+            runtime.install_heroku_cli()
+
+        for app, staging_app in pipelines.items():
+            with task_run.step(f"diff {app}"):
+                diff = get_cli_diff(staging_app)
+            yield app, diff, None
+
+
+class ApiDiffSource:
+    """
+    Diffs every pipeline at once through the Heroku Platform API
+    """
+
+    def __init__(self, client):
+        """
+        :param client: HerokuPlatformClient
+        """
+        self.client = client
+
+    def get_diffs(self, pipelines, state, task_run):
+        """
+        :param pipelines: dict
+            The staging app of each pipeline
+        :param state: PipelineState
+            What was last seen of each pipeline, or None. Pipelines whose heads haven't moved since the last run are
+            skipped without diffing them.
+        :param task_run: TaskRun
+        :return: list
+            An (app, diff, heads) tuple per pipeline diffed, or a single None diff if any request failed
+        """
+        apps = list(pipelines)
+        try:
+            pipeline_heads = {}
+            if state is not None:
+                with task_run.step("pipeline heads"):
+                    all_heads = self.client.get_all_pipeline_heads(
+                        list(pipelines.values())
+                    )
+                apps = []
+                for app, app_heads in zip(pipelines, all_heads):
+                    if state.heads_changed(pipelines[app], app_heads.get_slugs()):
+                        apps.append(app)
+                        pipeline_heads[app] = app_heads
+                    else:
+                        print(
+                            f"Skipping {app}, nothing was released since the last run"
+                        )
+
+            def get_diff(app):
+                # The heads lookup already found the pipeline's apps and slugs, so the diff starts from them
+                with task_run.step(f"diff {app}"):
+                    return self.client.get_pipeline_diff(
+                        pipelines[app], pipeline_heads.get(app)
+                    )
+
+            diffs = self.client.map_pipelines(get_diff, apps)
+            heads = [
+                pipeline_heads[app].get_slugs() if app in pipeline_heads else None
+                for app in apps
+            ]
+            return list(zip(apps, diffs, heads))
+        except (requests.RequestException, KeyError, ValueError) as err:
+            print(f"Failed to fetch pipeline diffs: {err!r}")
+            return [(None, None, None)]
+
+
+def get_diff_source(environ, session):
+    """
+    :param environ: dict
+        The environment variables configuring the task
+    :param session: requests.Session
+        The session the Heroku API client sends its requests with
+    :return: ApiDiffSource or CliDiffSource
+        The Platform API when HEROKU_API_KEY is set, the Heroku CLI otherwise
+    """
+    api_key = runtime.get_setting(environ, "HEROKU_API_KEY")
+    if not api_key:
+        return CliDiffSource()
+
+    client = HerokuPlatformClient(
+        api_key,
+        github_token=runtime.get_setting(environ, "GITHUB_TOKEN"),
+        session=session,
+    )
+    return ApiDiffSource(client)
+
+
+def check_pipelines(slack_webhook, diff_source, state, task_run, session=None):
+    """
+    Diff every pipeline and post on Slack about the ones that could be promoted
+    """
+    # Gather every pipeline's results first, so they go out in as few posts as possible
+    message = SlackMessageBuilder()
+    for app, diff, heads in diff_source.get_diffs(pipelines, state, task_run):
+        if diff is None:
+            message.add_error()
             break
+        elif state is not None and not state.diff_changed(pipelines[app], diff):
+            print(f"Already notified about {app}")
+        elif diff.is_up_to_date:
+            print(f"Nothing to promote for {app}")
         else:
-            """
-            We expect Heroku's output to have this structure:
-            - line 1 is empty,
-            - line 2 is the name of the app. It also tells us if prod is behind staging or not.
-            - line 3 is column titles and table structure,
-            - line 4 to the third to last are commits (date, author, etc),
-            - Line second to last is the GitHub diff URL,
-            - Last line is an empty line.
-            """
-            title = output[1].strip("=\n").lstrip()
-            commits_list = output[3:-2]
-            if commits_list:
-                if len(commits_list) >= 2:
-                    body = "".join("- " + e for e in get_commits_info(commits_list))
-                else:
-                    body = get_commits_info(commits_list)[0]
-            diff_url = output[-1].rstrip()
-            up_to_date_regex = "is up to date"
-
-            if re.search(up_to_date_regex, title):
-                print(f"Nothing to promote for {app}")
-            else:
-                print(f"Posting message to Slack for {app}.")
-                slack_payload = {
-                    "blocks": [
-                        {
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": f":package: *{title}:*\n"
-                                        f"{body}"
-                            }
-                        },
-                        {
-                            "type": "actions",
-                            "elements": [
-                                {
-                                    "type": "button",
-                                    "text": {
-                                        "type": "plain_text",
-                                        "text": "View Github diff"
-                                    },
-                                    "url": f"{diff_url}"
-                                },
-                                {
-                                    "type": "button",
-                                    "text": {
-                                        "type": "plain_text",
-                                        "text": "View pipeline on Heroku"
-                                    },
-                                    "url": f"https://dashboard.heroku.com/pipelines/{app}"
-                                }
-                            ]
-                            + when(
-                                app == "donate-wagtail",
-                                {
-                                    "type": "button",
-                                    "text": {
-                                        "type": "plain_text",
-                                        "text": "View Thunderbird pipeline"
-                                    },
-                                    "url": "https://dashboard.heroku.com/pipelines/thunderbird-donate"
-                                }
-                            )
-                        }
-                    ]
-                }
-
-                requests.post(
-                    f"{slack_webhook}",
-                    json=slack_payload,
-                    headers={"Content-Type": "application/json"},
-                ).raise_for_status()
-else:
-    print("The pipelines webhook task only runs from Monday to Thursday.")
+            print(f"Adding {app} to the Slack message.")
+            message.add_pipeline(app, diff)
+
+        if state is not None:
+            state.record(pipelines[app], diff, heads)
+
+    if message:
+        with task_run.step("slack post"):
+            webhook = SlackWebhook(slack_webhook, session=session, task_run=task_run)
+            num_posts = webhook.post_all(message)
+        print(f"Posted {num_posts} message(s) to Slack.")
+
+    # Only once the messages went out, so a failed post is retried on the next run
+    if state is not None:
+        state.save()
+
+
+def main(
+    argv=None,
+    environ=os.environ,
+    today=date.today,
+    clock=time.perf_counter,
+    session=None,
+    diff_source=None,
+):
+    """
+    :param argv: list
+        The command line arguments, defaults to sys.argv
+    :param environ: dict
+        The environment variables configuring the run
+    :param today: function
+        Returns today's date. The task only runs from Monday to Thursday.
+    :param clock: function
+        Returns the current time in seconds, to time the steps of the run with
+    :param session: requests.Session
+        The session to call Slack and the Heroku API with, instead of a new pooled one
+    :param diff_source: object
+        Where the diffs come from, with the get_diffs method of CliDiffSource. Defaults to the Platform API when
+        HEROKU_API_KEY is set and to the Heroku CLI otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        description="Post on Slack about the Heroku pipelines that could be promoted"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="report how long each step of the run took",
+    )
+    options = parser.parse_args(argv)
+
+    if not runtime.should_run(runtime.MONDAY_TO_THURSDAY, today):
+        print("The pipelines webhook task only runs from Monday to Thursday.")
+        return
+
+    slack_webhook = environ["SLACK_PIPELINES_WEBHOOK"]
+
+    # Remembers what was last seen of each pipeline, so unchanged pipelines aren't diffed or announced again
+    state = None
+    if environ.get("PIPELINES_STATE_FILE"):
+        state = PipelineState(environ["PIPELINES_STATE_FILE"])
+
+    task_run = runtime.TaskRun.from_environ(
+        "heroku_pipelines_check", environ, clock=clock
+    )
+    # Slack and the Heroku API share one pool, big enough to diff every pipeline at once
+    if session is None:
+        session = runtime.create_session(pool_size=len(pipelines), task_run=task_run)
+
+    if diff_source is None:
+        diff_source = get_diff_source(environ, session)
+
+    status = "error"
+    try:
+        check_pipelines(slack_webhook, diff_source, state, task_run, session=session)
+        status = "ok"
+    finally:
+        if options.profile:
+            print(task_run.get_report())
+        task_run.finish(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import unittest
+from unittest import TestCase
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from heroku_api import HerokuPlatformClient, PipelineHeads
+from pipeline_diff import Commit, PipelineDiff
+
+PIPELINES = {
+    "foundation-s": ("pipeline-1", "foundation-p", "mozilla/foundation.mozilla.org"),
+    "donate-s": ("pipeline-2", "donate-p", "mozilla/donate-wagtail"),
+}
+
+
+def make_routes(commits):
+    """
+    Fake Heroku, kolkrabbi and GitHub responses for PIPELINES, with each app's current release built from the commit
+    given in `commits`
+    """
+    routes = {
+        "https://kolkrabbi.heroku.com/account/github/token": {
+            "github": {"token": "gh-token"}
+        }
+    }
+    for staging_app, (pipeline_id, production_app, repository) in PIPELINES.items():
+        routes[f"https://api.heroku.com/apps/{staging_app}/pipeline-couplings"] = {
+            "pipeline": {"id": pipeline_id}
+        }
+        routes[f"https://api.heroku.com/pipelines/{pipeline_id}/pipeline-couplings"] = [
+            {"stage": "staging", "app": {"id": f"{staging_app}-id"}},
+            {"stage": "production", "app": {"id": f"{production_app}-id"}},
+        ]
+        routes[f"https://api.heroku.com/apps/{production_app}-id"] = {
+            "name": production_app
+        }
+        routes[f"https://kolkrabbi.heroku.com/pipelines/{pipeline_id}/repository"] = {
+            "repository": {"name": repository}
+        }
+        for app_id in [staging_app, f"{production_app}-id"]:
+            routes[f"https://api.heroku.com/apps/{app_id}/releases"] = [
+                # a config var change, which has no slug
+                {"status": "succeeded", "slug": None},
+                {"status": "failed", "slug": {"id": "broken"}},
+                {"status": "succeeded", "slug": {"id": f"{app_id}-slug"}},
+            ]
+            routes[f"https://api.heroku.com/apps/{app_id}/slugs/{app_id}-slug"] = {
+                "commit": commits[app_id]
+            }
+    return routes
+
+
+def mock_session(routes):
+    def get(url, headers=None):
+        response = Mock()
+        response.json.return_value = routes[url]
+        return response
+
+    session = Mock()
+    session.get.side_effect = get
+    return session
+
+
+class TestHerokuPlatformClient(TestCase):
+    def setUp(self):
+        commits = {
+            "foundation-s": "bbb",
+            "foundation-p-id": "aaa",
+            "donate-s": "ccc",
+            "donate-p-id": "ccc",
+        }
+        self.routes = make_routes(commits)
+        self.routes[
+            "https://api.github.com/repos/mozilla/foundation.mozilla.org/compare/aaa...bbb"
+        ] = {
+            "ahead_by": 2,
+            "commits": [
+                {
+                    "sha": "1a2b3c4d5e6f",
+                    "commit": {
+                        "author": {"name": "Jane", "date": "2020-01-01T10:00:00Z"},
+                        "message": "Fix the footer\n\nLonger description",
+                    },
+                },
+                {
+                    "sha": "5d6e7f8a9b0c",
+                    "commit": {
+                        "author": {"name": "Joe", "date": "2020-01-02T11:00:00Z"},
+                        "message": "Bump Django",
+                    },
+                },
+            ],
+        }
+        self.client = HerokuPlatformClient("test-api-key")
+        self.client.session = mock_session(self.routes)
+
+    def test_get_pipeline_diff_ahead(self):
+        diff = self.client.get_pipeline_diff("foundation-s")
+        self.assertEqual(
+            diff,
+            PipelineDiff(
+                "foundation-s is ahead of foundation-p by 2 commits",
+                [
+                    Commit(
+                        "1a2b3c4",
+                        datetime(2020, 1, 1, 10, tzinfo=timezone.utc),
+                        "Jane",
+                        "Fix the footer",
+                    ),
+                    Commit(
+                        "5d6e7f8",
+                        datetime(2020, 1, 2, 11, tzinfo=timezone.utc),
+                        "Joe",
+                        "Bump Django",
+                    ),
+                ],
+                "https://github.com/mozilla/foundation.mozilla.org/compare/aaa...bbb",
+            ),
+        )
+
+    def test_get_pipeline_diff_up_to_date(self):
+        diff = self.client.get_pipeline_diff("donate-s")
+        self.assertEqual(diff.title, "donate-s is up to date with donate-p")
+        self.assertEqual(diff.commits, [])
+        # no need to ask GitHub
+        requested = [c.args[0] for c in self.client.session.get.call_args_list]
+        self.assertFalse(
+            any(url.startswith("https://api.github.com") for url in requested)
+        )
+
+    def test_get_pipeline_diff_behind(self):
+        self.routes[
+            "https://api.github.com/repos/mozilla/foundation.mozilla.org/compare/aaa...bbb"
+        ] = {"ahead_by": 0, "behind_by": 1, "commits": []}
+        diff = self.client.get_pipeline_diff("foundation-s")
+        self.assertEqual(diff.title, "foundation-s is up to date with foundation-p")
+        self.assertEqual(diff.commits, [])
+        self.assertTrue(diff.is_up_to_date)
+
+    def test_get_release_commit_skips_releases_without_slug(self):
+        self.assertEqual(self.client.get_release_commit("foundation-s"), "bbb")
+
+    def test_get_release_commit_without_slug(self):
+        self.routes["https://api.heroku.com/apps/foundation-s/releases"] = [
+            {"status": "succeeded", "slug": None}
+        ]
+        with self.assertRaises(ValueError):
+            self.client.get_release_commit("foundation-s")
+
+    def test_get_pipeline_heads(self):
+        self.assertEqual(
+            self.client.get_all_pipeline_heads(["foundation-s", "donate-s"]),
+            [
+                PipelineHeads(
+                    "pipeline-1",
+                    "foundation-p-id",
+                    "foundation-s-slug",
+                    "foundation-p-id-slug",
+                ),
+                PipelineHeads(
+                    "pipeline-2", "donate-p-id", "donate-s-slug", "donate-p-id-slug"
+                ),
+            ],
+        )
+        # the heads are found without asking for the slugs, kolkrabbi or GitHub
+        requested = [c.args[0] for c in self.client.session.get.call_args_list]
+        self.assertFalse(any("/slugs/" in url for url in requested))
+        self.assertFalse(
+            any("kolkrabbi" in url or "github" in url for url in requested)
+        )
+
+    def test_get_pipeline_diff_from_heads(self):
+        heads = self.client.get_pipeline_heads("foundation-s")
+        self.client.session.get.reset_mock()
+        diff = self.client.get_pipeline_diff("foundation-s", heads)
+        self.assertEqual(
+            diff.title, "foundation-s is ahead of foundation-p by 2 commits"
+        )
+        # the couplings and releases aren't fetched again
+        requested = [c.args[0] for c in self.client.session.get.call_args_list]
+        self.assertFalse(any("couplings" in url for url in requested))
+        self.assertFalse(any(url.endswith("/releases") for url in requested))
+
+    def test_get_pipeline_diffs_keeps_order(self):
+        diffs = self.client.get_pipeline_diffs(["donate-s", "foundation-s"])
+        self.assertEqual(
+            [diff.title for diff in diffs],
+            [
+                "donate-s is up to date with donate-p",
+                "foundation-s is ahead of foundation-p by 2 commits",
+            ],
+        )
+
+    def test_empty_github_token_is_fetched(self):
+        self.client = HerokuPlatformClient("test-api-key", github_token="")
+        self.client.session = mock_session(self.routes)
+        self.client.get_pipeline_diff("foundation-s")
+        self.assertEqual(self.client.github_token, "gh-token")
+
+    def test_github_token_fetched_once(self):
+        self.client.get_pipeline_diffs(["foundation-s", "foundation-s"])
+        requested = [c.args[0] for c in self.client.session.get.call_args_list]
+        self.assertEqual(
+            requested.count("https://kolkrabbi.heroku.com/account/github/token"), 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from pipeline_diff import Commit, parse_cli_diff
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fixture:
+        return fixture.read()
+
+
+class TestParseCliDiff(TestCase):
+    def test_ahead(self):
+        diff = parse_cli_diff(read_fixture("ahead.txt"))
+        self.assertEqual(
+            diff.title,
+            "foundation-mofostaging-net is ahead of foundation-mofoprod by 3 commits",
+        )
+        self.assertFalse(diff.is_up_to_date)
+        self.assertEqual(
+            diff.diff_url,
+            "https://github.com/mozilla/foundation.mozilla.org/compare/0f0f0f0...9a8b7c6",
+        )
+        self.assertEqual(
+            diff.commits,
+            [
+                Commit(
+                    "1a2b3c4",
+                    datetime(2020, 1, 1, 10, tzinfo=timezone.utc),
+                    "Jane Doe",
+                    "Fix the footer  on mobile",
+                ),
+                Commit(
+                    "5d6e7f8",
+                    datetime(2020, 1, 2, 11, 30, tzinfo=timezone.utc),
+                    "dependabot-preview[…",
+                    "Bump django from 2.2.9 to 2.2.10",
+                ),
+                Commit(
+                    "9a8b7c6",
+                    datetime(2020, 1, 3, 9, 15, 42, tzinfo=timezone.utc),
+                    "Joe",
+                    "Add the campaign page",
+                ),
+            ],
+        )
+        self.assertEqual(diff.commits[0].summary, "Jane Doe Fix the footer  on mobile")
+
+    def test_single_spaced_columns(self):
+        diff = parse_cli_diff(read_fixture("ahead_single_spaced.txt"))
+        self.assertEqual(
+            diff.diff_url,
+            "https://github.com/mozilla/donate-wagtail/compare/0f0f0f0...5d6e7f8",
+        )
+        # Without a header or wider spacing, the author can't be told apart from the title
+        self.assertEqual(
+            [(commit.sha, commit.author, commit.summary) for commit in diff.commits],
+            [
+                ("1a2b3c4", "", "Jane Doe Fix the footer"),
+                ("5d6e7f8", "", "Joe Bump Django"),
+            ],
+        )
+
+    def test_up_to_date(self):
+        diff = parse_cli_diff(read_fixture("up_to_date.txt"))
+        self.assertEqual(
+            diff.title,
+            "network-pulse-staging is up to date with network-pulse-production",
+        )
+        self.assertTrue(diff.is_up_to_date)
+        self.assertEqual(diff.commits, [])
+        self.assertIsNone(diff.diff_url)
+
+    def test_unparseable_output(self):
+        self.assertIsNone(parse_cli_diff(""))
+        self.assertIsNone(parse_cli_diff(" ›   Error: Missing required flag app\n"))
+
+    def test_misaligned_line_falls_back_to_spacing(self):
+        output = read_fixture("ahead.txt").replace(
+            "9a8b7c6  2020-01-03T09:15:42Z  Joe                   Add",
+            "9a8b7c6 2020-01-03T09:15:42Z Joe  Add",
+        )
+        diff = parse_cli_diff(output)
+        self.assertEqual(diff.commits[2].author, "Joe")
+        self.assertEqual(diff.commits[2].title, "Add the campaign page")
+
+    def test_long_release_train(self):
+        started_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        lines = [
+            "=== foundation-mofostaging-net is ahead of foundation-mofoprod by 500 commits",
+            "SHA      Date                  Author      Message",
+            "───────  ────────────────────  ──────────  ───────",
+        ]
+        for number in range(500):
+            timestamp = (started_at + timedelta(minutes=number)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            )
+            lines.append(
+                f"{number:07x}  {timestamp}  Author {number % 10:<3} Commit {number}"
+            )
+        lines.append(
+            "https://github.com/mozilla/foundation.mozilla.org/compare/aaaaaaa...bbbbbbb"
+        )
+
+        diff = parse_cli_diff("\n".join(lines) + "\n")
+        self.assertEqual(len(diff.commits), 500)
+        self.assertEqual(
+            diff.commits[-1],
+            Commit(
+                f"{499:07x}",
+                started_at + timedelta(minutes=499),
+                "Author 9",
+                "Commit 499",
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
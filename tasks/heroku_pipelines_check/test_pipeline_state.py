@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from pipeline_diff import PipelineDiff
+from pipeline_state import PipelineState
+
+AHEAD = PipelineDiff(
+    "staging is ahead of production by 1 commit",
+    [],
+    "https://github.com/mozilla/donate-wagtail/compare/aaa...bbb",
+)
+HEADS = {"staging": "slug-2", "production": "slug-1"}
+
+
+class TestPipelineState(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "pipelines.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_new_pipeline(self):
+        state = PipelineState(self.path)
+        self.assertTrue(state.heads_changed("staging", HEADS))
+        self.assertTrue(state.diff_changed("staging", AHEAD))
+
+    def test_reload(self):
+        state = PipelineState(self.path)
+        state.record("staging", AHEAD, HEADS)
+        state.save()
+
+        reloaded = PipelineState(self.path)
+        self.assertFalse(reloaded.heads_changed("staging", dict(HEADS)))
+        self.assertTrue(
+            reloaded.heads_changed("staging", dict(HEADS, staging="slug-3"))
+        )
+        self.assertFalse(reloaded.diff_changed("staging", AHEAD))
+        # staging moved on, so the compare URL changed
+        self.assertTrue(
+            reloaded.diff_changed(
+                "staging",
+                AHEAD._replace(
+                    diff_url="https://github.com/mozilla/donate-wagtail/compare/aaa...ccc"
+                ),
+            )
+        )
+
+    def test_diff_without_heads(self):
+        state = PipelineState(self.path)
+        state.record("staging", AHEAD)
+        self.assertTrue(state.heads_changed("staging", HEADS))
+        self.assertFalse(state.diff_changed("staging", AHEAD))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+from pipeline_diff import Commit, PipelineDiff
+from slack_message import (
+    MAX_BLOCKS,
+    MAX_COMMIT_SECTIONS,
+    MAX_SECTION_TEXT,
+    SlackMessageBuilder,
+    SlackWebhook,
+    build_pipeline_blocks,
+)
+
+
+def make_diff(num_commits, title_length=20):
+    commits = [
+        Commit(
+            f"{number:07x}",
+            datetime(2020, 1, 1, tzinfo=timezone.utc),
+            "Jane Doe",
+            f"Commit number {number} " + "x" * title_length,
+        )
+        for number in range(num_commits)
+    ]
+    return PipelineDiff(
+        f"staging is ahead of production by {num_commits} commits",
+        commits,
+        "https://github.com/mozilla/foundation.mozilla.org/compare/aaa...bbb",
+    )
+
+
+def section_texts(blocks):
+    return [block["text"]["text"] for block in blocks if block["type"] == "section"]
+
+
+class TestBuildPipelineBlocks(TestCase):
+    def test_small_diff(self):
+        blocks = build_pipeline_blocks("foundation-site", make_diff(2, title_length=0))
+        self.assertEqual(
+            section_texts(blocks),
+            [
+                ":package: *staging is ahead of production by 2 commits:*\n"
+                "- Jane Doe Commit number 0 \n"
+                "- Jane Doe Commit number 1 \n"
+            ],
+        )
+        self.assertEqual(
+            [button["url"] for button in blocks[-1]["elements"]],
+            [
+                "https://github.com/mozilla/foundation.mozilla.org/compare/aaa...bbb",
+                "https://dashboard.heroku.com/pipelines/foundation-site",
+            ],
+        )
+
+    def test_thunderbird_button(self):
+        blocks = build_pipeline_blocks("donate-wagtail", make_diff(1))
+        self.assertEqual(len(blocks[-1]["elements"]), 3)
+
+    def test_long_diff_is_chunked(self):
+        blocks = build_pipeline_blocks(
+            "foundation-site", make_diff(60, title_length=60)
+        )
+        texts = section_texts(blocks)
+        self.assertGreater(len(texts), 1)
+        self.assertTrue(all(len(text) <= MAX_SECTION_TEXT for text in texts))
+        # every commit is there, in order
+        joined = "".join(texts)
+        self.assertIn("Commit number 0 ", joined)
+        self.assertIn("Commit number 59 ", joined)
+        self.assertNotIn("more, see the GitHub diff", joined)
+
+    def test_huge_diff_is_truncated(self):
+        blocks = build_pipeline_blocks(
+            "foundation-site", make_diff(1000, title_length=60)
+        )
+        texts = section_texts(blocks)
+        self.assertEqual(len(texts), MAX_COMMIT_SECTIONS)
+        self.assertTrue(all(len(text) <= MAX_SECTION_TEXT for text in texts))
+        num_shown = "".join(texts).count("- Jane Doe")
+        self.assertTrue(
+            texts[-1].endswith(f"_…and {1000 - num_shown} more, see the GitHub diff_\n")
+        )
+
+    def test_huge_commit_title_is_truncated(self):
+        blocks = build_pipeline_blocks(
+            "foundation-site", make_diff(1, title_length=5000)
+        )
+        self.assertTrue(
+            all(len(text) <= MAX_SECTION_TEXT for text in section_texts(blocks))
+        )
+
+
+class TestSlackMessageBuilder(TestCase):
+    def test_pipelines_share_a_message(self):
+        message = SlackMessageBuilder()
+        message.add_pipeline("foundation-site", make_diff(2))
+        message.add_pipeline("network-pulse", make_diff(3))
+        message.add_error()
+
+        payloads = message.build()
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(
+            [block["type"] for block in payloads[0]["blocks"]],
+            [
+                "section",
+                "actions",
+                "divider",
+                "section",
+                "actions",
+                "divider",
+                "section",
+            ],
+        )
+
+    def test_block_limit(self):
+        message = SlackMessageBuilder()
+        for number in range(30):
+            message.add_pipeline(f"pipeline-{number}", make_diff(2))
+
+        payloads = message.build()
+        self.assertGreater(len(payloads), 1)
+        self.assertTrue(
+            all(len(payload["blocks"]) <= MAX_BLOCKS for payload in payloads)
+        )
+        num_pipelines = sum(
+            block["type"] == "actions"
+            for payload in payloads
+            for block in payload["blocks"]
+        )
+        self.assertEqual(num_pipelines, 30)
+
+    def test_empty(self):
+        message = SlackMessageBuilder()
+        self.assertFalse(message)
+        self.assertEqual(message.build(), [])
+
+
+class TestSlackWebhook(TestCase):
+    def make_response(self, status_code, headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        return response
+
+    @patch("time.sleep")
+    def test_retry_on_429(self, mock_sleep):
+        webhook = SlackWebhook("https://hooks.slack.com/services/test")
+        webhook.session = Mock()
+        webhook.session.post.side_effect = [
+            self.make_response(429, {"Retry-After": "3"}),
+            self.make_response(429),
+            self.make_response(200),
+        ]
+
+        webhook.post({"blocks": []})
+        self.assertEqual(webhook.session.post.call_count, 3)
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [3.0, 2.0])
+
+    @patch("time.sleep")
+    def test_retry_after_date(self, mock_sleep):
+        webhook = SlackWebhook("https://hooks.slack.com/services/test")
+        webhook.session = Mock()
+        webhook.session.post.side_effect = [
+            self.make_response(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}),
+            self.make_response(200),
+        ]
+
+        webhook.post({"blocks": []})
+        mock_sleep.assert_called_once_with(0.0)
+
+    @patch("time.sleep")
+    def test_gives_up(self, mock_sleep):
+        webhook = SlackWebhook("https://hooks.slack.com/services/test", max_retries=2)
+        webhook.session = Mock()
+        webhook.session.post.return_value = self.make_response(429)
+
+        with self.assertRaises(requests.HTTPError):
+            webhook.post({"blocks": []})
+        self.assertEqual(webhook.session.post.call_count, 3)
+
+    def test_post_all_reuses_session(self):
+        webhook = SlackWebhook("https://hooks.slack.com/services/test")
+        webhook.session = Mock()
+        webhook.session.post.return_value = self.make_response(200)
+        message = SlackMessageBuilder()
+        for number in range(30):
+            message.add_pipeline(f"pipeline-{number}", make_diff(2))
+
+        num_posts = webhook.post_all(message)
+        self.assertEqual(webhook.session.post.call_count, num_posts)
+
+
+if __name__ == "__main__":
+    unittest.main()
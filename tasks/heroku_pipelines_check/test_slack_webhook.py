@@ -0,0 +1,205 @@
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+import slack_webhook
+from heroku_api import PipelineHeads
+from pipeline_diff import PipelineDiff
+from pipeline_state import PipelineState
+from slack_message import ERROR_TEXT
+
+THURSDAY = date(2020, 1, 2)
+SATURDAY = date(2020, 1, 4)
+
+AHEAD = PipelineDiff(
+    "staging is ahead of production by 1 commit",
+    [],
+    "https://github.com/mozilla/foundation.mozilla.org/compare/aaa...bbb",
+)
+UP_TO_DATE = PipelineDiff("staging is up to date with production", [], None)
+
+
+class FakeDiffSource:
+    def __init__(self, diffs):
+        self.diffs = diffs
+
+    def get_diffs(self, pipelines, state, task_run):
+        for app, diff in zip(pipelines, self.diffs):
+            with task_run.step(f"diff {app}"):
+                pass
+            yield app, diff, None
+
+
+def make_session():
+    response = requests.Response()
+    response.status_code = 200
+    session = Mock()
+    session.post.return_value = response
+    return session
+
+
+class TestMain(TestCase):
+    def setUp(self):
+        self.environ = {"SLACK_PIPELINES_WEBHOOK": "https://hooks.slack.com/test"}
+        self.session = make_session()
+
+    def run_main(self, diffs, argv=(), today=THURSDAY, **kwargs):
+        with patch("builtins.print") as mock_print:
+            slack_webhook.main(
+                list(argv),
+                environ=self.environ,
+                today=lambda: today,
+                session=self.session,
+                diff_source=FakeDiffSource(diffs),
+                **kwargs,
+            )
+        return mock_print
+
+    def posted_texts(self):
+        return [
+            block["text"]["text"]
+            for c in self.session.post.call_args_list
+            for block in c.kwargs["json"]["blocks"]
+            if block["type"] == "section"
+        ]
+
+    def test_import_has_no_side_effects(self):
+        self.assertNotIn("SLACK_PIPELINES_WEBHOOK", os.environ)
+        self.assertTrue(callable(slack_webhook.main))
+
+    def test_only_runs_monday_to_thursday(self):
+        mock_print = self.run_main([AHEAD], today=SATURDAY)
+        mock_print.assert_called_once_with(
+            "The pipelines webhook task only runs from Monday to Thursday."
+        )
+        self.session.post.assert_not_called()
+
+    def test_single_post(self):
+        self.run_main([AHEAD, UP_TO_DATE, AHEAD, UP_TO_DATE])
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(len(self.posted_texts()), 2)
+
+    def test_nothing_to_promote(self):
+        self.run_main([UP_TO_DATE] * 4)
+        self.session.post.assert_not_called()
+
+    def test_error(self):
+        self.run_main([AHEAD, None, AHEAD])
+        texts = self.posted_texts()
+        self.assertEqual(len(texts), 2)
+        self.assertEqual(texts[-1], ERROR_TEXT)
+
+    def test_profile(self):
+        clock = itertools.count(0, 0.5)
+        mock_print = self.run_main(
+            [AHEAD, UP_TO_DATE], argv=["--profile"], clock=lambda: next(clock)
+        )
+        report = next(
+            c.args[0]
+            for c in mock_print.call_args_list
+            if c.args[0].startswith("Step timings:")
+        )
+        self.assertEqual(
+            report.splitlines(),
+            [
+                "Step timings:",
+                "diff foundation-site     0.500s",
+                "diff network-pulse       0.500s",
+                "slack post               0.500s",
+                "total                    3.500s",
+            ],
+        )
+
+    def test_metrics_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.environ["TASK_METRICS_FILE"] = os.path.join(tmp_dir, "metrics.jsonl")
+            self.run_main([AHEAD, UP_TO_DATE])
+            self.run_main([UP_TO_DATE])
+            with open(self.environ["TASK_METRICS_FILE"]) as metrics_file:
+                summaries = [json.loads(line) for line in metrics_file]
+
+        self.assertEqual(len(summaries), 2)
+        self.assertEqual(summaries[0]["task"], "heroku_pipelines_check")
+        self.assertEqual(summaries[0]["status"], "ok")
+        self.assertEqual(
+            [step["step"] for step in summaries[0]["steps"]],
+            ["diff foundation-site", "diff network-pulse", "slack post"],
+        )
+
+    def test_state(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.environ["PIPELINES_STATE_FILE"] = os.path.join(tmp_dir, "state.json")
+            self.run_main([AHEAD, UP_TO_DATE])
+            self.assertEqual(self.session.post.call_count, 1)
+
+            # nothing changed since
+            mock_print = self.run_main([AHEAD, UP_TO_DATE])
+            self.assertEqual(self.session.post.call_count, 1)
+            mock_print.assert_any_call("Already notified about foundation-site")
+
+            # staging moved on
+            self.run_main([AHEAD._replace(diff_url=AHEAD.diff_url + "c"), UP_TO_DATE])
+            self.assertEqual(self.session.post.call_count, 2)
+
+
+class TestApiDiffSource(TestCase):
+    def test_get_diff_source(self):
+        session = Mock()
+        # env.dist leaves both keys empty
+        source = slack_webhook.get_diff_source(
+            {"HEROKU_API_KEY": "", "GITHUB_TOKEN": ""}, session
+        )
+        self.assertIsInstance(source, slack_webhook.CliDiffSource)
+
+        source = slack_webhook.get_diff_source(
+            {"HEROKU_API_KEY": "key", "GITHUB_TOKEN": ""}, session
+        )
+        self.assertIsInstance(source, slack_webhook.ApiDiffSource)
+        self.assertEqual(source.client.api_key, "key")
+        self.assertIsNone(source.client.github_token)
+
+    def test_skips_pipelines_whose_heads_did_not_move(self):
+        pipelines = {"a": "a-staging", "b": "b-staging"}
+        heads = [
+            PipelineHeads("pipeline-a", "a-production", "1", "0"),
+            PipelineHeads("pipeline-b", "b-production", "2", "2"),
+        ]
+        client = Mock()
+        client.get_all_pipeline_heads.return_value = heads
+        client.map_pipelines.side_effect = lambda function, apps: [
+            function(app) for app in apps
+        ]
+        client.get_pipeline_diff.return_value = AHEAD
+
+        state = PipelineState(os.path.join(tempfile.gettempdir(), "missing.json"))
+        state.record("b-staging", UP_TO_DATE, heads[1].get_slugs())
+
+        source = slack_webhook.ApiDiffSource(client)
+        with patch("builtins.print"):
+            results = source.get_diffs(
+                pipelines, state, slack_webhook.runtime.TaskRun("test")
+            )
+
+        self.assertEqual(results, [("a", AHEAD, {"staging": "1", "production": "0"})])
+        client.get_pipeline_diff.assert_called_once_with("a-staging", heads[0])
+
+    def test_request_failure(self):
+        client = Mock()
+        client.map_pipelines.side_effect = requests.ConnectionError()
+        source = slack_webhook.ApiDiffSource(client)
+        with patch("builtins.print"):
+            results = source.get_diffs(
+                {"a": "a-staging"}, None, slack_webhook.runtime.TaskRun("test")
+            )
+        self.assertEqual(results, [(None, None, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
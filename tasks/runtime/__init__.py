@@ -0,0 +1,25 @@
+"""
+Plumbing shared by the tasks: a pooled HTTP session, a schedule gate, settings from the environment, JSON metrics, the
+Heroku CLI and atomic writes of state files.
+
+The task scripts are run directly, so they put the tasks directory on sys.path before importing this package.
+"""
+
+from .config import get_setting
+from .heroku_cli import install_heroku_cli
+from .http_client import create_session, get_retry_delay
+from .metrics import TaskRun
+from .schedule import MONDAY, MONDAY_TO_THURSDAY, should_run
+from .state_file import write_json_atomic
+
+__all__ = [
+    "MONDAY",
+    "MONDAY_TO_THURSDAY",
+    "TaskRun",
+    "create_session",
+    "get_retry_delay",
+    "get_setting",
+    "install_heroku_cli",
+    "should_run",
+    "write_json_atomic",
+]
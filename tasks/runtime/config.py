@@ -0,0 +1,22 @@
+def get_setting(environ, name, cast=str, default=None):
+    """
+    Read an optional setting from the environment
+
+    :param environ: dict
+        The environment variables configuring the task
+    :param name: str
+        The variable to read
+    :param cast: function
+        Converts the variable's value, like int or float
+    :param default:
+        Returned as is when the variable isn't set, or is empty
+    :raises ValueError:
+        If the value can't be converted
+    """
+    value = environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"{name} has an invalid value: {value!r}")
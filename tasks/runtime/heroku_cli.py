@@ -0,0 +1,28 @@
+import os
+import shutil
+import subprocess
+import threading
+
+HEROKU_CLI_URL = "https://cli-assets.heroku.com/heroku-linux-x64.tar.gz"
+
+# Tasks running in the same process share one download
+install_lock = threading.Lock()
+
+
+def install_heroku_cli(run=subprocess.run):
+    """
+    Download and extract the standalone Heroku CLI into the working directory, unless it's on the PATH already
+
+    :param run: function
+        Runs a shell command, like subprocess.run
+    """
+    with install_lock:
+        if shutil.which("heroku"):
+            print("Heroku CLI is already installed")
+            return
+
+        print("Downloading and extracting the standalone Heroku CLI tool...")
+        run(f"curl {HEROKU_CLI_URL} | tar -xz", shell=True, check=True)
+        os.environ["PATH"] = (
+            os.path.abspath("heroku/bin") + os.pathsep + os.environ["PATH"]
+        )
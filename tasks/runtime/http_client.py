@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def create_session(pool_size=10, auth=None, task_run=None):
+    """
+    Create a session that keeps connections alive and reuses them across requests and threads
+
+    :param pool_size: int
+        The number of keep-alive connections to hold open per host. Threads sharing the session should not outnumber
+        it, or they will open throwaway connections.
+    :param auth: requests.auth.AuthBase
+        The authentication added to every request, if any
+    :param task_run: TaskRun
+        Where to count every response received, retries included, if anywhere
+    :return: requests.Session
+    """
+    # Imported here so the runtime stays cheap to import for tasks that make no requests
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.auth = auth
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    if task_run is not None:
+
+        def count_request(response, *args, **kwargs):
+            task_run.count_request()
+
+        session.hooks["response"].append(count_request)
+
+    return session
+
+
+def get_retry_delay(response_headers, attempt, backoff_factor):
+    """
+    Work out how long to wait before retrying a throttled or failed request.
+
+    Honours the Retry-After header when the server sends one (either as a number of seconds or an HTTP date),
+    otherwise falls back to exponential backoff.
+
+    :param response_headers: dict
+        The headers of the response that is being retried
+    :param attempt: int
+        The number of attempts made so far, starting at 0
+    :param backoff_factor: float
+        The base delay in seconds, doubled on every attempt
+    :return: float
+        The number of seconds to sleep before the next attempt
+    """
+    retry_after = response_headers.get("Retry-After")
+    if isinstance(retry_after, str):
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+
+    return backoff_factor * (2**attempt)
@@ -0,0 +1,121 @@
+import contextlib
+import json
+import threading
+import time
+
+from .config import get_setting
+
+
+class TaskRun:
+    """
+    Times the steps of a task run and counts the HTTP requests and retries it made.
+
+    Each step is logged as a line of JSON when it ends, and the whole run when it finishes, so runs can be compared by
+    searching the logs. Steps can be timed from several threads at once.
+    """
+
+    def __init__(self, task, clock=time.perf_counter, metrics_file=None):
+        """
+        :param task: str
+            The name of the task, added to every log line
+        :param clock: function
+            Returns the current time in seconds
+        :param metrics_file: str
+            A file to append the summary of the run to as a line of JSON, if any
+        """
+        self.task = task
+        self.clock = clock
+        self.metrics_file = metrics_file
+        self.lock = threading.Lock()
+        self.num_requests = 0
+        self.num_retries = 0
+        # The metrics of every step, in the order the steps ended
+        self.steps = []
+        self.started_at = clock()
+
+    @classmethod
+    def from_environ(cls, task, environ, clock=time.perf_counter):
+        return cls(
+            task, clock=clock, metrics_file=get_setting(environ, "TASK_METRICS_FILE")
+        )
+
+    def count_request(self):
+        with self.lock:
+            self.num_requests += 1
+
+    def count_retry(self):
+        with self.lock:
+            self.num_retries += 1
+
+    def log(self, event, **fields):
+        print(json.dumps({"event": event, "task": self.task, **fields}), flush=True)
+
+    @contextlib.contextmanager
+    def step(self, name):
+        """
+        Time a step of the run. The requests and retries of a step are all the ones the run made while it was running,
+        so steps running at the same time share theirs.
+        """
+        with self.lock:
+            requests_before = self.num_requests
+            retries_before = self.num_retries
+        started_at = self.clock()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            duration = self.clock() - started_at
+            with self.lock:
+                step = {
+                    "step": name,
+                    "status": status,
+                    "duration": round(duration, 3),
+                    "requests": self.num_requests - requests_before,
+                    "retries": self.num_retries - retries_before,
+                }
+                self.steps.append(step)
+            self.log("step", **step)
+
+    def get_summary(self, status="ok"):
+        """
+        :param status: str
+            How the run ended, like "ok" or "error"
+        :return: dict
+        """
+        with self.lock:
+            return {
+                "task": self.task,
+                "status": status,
+                "duration": round(self.clock() - self.started_at, 3),
+                "requests": self.num_requests,
+                "retries": self.num_retries,
+                "steps": list(self.steps),
+            }
+
+    def finish(self, status="ok"):
+        """
+        Log the summary of the run, and append it to the metrics file
+
+        :return: dict
+            The summary
+        """
+        summary = self.get_summary(status)
+        self.log("summary", **{key: summary[key] for key in summary if key != "task"})
+        if self.metrics_file:
+            with open(self.metrics_file, "a") as metrics_file:
+                metrics_file.write(json.dumps(summary) + "\n")
+        return summary
+
+    def get_report(self):
+        """
+        :return: str
+            A line per step with its duration, then the duration of the whole run
+        """
+        with self.lock:
+            timings = [(step["step"], step["duration"]) for step in self.steps]
+        timings.append(("total", self.clock() - self.started_at))
+
+        width = max(len(name) for name, _ in timings)
+        lines = [f"{name:<{width}}  {seconds:8.3f}s" for name, seconds in timings]
+        return "Step timings:\n" + "\n".join(lines)
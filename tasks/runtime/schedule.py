@@ -0,0 +1,17 @@
+from datetime import date
+
+# Weekdays, as numbered by date.weekday()
+MONDAY = (0,)
+MONDAY_TO_THURSDAY = (0, 1, 2, 3)
+
+
+def should_run(weekdays, today=date.today):
+    """
+    :param weekdays: tuple
+        The days of the week the task runs on, like MONDAY_TO_THURSDAY
+    :param today: function
+        Returns today's date
+    :return: bool
+        Whether the task runs today. Heroku Scheduler can only run tasks daily, so tasks check the day themselves.
+    """
+    return today().weekday() in weekdays
@@ -0,0 +1,19 @@
+import json
+import os
+
+
+def write_json_atomic(path, data, **dump_options):
+    """
+    Write data out as JSON, replacing the file in one step so a crash can't leave it half written
+
+    :param path: str
+        The file to write
+    :param data:
+        Anything json.dump accepts
+    :param dump_options:
+        Passed on to json.dump, like indent or sort_keys
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as temp_file:
+        json.dump(data, temp_file, **dump_options)
+    os.replace(temp_path, path)
@@ -0,0 +1,30 @@
+import os
+import unittest
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from runtime import install_heroku_cli
+
+
+@patch("builtins.print")
+class TestInstallHerokuCli(TestCase):
+    @patch("shutil.which", return_value="/usr/bin/heroku")
+    def test_already_installed(self, mock_which, mock_print):
+        run = Mock()
+        install_heroku_cli(run)
+        run.assert_not_called()
+
+    @patch.dict(os.environ, {"PATH": "/usr/bin"})
+    @patch("shutil.which", return_value=None)
+    def test_download(self, mock_which, mock_print):
+        run = Mock()
+        install_heroku_cli(run)
+        run.assert_called_once()
+        self.assertIn("heroku-linux-x64.tar.gz", run.call_args.args[0])
+        self.assertEqual(
+            os.environ["PATH"], os.path.abspath("heroku/bin") + os.pathsep + "/usr/bin"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
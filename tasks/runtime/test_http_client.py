@@ -0,0 +1,65 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+from requests.adapters import BaseAdapter
+
+from runtime import TaskRun, create_session, get_retry_delay
+
+
+class FakeAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class TestCreateSession(TestCase):
+    def test_pool(self):
+        session = create_session(pool_size=4, auth=("user", "secret"))
+        adapter = session.get_adapter("https://api.typeform.com")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertIs(session.get_adapter("http://localhost"), adapter)
+        self.assertEqual(session.auth, ("user", "secret"))
+
+    def test_counts_requests(self):
+        with patch("builtins.print"):
+            task_run = TaskRun("test")
+        session = create_session(task_run=task_run)
+        adapter = FakeAdapter()
+        session.mount("https://", adapter)
+
+        session.get("https://api.typeform.com/forms")
+        session.delete("https://api.typeform.com/forms/1/responses")
+
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(task_run.num_requests, 2)
+
+
+class TestGetRetryDelay(TestCase):
+    def test_backoff(self):
+        self.assertEqual(get_retry_delay({}, 0, 0.5), 0.5)
+        self.assertEqual(get_retry_delay({}, 3, 0.5), 4.0)
+
+    def test_retry_after(self):
+        self.assertEqual(get_retry_delay({"Retry-After": "7"}, 3, 0.5), 7.0)
+        self.assertEqual(
+            get_retry_delay({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0, 0.5),
+            0.0,
+        )
+        self.assertEqual(get_retry_delay({"Retry-After": "soon"}, 1, 0.5), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
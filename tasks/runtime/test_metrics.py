@@ -0,0 +1,98 @@
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from runtime import TaskRun
+
+
+def logged_lines(mock_print):
+    return [json.loads(c.args[0]) for c in mock_print.call_args_list]
+
+
+class TestTaskRun(TestCase):
+    def setUp(self):
+        clock = itertools.count(0, 0.5)
+        self.task_run = TaskRun("test", clock=lambda: next(clock))
+
+    def test_step(self):
+        with patch("builtins.print") as mock_print:
+            with self.task_run.step("fetch"):
+                self.task_run.count_request()
+                self.task_run.count_retry()
+                self.task_run.count_request()
+            self.task_run.count_request()
+
+        self.assertEqual(
+            logged_lines(mock_print),
+            [
+                {
+                    "event": "step",
+                    "task": "test",
+                    "step": "fetch",
+                    "status": "ok",
+                    "duration": 0.5,
+                    "requests": 2,
+                    "retries": 1,
+                }
+            ],
+        )
+        self.assertEqual(self.task_run.num_requests, 3)
+
+    def test_failed_step(self):
+        with patch("builtins.print") as mock_print:
+            with self.assertRaises(ValueError):
+                with self.task_run.step("parse"):
+                    raise ValueError()
+
+        self.assertEqual(logged_lines(mock_print)[0]["status"], "error")
+        self.assertEqual(self.task_run.steps[0]["step"], "parse")
+
+    def test_finish(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.task_run.metrics_file = os.path.join(tmp_dir, "metrics.jsonl")
+            with patch("builtins.print") as mock_print:
+                with self.task_run.step("fetch"):
+                    self.task_run.count_request()
+                summary = self.task_run.finish("error")
+                self.task_run.finish()
+
+            with open(self.task_run.metrics_file) as metrics_file:
+                saved = [json.loads(line) for line in metrics_file]
+
+        self.assertEqual(summary["status"], "error")
+        self.assertEqual(summary["duration"], 1.5)
+        self.assertEqual(summary["requests"], 1)
+        self.assertEqual([step["step"] for step in summary["steps"]], ["fetch"])
+        self.assertEqual(saved[0], summary)
+        self.assertEqual(saved[1]["status"], "ok")
+        self.assertEqual(logged_lines(mock_print)[1]["event"], "summary")
+
+    def test_from_environ(self):
+        self.assertIsNone(TaskRun.from_environ("test", {}).metrics_file)
+        task_run = TaskRun.from_environ("test", {"TASK_METRICS_FILE": "metrics.jsonl"})
+        self.assertEqual(task_run.metrics_file, "metrics.jsonl")
+
+    def test_report(self):
+        with patch("builtins.print"):
+            with self.task_run.step("fetch"):
+                pass
+            with self.task_run.step("post"):
+                pass
+
+        self.assertEqual(
+            self.task_run.get_report().splitlines(),
+            [
+                "Step timings:",
+                "fetch     0.500s",
+                "post      0.500s",
+                "total     2.500s",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
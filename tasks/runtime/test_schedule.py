@@ -0,0 +1,36 @@
+import unittest
+from datetime import date
+from unittest import TestCase
+
+from runtime import MONDAY, MONDAY_TO_THURSDAY, get_setting, should_run
+
+MONDAY_DATE = date(2019, 12, 30)
+THURSDAY_DATE = date(2020, 1, 2)
+FRIDAY_DATE = date(2020, 1, 3)
+
+
+class TestShouldRun(TestCase):
+    def test_monday(self):
+        self.assertTrue(should_run(MONDAY, lambda: MONDAY_DATE))
+        self.assertFalse(should_run(MONDAY, lambda: THURSDAY_DATE))
+
+    def test_monday_to_thursday(self):
+        self.assertTrue(should_run(MONDAY_TO_THURSDAY, lambda: THURSDAY_DATE))
+        self.assertFalse(should_run(MONDAY_TO_THURSDAY, lambda: FRIDAY_DATE))
+
+
+class TestGetSetting(TestCase):
+    def test_get_setting(self):
+        environ = {"WORKERS": "4", "RATE": "", "NAME": "purge"}
+        self.assertEqual(get_setting(environ, "WORKERS", int, 1), 4)
+        self.assertEqual(get_setting(environ, "RATE", float, 0.5), 0.5)
+        self.assertEqual(get_setting(environ, "NAME"), "purge")
+        self.assertIsNone(get_setting(environ, "MISSING", int))
+
+    def test_invalid(self):
+        with self.assertRaisesRegex(ValueError, "WORKERS has an invalid value: 'four'"):
+            get_setting({"WORKERS": "four"}, "WORKERS", int)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from runtime import write_json_atomic
+
+
+class TestWriteJsonAtomic(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "state.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write(self):
+        write_json_atomic(self.path, {"b": 1, "a": 2}, sort_keys=True)
+        with open(self.path) as state_file:
+            self.assertEqual(state_file.read(), '{"a": 2, "b": 1}')
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["state.json"])
+
+    def test_failed_write_keeps_the_old_file(self):
+        write_json_atomic(self.path, {"a": 1})
+        with patch("json.dump", side_effect=TypeError("not serializable")):
+            with self.assertRaises(TypeError):
+                write_json_atomic(self.path, {"a": object()})
+        with open(self.path) as state_file:
+            self.assertEqual(json.load(state_file), {"a": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import argparse
+import threading
+import unittest
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import runtime
+from tasks.__main__ import parse_task, run_task, run_tasks
+
+
+class TestParseTask(TestCase):
+    def test_parse_task(self):
+        self.assertEqual(parse_task("typeform"), ("typeform", []))
+        self.assertEqual(
+            parse_task("heroku_pipelines_check --profile"),
+            ("heroku_pipelines_check", ["--profile"]),
+        )
+
+    def test_unknown_task(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_task("mailchimp")
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_task("")
+
+
+class TestRunTasks(TestCase):
+    def setUp(self):
+        patcher = patch("builtins.print")
+        self.mock_print = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.task_run = runtime.TaskRun("tasks")
+
+    def test_tasks_run_at_once(self):
+        # Only returns if both tasks are running at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        results = run_tasks(
+            [("typeform", []), ("heroku_pipelines_check", ["--profile"])],
+            self.task_run,
+            run=lambda name, argv: barrier.wait(),
+        )
+        self.assertEqual(results, [True, True])
+        self.assertEqual(
+            sorted(step["step"] for step in self.task_run.steps),
+            ["heroku_pipelines_check --profile", "typeform"],
+        )
+
+    def test_failure_does_not_stop_other_tasks(self):
+        ran = []
+
+        def run(name, argv):
+            if name == "typeform":
+                raise ValueError("boom")
+            ran.append(name)
+
+        with patch("traceback.print_exc"):
+            results = run_tasks(
+                [("typeform", []), ("heroku_pipelines_check", [])],
+                self.task_run,
+                max_workers=1,
+                run=run,
+            )
+        self.assertEqual(results, [False, True])
+        self.assertEqual(ran, ["heroku_pipelines_check"])
+
+    @patch("importlib.import_module")
+    def test_exit_codes(self, mock_import_module):
+        module = Mock()
+        mock_import_module.return_value = module
+
+        module.main.side_effect = SystemExit(0)
+        self.assertEqual(run_tasks([("typeform", [])], self.task_run), [True])
+
+        module.main.side_effect = SystemExit(1)
+        self.assertEqual(run_tasks([("typeform", [])], self.task_run), [False])
+        self.mock_print.assert_any_call("Task typeform exited with code 1", flush=True)
+        mock_import_module.assert_called_with("delete_responses")
+
+    @patch("importlib.import_module")
+    def test_run_task(self, mock_import_module):
+        run_task("heroku_pipelines_check", ["--profile"])
+        mock_import_module.assert_called_once_with("slack_webhook")
+        mock_import_module.return_value.main.assert_called_once_with(["--profile"])
+
+
+if __name__ == "__main__":
+    unittest.main()
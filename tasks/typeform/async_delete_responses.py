@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import date
+from types import SimpleNamespace
+
+import aiohttp
+
+if __name__ == '__main__':
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+from checkpoint import FormProgress  # noqa: E402
+from delete_responses import BaseDeleteResponses, ScriptError, get_options, get_retry_delay  # noqa: E402
+
+
+class AsyncResponse:
+    """
+    The parts of an aiohttp response the task needs, read while the connection was still open so they can be checked
+    with the same helpers as a requests.Response
+    """
+    def __init__(self, method, url, status_code, reason, headers, content):
+        self.request = SimpleNamespace(method=method)
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncDeleteResponses(BaseDeleteResponses):
+    """
+    An asyncio engine for deleting all the responses in every form contained within the authenticated Typeform account.
+
+    Form listing, response pagination and batched deletes all run as coroutines on a single event loop. Up to
+    `concurrency` forms are purged at once and at most `pool_size` requests are in flight at any time, so one process
+    can keep hundreds of requests going without a thread per request.
+
+    Must be used as an async context manager (execute() does this itself) so the HTTP client is opened and closed on
+    the running loop.
+    """
+
+    def __init__(self, auth_token, concurrency=10, **kwargs):
+        """
+        Takes the same arguments as BaseDeleteResponses, but defaults to purging 10 forms at once
+
+        :raises ScriptError
+            If no auth_token provided to constructor, or any of the limits are out of range
+        """
+        super().__init__(auth_token, concurrency=concurrency, **kwargs)
+        self.client = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.pool_size)
+        self.client = aiohttp.ClientSession(
+            headers={'Authorization': f'Bearer {self.token_auth.token}'},
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.close()
+        self.client = None
+
+    async def request(self, method, url, params=None):
+        """
+        Make an HTTP request on the shared client, retrying 429 and 5xx responses with exponential backoff.
+
+        :param method: str
+            The HTTP method to use
+        :param url: str
+            The URL to request
+        :param params: dict or list
+            The query parameters, as a dict or a list of (key, value) tuples for repeated keys
+        :return: AsyncResponse
+            The last response received. The caller is responsible for checking its status code.
+        """
+        limiter = self.get_rate_limiter(method)
+        attempt = 0
+        while True:
+            await asyncio.sleep(limiter.reserve())
+            async with self.semaphore:
+                started_at = time.monotonic()
+                async with self.client.request(method, url, params=params) as response:
+                    content = await response.read()
+                    completed = AsyncResponse(
+                        method, str(response.url), response.status, response.reason, response.headers, content
+                    )
+                self.record_request_time(time.monotonic() - started_at)
+            if self.task_run is not None:
+                self.task_run.count_request()
+
+            if completed.status_code not in self.RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return completed
+
+            delay = get_retry_delay(completed.headers, attempt, self.backoff_factor)
+            print(f'Retrying {method} {url} in {delay:.1f}s after status {completed.status_code}')
+            if self.task_run is not None:
+                self.task_run.count_retry()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_forms_by_page(self, page):
+        """
+        List a given page of forms in the authenticated Typeform account. See DeleteResponses.get_forms_by_page.
+        """
+        forms_response = await self.request(
+            'GET',
+            f'{self.TYPEFORM_API}',
+            params={
+                'page': page,
+                'page_size': self.FORMS_PAGE_SIZE
+            }
+        )
+
+        return self.parse_forms_page(forms_response)
+
+    async def get_form_id_list(self):
+        """
+        Fetch all forms in the account
+
+        :return: list
+            A list of form ID strings
+        """
+        return [form_item['id'] for form_item in await self.get_form_list()]
+
+    async def get_form_list(self):
+        """
+        Fetch all forms in the account. The first page tells us how many pages there are, the rest are fetched
+        concurrently.
+
+        :return: list
+            A list of the form objects returned by the forms listing
+        """
+        form_list, page_count = await self.get_forms_by_page(1)
+
+        pages = await asyncio.gather(*(self.get_forms_by_page(page) for page in range(2, page_count + 1)))
+        for response_forms, _ in pages:
+            form_list.extend(response_forms)
+
+        return form_list
+
+    async def get_form_responses_by_page(self, form_id, before=None, since=None):
+        """
+        Fetch a single page of a form's responses. See DeleteResponses.get_form_responses_by_page.
+        """
+        response = await self.request(
+            'GET',
+            f'{self.TYPEFORM_API}/{form_id}/responses',
+            params=self.responses_page_params(before, since)
+        )
+
+        return self.parse_responses_page(form_id, response)
+
+    async def iter_response_pages(self, form_id, before=None, since=None):
+        """
+        Paginate through a form's responses using token cursors. See DeleteResponses.iter_response_pages.
+        """
+        while True:
+            response_ids, before = await self.get_form_responses_by_page(form_id, before, since)
+            yield response_ids, before
+
+            if before is None:
+                return
+
+    async def iter_form_response_ids(self, form_id, progress, since=None):
+        """
+        Lazily yield every response ID of a form, one page at a time, starting from the progress' resume cursor
+        """
+        async for response_ids, next_cursor in self.iter_response_pages(form_id, progress.resume_cursor, since):
+            for response_id in response_ids:
+                yield response_id
+            progress.page_listed(len(response_ids), next_cursor)
+
+    async def delete_responses(self, form_id, response_ids):
+        """
+        Delete all the responses identified in response_ids. See DeleteResponses.delete_responses.
+        """
+        del_response = await self.request(
+            'DELETE',
+            f'{self.TYPEFORM_API}/{form_id}/responses',
+            params=[('included_tokens', response_id) for response_id in response_ids]
+        )
+
+        self.check_delete_response(form_id, del_response)
+
+    async def delete_form_responses(self, form_id, response_ids, on_progress=None):
+        """
+        Delete all responses for a form in batches sized by delete_batch_sizer.
+
+        :param form_id:
+            The string identifier of a Typeform form
+        :param response_ids:
+            An async iterable of all response ID strings for the given Typeform form, consumed lazily
+        :param on_progress: callable
+            Called with the total number of responses deleted so far after every successful batch
+        :return: None
+        :raises ScriptError:
+            If a batch can't be deleted, even after shrinking it
+        """
+        sizer = self.delete_batch_sizer
+        base_url = f'{self.TYPEFORM_API}/{form_id}/responses'
+        response_ids = aiter(response_ids)
+        pending = deque()
+        num_deleted = 0
+
+        while True:
+            async for response_id in response_ids:
+                pending.append(response_id)
+                if len(pending) >= sizer.limit:
+                    break
+
+            if not pending:
+                break
+
+            to_del, url_length = sizer.take_batch(pending, base_url)
+            try:
+                await self.delete_responses(form_id, to_del)
+            except ScriptError as err:
+                if not sizer.failed(err.status_code, len(to_del), url_length):
+                    raise
+                pending.extendleft(reversed(to_del))
+                continue
+
+            sizer.succeeded()
+            num_deleted += len(to_del)
+            if on_progress is not None:
+                on_progress(num_deleted)
+
+        print(f'Deleted {num_deleted} responses from form {form_id}')
+
+    async def purge_form(self, form_id):
+        """
+        Delete every response for a single form as its pages arrive, saving progress to the checkpoint if there is one
+        """
+        progress = FormProgress(self.checkpoint, form_id)
+        since = self.purge_state.get_since(form_id) if self.purge_state is not None else None
+        await self.delete_form_responses(
+            form_id, self.iter_form_response_ids(form_id, progress, since), on_progress=progress.deleted
+        )
+        progress.done()
+        if self.purge_state is not None:
+            self.purge_state.mark_purged(form_id, progress.started_at)
+
+    async def purge_forms(self, form_id_list):
+        """
+        Purge the responses of every form in form_id_list with `concurrency` worker coroutines. The first ScriptError
+        is re-raised and the other workers are cancelled.
+
+        :param form_id_list: list
+            A list of form ID strings
+        :return: None
+        :raises ScriptError:
+            If purging any of the forms fails
+        """
+        form_ids = iter(form_id_list)
+
+        async def worker():
+            # The workers share one iterator, so each form is picked up exactly once
+            for form_id in form_ids:
+                await self.purge_form(form_id)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, len(form_id_list)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def execute(self):
+        """
+        Kicks off the chain of calls that glues every step together. See DeleteResponses.execute.
+
+        :return: bool
+            Whether the purge went through, or failed part way
+        """
+        try:
+            async with self:
+                with self.step('list forms'):
+                    form_list = await self.get_form_list()
+
+                if len(form_list) == 0:
+                    print('No forms in account')
+                    return True
+
+                form_id_list = self.get_form_ids_to_purge(form_list)
+
+                with self.step('purge forms'):
+                    await self.purge_forms(self.get_unfinished_form_ids(form_id_list))
+
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+            return True
+        except ScriptError as err:
+            print(f'Failed to execute: {err.message}')
+            return False
+        finally:
+            if self.purge_state is not None:
+                self.purge_state.save()
+            print(self.get_timing_summary())
+
+
+def main(argv=None, environ=os.environ, today=date.today):
+    """
+    Purge the responses of every form in the Typeform account on an event loop. See delete_responses.main.
+    """
+    parser = argparse.ArgumentParser(description='Delete the responses of every form in the Typeform account on asyncio')
+    parser.parse_args(argv)
+
+    if 'TYPEFORM_AUTH_TOKEN' not in environ:
+        print('You must set TYPEFORM_AUTH_TOKEN')
+        exit(1)
+
+    if not runtime.should_run(runtime.MONDAY, today):
+        print('This task runs only on Monday')
+        return
+
+    task_run = runtime.TaskRun.from_environ('typeform', environ)
+    delete_responses = AsyncDeleteResponses(
+        environ['TYPEFORM_AUTH_TOKEN'], task_run=task_run, **get_options(environ, concurrency=10)
+    )
+    succeeded = asyncio.run(delete_responses.execute())
+    task_run.finish('ok' if succeeded else 'error')
+    if not succeeded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # If the script is called directly, instantiates and executes the process
+    main()
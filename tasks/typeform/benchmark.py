@@ -0,0 +1,157 @@
+"""
+Benchmark the Typeform purge against a local stand-in for the Typeform API.
+
+The stub (typeform_stub.TypeformStub) runs in a child process, so the wall time, request rate and peak memory reported
+belong to the purge alone. Each mode gets a freshly populated stub. Peak memory is the benchmark process' high-water
+mark, so when several modes run it can only go up from one row to the next.
+
+Usage:
+    python tasks/typeform/benchmark.py --scenario many-responses
+    python tasks/typeform/benchmark.py --forms 50 --responses 2000 --mode threaded --concurrency 8 --latency 0.02
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import urllib.request
+
+if __name__ == '__main__':
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_delete_responses import AsyncDeleteResponses  # noqa: E402
+from delete_responses import DeleteResponses  # noqa: E402
+from typeform_stub import TypeformStub  # noqa: E402
+
+AUTH_TOKEN = 'benchmark-token'
+
+# (forms, responses per form)
+SCENARIOS = {
+    'many-responses': (10, 100000),
+    'many-forms': (1000, 10),
+    'small': (20, 500),
+}
+
+MODES = ['sequential', 'threaded', 'async']
+
+
+def serve_stub(num_forms, num_responses, stub_options, url_queue):
+    stub = TypeformStub(AUTH_TOKEN, **stub_options)
+    for form_number in range(num_forms):
+        stub.add_form(f'form{form_number}', num_responses)
+    stub.start()
+    url_queue.put(stub.api_url)
+    stub.thread.join()
+
+
+@contextlib.contextmanager
+def stub_process(num_forms, num_responses, stub_options):
+    """
+    Start a populated stub in a child process, yielding its API URL
+    """
+    url_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve_stub, args=(num_forms, num_responses, stub_options, url_queue), daemon=True
+    )
+    process.start()
+    try:
+        yield url_queue.get(timeout=600)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def get_stub_stats(api_url):
+    with urllib.request.urlopen(api_url.replace('/forms', '/_stats')) as response:
+        return json.load(response)
+
+
+def peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, api_url, options):
+    """
+    Purge every form on the stub with the given engine
+
+    :return: float
+        The wall time in seconds
+    """
+    engine_options = {
+        'response_page_size': options.page_size,
+        'delete_batch_size': options.batch_size,
+        'read_rate': options.read_rate,
+        'delete_rate': options.delete_rate,
+        'backoff_factor': 0.05,
+    }
+    if mode == 'sequential':
+        engine = DeleteResponses(AUTH_TOKEN, concurrency=1, **engine_options)
+    elif mode == 'threaded':
+        engine = DeleteResponses(AUTH_TOKEN, concurrency=options.concurrency, **engine_options)
+    else:
+        engine = AsyncDeleteResponses(AUTH_TOKEN, concurrency=options.concurrency, **engine_options)
+    engine.TYPEFORM_API = api_url
+
+    started_at = time.perf_counter()
+    # The per-form output would drown the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == 'async':
+            asyncio.run(engine.execute())
+        else:
+            engine.execute()
+
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Typeform purge against a local Typeform API stub')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), help='a preset number of forms and responses')
+    parser.add_argument('--forms', type=int, default=10, help='number of forms in the synthetic account')
+    parser.add_argument('--responses', type=int, default=1000, help='number of responses in each form')
+    parser.add_argument('--mode', choices=MODES + ['all'], default='all', help='which engine to run')
+    parser.add_argument('--concurrency', type=int, default=8, help='forms purged at once in threaded and async modes')
+    parser.add_argument('--page-size', type=int, default=DeleteResponses.MAX_RESPONSE_PAGE_SIZE)
+    parser.add_argument('--batch-size', type=int, default=None, help='fixed delete batch size, adaptive if unset')
+    parser.add_argument('--read-rate', type=float, default=None, help='rate limit for reads, unlimited if unset')
+    parser.add_argument('--delete-rate', type=float, default=None, help='rate limit for deletes, unlimited if unset')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the stub waits before every response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests the stub answers 429')
+    parser.add_argument('--retry-after', type=int, default=0, help='Retry-After seconds sent with a 429')
+    options = parser.parse_args()
+
+    num_forms, num_responses = SCENARIOS[options.scenario] if options.scenario else (options.forms, options.responses)
+    stub_options = {
+        'latency': options.latency,
+        'throttle_rate': options.throttle_rate,
+        'retry_after': options.retry_after,
+    }
+    modes = MODES if options.mode == 'all' else [options.mode]
+
+    print(f'{num_forms} forms x {num_responses} responses, latency {options.latency}s, '
+          f'throttle rate {options.throttle_rate}')
+    print(f'{"mode":<12}{"wall (s)":>10}{"requests":>10}{"req/s":>10}{"GET":>8}{"DELETE":>8}{"429":>8}'
+          f'{"left":>8}{"peak MB":>10}')
+
+    for mode in modes:
+        with stub_process(num_forms, num_responses, stub_options) as api_url:
+            wall_time = run_mode(mode, api_url, options)
+            stats = get_stub_stats(api_url)
+
+        requests = stats['requests']
+        num_gets = requests.get('GET forms', 0) + requests.get('GET responses', 0)
+        num_deletes = requests.get('DELETE responses', 0)
+        num_throttled = requests.get('THROTTLED 429', 0)
+        num_requests = num_gets + num_deletes + num_throttled
+        print(f'{mode:<12}{wall_time:>10.2f}{num_requests:>10}{num_requests / wall_time:>10.1f}{num_gets:>8}'
+              f'{num_deletes:>8}{num_throttled:>8}{stats["remaining_responses"]:>8}{peak_memory_mb():>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
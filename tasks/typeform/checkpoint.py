@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+
+class Checkpoint:
+    """
+    Records the progress of a purge in a JSON lines file as it happens, so a rerun after a failure can pick up where the
+    last run stopped instead of starting over.
+
+    Each line is one of:
+    {"forms": [...]}                                       the form IDs the run is working through
+    {"form": "abc", "cursor": "...", "started_at": "..."}  every response before this cursor has been deleted, by a
+                                                           purge of the form that started at started_at
+    {"form": "abc", "done": true}                          every response in the form has been deleted
+
+    The file is only appended to, and a partly written last line (from a crash mid-write) is ignored when loading.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: str
+            The checkpoint file. It is loaded if it exists and created on the first write otherwise.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.form_ids = None
+        self.completed = set()
+        self.cursors = {}
+        self.started_at = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path) as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.apply(entry)
+
+    def apply(self, entry):
+        if 'forms' in entry:
+            self.form_ids = entry['forms']
+        elif entry.get('done'):
+            self.completed.add(entry['form'])
+            self.cursors.pop(entry['form'], None)
+            self.started_at.pop(entry['form'], None)
+        elif 'cursor' in entry:
+            self.cursors[entry['form']] = entry['cursor']
+            if 'started_at' in entry:
+                self.started_at[entry['form']] = entry['started_at']
+
+    def record(self, entry):
+        with self.lock:
+            self.apply(entry)
+            with open(self.path, 'a') as checkpoint_file:
+                checkpoint_file.write(json.dumps(entry) + '\n')
+
+    def save_form_ids(self, form_ids):
+        self.record({'forms': list(form_ids)})
+
+    def save_cursor(self, form_id, cursor, started_at=None):
+        entry = {'form': form_id, 'cursor': cursor}
+        if started_at is not None:
+            entry['started_at'] = started_at.isoformat()
+        self.record(entry)
+
+    def mark_done(self, form_id):
+        self.record({'form': form_id, 'done': True})
+
+    def clear(self):
+        """
+        Forget all progress once a run has finished, so the next run starts from scratch
+        """
+        with self.lock:
+            self.form_ids = None
+            self.completed = set()
+            self.cursors = {}
+            self.started_at = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class FormProgress:
+    """
+    Tracks how far through a form a purge has got and keeps its checkpoint cursor up to date.
+
+    Delete batches don't line up with listing pages, so a page's cursor is only saved once every response up to the end
+    of that page has been deleted.
+    """
+
+    def __init__(self, checkpoint, form_id):
+        """
+        :param checkpoint: Checkpoint
+            Where to save progress, or None to not save it
+        :param form_id: str
+            The string identifier of the Typeform form being purged
+        """
+        self.checkpoint = checkpoint
+        self.form_id = form_id
+        self.num_listed = 0
+        # A form resumed from its cursor still hasn't had the responses submitted since the failed run started listed,
+        # so its purge counts as starting when that run's did
+        saved_started_at = checkpoint.started_at.get(form_id) if checkpoint is not None else None
+        if saved_started_at is not None:
+            self.started_at = datetime.fromisoformat(saved_started_at)
+        else:
+            self.started_at = datetime.now(timezone.utc)
+        # (number of responses listed up to the end of a page, cursor of the next page)
+        self.page_ends = deque()
+
+    @property
+    def resume_cursor(self):
+        """
+        The cursor to start listing the form's responses from
+        """
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.cursors.get(self.form_id)
+
+    def page_listed(self, num_responses, next_cursor):
+        self.num_listed += num_responses
+        if next_cursor is not None:
+            self.page_ends.append((self.num_listed, next_cursor))
+
+    def deleted(self, num_deleted):
+        """
+        :param num_deleted: int
+            The total number of the form's responses deleted so far
+        """
+        cursor = None
+        while self.page_ends and self.page_ends[0][0] <= num_deleted:
+            _, cursor = self.page_ends.popleft()
+
+        if cursor is not None and self.checkpoint is not None:
+            self.checkpoint.save_cursor(self.form_id, cursor, self.started_at)
+
+    def done(self):
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(self.form_id)
@@ -1,13 +1,37 @@
+import argparse
+import contextlib
+import math
 import os
+import sys
+import threading
+import time
 import requests
-from datetime import datetime
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from itertools import chain, islice
+from urllib.parse import quote_plus
+
+if __name__ == '__main__':
+    # Run by path, so the tasks directory isn't on sys.path yet for the shared runtime
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime  # noqa: E402
+from checkpoint import Checkpoint, FormProgress  # noqa: E402
+from purge_plan import PurgePlan  # noqa: E402
+from purge_state import PurgeState  # noqa: E402
+# Kept here for the modules and tests that import it from this one
+from runtime import get_retry_delay  # noqa: E402,F401
 
 
 class ScriptError(Exception):
     """
     Something went wrong in the script, details can be found in the "message" attribute
     """
-    pass
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
 
 
 # Authentication header class for requests
@@ -24,15 +48,196 @@ class TokenAuth(requests.auth.AuthBase):
         return request
 
 
-class DeleteResponses:
+class DeleteBatchSizer:
     """
-    A class encapsulating the logic for deleting all the responses in every form contained within the authenticated
-    Typeform account.
+    Decides how many response IDs go into each DELETE request.
+
+    The IDs are sent in the query string, so in adaptive mode a batch is as large as fits in a URL length budget. The
+    batch size doubles after every successful request and halves when Typeform answers 400, 414 or 429, and a 414 also
+    tightens the URL budget. In fixed mode every batch has exactly batch_size IDs, like the original batches of 25.
+    """
+
+    # Typeform rejects deletes of more than 1000 responses at a time
+    MAX_BATCH_SIZE = 1000
+    # Just under the 8KB request line limit most servers and proxies enforce
+    DEFAULT_MAX_URL_LENGTH = 8000
+    INITIAL_BATCH_SIZE = 25
+    SHRINK_STATUS_CODES = frozenset([400, 414, 429])
+    # Every ID is sent as "included_tokens=<id>" preceded by "?" or "&"
+    PARAM_OVERHEAD = len('included_tokens=') + 1
+
+    def __init__(self, batch_size=None, max_url_length=DEFAULT_MAX_URL_LENGTH):
+        """
+        :param batch_size: int
+            A fixed number of IDs per request, or None to size batches adaptively
+        :param max_url_length: int
+            The longest URL an adaptive batch may produce
+        :raises ScriptError:
+            If batch_size is out of range
+        """
+        if batch_size is not None and not 1 <= batch_size <= self.MAX_BATCH_SIZE:
+            raise ScriptError(f'delete batch size must be between 1 and {self.MAX_BATCH_SIZE}')
+
+        self.adaptive = batch_size is None
+        self.limit = batch_size or self.INITIAL_BATCH_SIZE
+        self.max_url_length = max_url_length
+        # Workers share the sizer, so what one form learns about the server carries over to the others
+        self.lock = threading.Lock()
+
+    def take_batch(self, pending, base_url):
+        """
+        Pop the next batch of IDs off the left of pending
+
+        :param pending: collections.deque
+            The response IDs waiting to be deleted
+        :param base_url: str
+            The URL the IDs will be appended to as query parameters
+        :return: (list, int)
+            The batch of IDs and the length of the URL it will produce
+        """
+        with self.lock:
+            limit = self.limit
+            max_url_length = self.max_url_length
+
+        batch = []
+        url_length = len(base_url)
+        while pending and len(batch) < limit:
+            id_length = self.PARAM_OVERHEAD + len(quote_plus(pending[0]))
+            # Always send at least one ID, however long it is
+            if self.adaptive and batch and url_length + id_length > max_url_length:
+                break
+            batch.append(pending.popleft())
+            url_length += id_length
+
+        return batch, url_length
+
+    def succeeded(self):
+        """
+        Record a successful delete, growing the batch size in adaptive mode
+        """
+        if not self.adaptive:
+            return
+
+        with self.lock:
+            self.limit = min(self.limit * 2, self.MAX_BATCH_SIZE)
+
+    def failed(self, status_code, batch_size, url_length):
+        """
+        Record a failed delete, shrinking the batch size in adaptive mode if the server says the batch was too big or
+        too fast
+
+        :param status_code: int
+            The status code Typeform responded with
+        :param batch_size: int
+            The number of IDs in the failed batch
+        :param url_length: int
+            The length of the URL of the failed request
+        :return: bool
+            True if the batch should be retried with the smaller size, False if the error should be raised
+        """
+        if not self.adaptive or status_code not in self.SHRINK_STATUS_CODES or batch_size <= 1:
+            return False
+
+        with self.lock:
+            self.limit = max(1, min(self.limit, batch_size) // 2)
+            if status_code == 414:
+                self.max_url_length = min(self.max_url_length, url_length * 3 // 4)
+
+        return True
+
+
+class RateLimiter:
+    """
+    A token bucket limiting how many requests per second are sent.
+
+    Tokens refill at `rate` per second up to `burst`. Each request reserves a token up front, letting the bucket go
+    into debt, and is told how long to wait for it, so concurrent callers queue up fairly and the combined rate never
+    exceeds the budget. A rate of None disables limiting but still counts requests.
+
+    The limiter only hands out delays, so it works for both threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, rate=None, burst=1, clock=time.monotonic):
+        """
+        :param rate: float
+            The number of requests allowed per second, or None for no limit
+        :param burst: int
+            How many requests may be sent back to back after a quiet period
+        :param clock: callable
+            Returns the current time in seconds, injectable for tests
+        :raises ScriptError:
+            If rate is not positive
+        """
+        if rate is not None and rate <= 0:
+            raise ScriptError('rate limits must be positive')
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+        # Counters: how many requests went through and how long they were held back in total
+        self.acquired = 0
+        self.wait_seconds = 0.0
+
+    def reserve(self):
+        """
+        Take a token from the bucket
+
+        :return: float
+            The number of seconds the caller must wait before sending its request
+        """
+        with self.lock:
+            self.acquired += 1
+            if self.rate is None:
+                return 0.0
+
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.wait_seconds += delay
+            return delay
+
+    def acquire(self):
+        """
+        Block the calling thread until a request may be sent
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BaseDeleteResponses:
+    """
+    The parts of a purge that don't depend on how requests are sent: the settings, batch sizing and rate limits, and
+    checking and decoding what Typeform answers. DeleteResponses sends the requests from threads with requests, and
+    AsyncDeleteResponses from coroutines with aiohttp.
     """
 
     TYPEFORM_API = 'https://api.typeform.com/forms'
 
-    def __init__(self, auth_token):
+    # Status codes that are worth retrying: rate limiting and transient server errors
+    RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+    # The most responses the Responses API will return in a single page
+    MAX_RESPONSE_PAGE_SIZE = 1000
+
+    # The most forms the Forms API will return in a single page
+    FORMS_PAGE_SIZE = 200
+
+    # Typeform allows 2 requests per second per account. Deletes make up most of a purge, so they get most of it.
+    # https://developer.typeform.com/get-started/#rate-limits
+    DEFAULT_READ_RATE = 0.5
+    DEFAULT_DELETE_RATE = 1.5
+
+    def __init__(self, auth_token, concurrency=1, pool_size=None, max_retries=5, backoff_factor=0.5,
+                 response_page_size=MAX_RESPONSE_PAGE_SIZE, delete_batch_size=None,
+                 max_delete_url_length=DeleteBatchSizer.DEFAULT_MAX_URL_LENGTH, read_rate=None, delete_rate=None,
+                 checkpoint=None, purge_state=None, task_run=None):
         """
         Initialize a class instance, setting the authentication token for making requests to TypeForm
 
@@ -40,14 +245,99 @@ class DeleteResponses:
             The token for making requests to TypeForm. Must have at least the following scopes:
             Forms: Read
             Responses: Read, Write
+        :param concurrency: int
+            The maximum number of forms to fetch and delete responses for at the same time. Defaults to 1, which
+            processes forms one after another on the calling thread.
+        :param pool_size: int
+            The number of keep-alive connections to hold open to Typeform. Defaults to the larger of 10 and
+            concurrency, so every worker can reuse a connection.
+        :param max_retries: int
+            How many times to retry a request that failed with a 429 or 5xx status code
+        :param backoff_factor: float
+            The base delay in seconds between retries, doubled on every attempt unless the server sends Retry-After
+        :param response_page_size: int
+            How many responses to request per page when listing a form's responses, between 1 and 1000
+        :param delete_batch_size: int
+            A fixed number of responses to delete per request, e.g. 25 for the original conservative batches. Defaults
+            to None, which sizes batches adaptively (see DeleteBatchSizer).
+        :param max_delete_url_length: int
+            The longest URL an adaptively sized delete request may produce
+        :param read_rate: float
+            The most GET requests (form and response listings) to send per second, or None for no limit
+        :param delete_rate: float
+            The most DELETE requests to send per second, or None for no limit
+        :param checkpoint: Checkpoint
+            Where to record progress so a failed run can be resumed, or None to always start from scratch
+        :param purge_state: PurgeState
+            Per-form high-water marks for an incremental purge, or None to list every response of every form
+        :param task_run: runtime.TaskRun
+            Where to log the steps of the run and count its requests and retries, if anywhere
 
         :raises ScriptError
-            If no auth_token provided to constructor
+            If no auth_token provided to constructor, or concurrency, response_page_size, delete_batch_size or the rate
+            limits are out of range
         """
         if not auth_token:
             raise ScriptError('auth_token not provided')
 
+        if concurrency < 1:
+            raise ScriptError('concurrency must be at least 1')
+
+        if not 1 <= response_page_size <= self.MAX_RESPONSE_PAGE_SIZE:
+            raise ScriptError(f'response_page_size must be between 1 and {self.MAX_RESPONSE_PAGE_SIZE}')
+
         self.token_auth = TokenAuth(auth_token)
+        self.concurrency = concurrency
+        self.pool_size = pool_size if pool_size is not None else max(10, concurrency)
+        self.response_page_size = response_page_size
+        self.delete_batch_sizer = DeleteBatchSizer(delete_batch_size, max_delete_url_length)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.checkpoint = checkpoint
+        self.purge_state = purge_state
+        self.task_run = task_run
+
+        # Every request, including retries, draws from one of these budgets whichever worker sends it
+        self.read_limiter = RateLimiter(read_rate)
+        self.delete_limiter = RateLimiter(delete_rate)
+        self.stats_lock = threading.Lock()
+        self.request_seconds = 0.0
+
+    def step(self, name):
+        """
+        :param name: str
+            The name of a step of the run
+        :return: context manager
+            Times the step on the task run, or does nothing without one
+        """
+        return self.task_run.step(name) if self.task_run is not None else contextlib.nullcontext()
+
+    def get_rate_limiter(self, method):
+        """
+        :param method: str
+            The HTTP method of a request
+        :return: RateLimiter
+            The rate limiter whose budget the request counts against
+        """
+        return self.delete_limiter if method == 'DELETE' else self.read_limiter
+
+    def record_request_time(self, seconds):
+        with self.stats_lock:
+            self.request_seconds += seconds
+
+    def get_timing_summary(self):
+        """
+        Summarise how long the run spent waiting on the rate limiters compared to waiting on Typeform. Times are summed
+        over all workers, so with concurrency they can add up to more than the wall clock time.
+
+        :return: str
+        """
+        limiters = [('reads', self.read_limiter), ('deletes', self.delete_limiter)]
+        num_requests = sum(limiter.acquired for _, limiter in limiters)
+        waits = ', '.join(
+            f'{limiter.wait_seconds:.1f}s for {name} ({limiter.acquired} requests)' for name, limiter in limiters
+        )
+        return f'Spent {self.request_seconds:.1f}s on {num_requests} requests, waited {waits} on rate limits'
 
     def decode_json(self, response):
         """
@@ -69,65 +359,269 @@ class DeleteResponses:
                   f'{response.content}')
             raise ScriptError(f'Failed to decode json payload for {response.request.method} {response.url}: {err}')
 
+    def parse_forms_page(self, forms_response):
+        """
+        Check and decode a page of the forms listing
+
+        :param forms_response: requests.Response
+            The response to a forms listing request
+        :return: (list, int)
+            A tuple of the list of forms returned and the number of pages available to query.
+        :raises ScriptError:
+            If the response has a non-OK status code or an invalid payload
+        """
+        if forms_response.status_code != requests.codes.ok:
+            raise ScriptError(f'Failed to get list of forms: {forms_response.reason} - {forms_response.status_code}')
+
+        json_response = self.decode_json(forms_response)
+
+        return json_response['items'], json_response['page_count']
+
+    def responses_page_params(self, before, since=None):
+        """
+        Build the query parameters for a page of a form's responses
+
+        :param before: str
+            The cursor of the page to request, or None for the first page
+        :param since: str
+            The earliest submission time to list, or None for no limit
+        :return: dict
+        """
+        params = {
+            'page_size': self.response_page_size,
+        }
+        if before is not None:
+            params['before'] = before
+        if since is not None:
+            params['since'] = since
+
+        return params
+
+    def parse_responses_page(self, form_id, response):
+        """
+        Check and decode a page of a form's responses
+
+        :param form_id: str
+            The Typeform form's identifier
+        :param response: requests.Response
+            The response to a responses listing request
+        :return: (list, str)
+            A tuple containing the list of response IDs and the cursor for the next page (None on the last page).
+        :raises ScriptError:
+            If the response has a non-OK status code or an invalid payload
+        """
+        if response.status_code != requests.codes.ok:
+            raise ScriptError(f'Failed to retrieve responses for form: {form_id} - {response.status_code}')
+
+        json_response = self.decode_json(response)
+        items = json_response['items']
+
+        # map the responses so we only have their IDs & Convert the map generator object into a proper list
+        response_ids = list(map(lambda item: item['response_id'], items))
+
+        # page_count counts the pages left from this cursor, so anything above 1 means there is another page to fetch
+        next_cursor = None
+        if items and json_response['page_count'] > 1:
+            next_cursor = items[-1]['token']
+
+        return response_ids, next_cursor
+
+    def select_form_ids(self, form_list):
+        """
+        Pick the forms to purge from the forms listing. In incremental mode, forms that can't have received responses
+        since they were last purged are left out.
+
+        :param form_list: list
+            A list of the form objects returned by the forms listing
+        :return: list
+            A list of form ID strings
+        """
+        if self.purge_state is None:
+            return [form_item['id'] for form_item in form_list]
+
+        form_id_list = self.purge_state.select_forms(form_list)
+        print(f'Skipping {len(form_list) - len(form_id_list)} forms with no new responses since they were last purged')
+        return form_id_list
+
+    def get_form_ids_to_purge(self, form_list):
+        """
+        Pick the forms this run purges. A run resuming from a checkpoint carries on with the forms the failed run
+        picked, leaving out any deleted since, but the listing is still selected from so the purge state knows every
+        form's last_updated_at.
+
+        :param form_list: list
+            A list of the form objects returned by the forms listing
+        :return: list
+            A list of form ID strings
+        """
+        form_id_list = self.select_form_ids(form_list)
+        if self.checkpoint is None or self.checkpoint.form_ids is None:
+            return form_id_list
+
+        listed = {form_item['id'] for form_item in form_list}
+        return [form_id for form_id in self.checkpoint.form_ids if form_id in listed]
+
+    def check_delete_response(self, form_id, del_response):
+        """
+        Check the response to a delete request
+
+        :param form_id: str
+            The string identifier of a Typeform form
+        :param del_response: requests.Response
+            The response to the delete request
+        :return: None
+        :raises ScriptError:
+            If the response has a non-OK status code, with the status code attached
+        """
+        if del_response.status_code != requests.codes.ok:
+            raise ScriptError(
+                f'Failed to delete responses for form: {form_id} - {del_response.status_code}',
+                status_code=del_response.status_code
+            )
+
+    def get_unfinished_form_ids(self, form_id_list):
+        """
+        Save the run's form list to the checkpoint, and leave out any forms a previous run already finished
+
+        :param form_id_list: list
+            A list of form ID strings
+        :return: list
+            The form IDs that still need purging
+        """
+        if self.checkpoint is None:
+            return form_id_list
+
+        self.checkpoint.save_form_ids(form_id_list)
+        unfinished = [form_id for form_id in form_id_list if form_id not in self.checkpoint.completed]
+        if len(unfinished) < len(form_id_list):
+            print(f'Resuming from checkpoint: {len(form_id_list) - len(unfinished)} forms already purged')
+
+        return unfinished
+
+
+class DeleteResponses(BaseDeleteResponses):
+    """
+    A class encapsulating the logic for deleting all the responses in every form contained within the authenticated
+    Typeform account.
+    """
+
+    def __init__(self, auth_token, concurrency=1, **kwargs):
+        """
+        Takes the same arguments as BaseDeleteResponses
+
+        :raises ScriptError
+            If no auth_token provided to constructor, or any of the limits are out of range
+        """
+        super().__init__(auth_token, concurrency=concurrency, **kwargs)
+
+        # One pooled session for every request, so connections are reused across pages, batches and workers
+        self.session = runtime.create_session(self.pool_size, auth=self.token_auth, task_run=self.task_run)
+
+    def request(self, method, url, **kwargs):
+        """
+        Make an HTTP request using the pooled session, retrying 429 and 5xx responses with exponential backoff.
+
+        :param method: str
+            The HTTP method to use
+        :param url: str
+            The URL to request
+        :param kwargs:
+            Any other keyword arguments accepted by requests.Session.request
+        :return: requests.Response
+            The last response received. The caller is responsible for checking its status code.
+        """
+        limiter = self.get_rate_limiter(method)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            started_at = time.monotonic()
+            response = self.session.request(method, url, **kwargs)
+            self.record_request_time(time.monotonic() - started_at)
+
+            if response.status_code not in self.RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return response
+
+            delay = get_retry_delay(response.headers, attempt, self.backoff_factor)
+            print(f'Retrying {method} {url} in {delay:.1f}s after status {response.status_code}')
+            if self.task_run is not None:
+                self.task_run.count_retry()
+            time.sleep(delay)
+            attempt += 1
+
     def get_forms_by_page(self, page):
         """
         Make an HTTP GET request to list a given page of forms in the authenticated Typeform account
         API docs: https://developer.typeform.com/create/reference/retrieve-forms/#retrieve-forms
 
         :param page: int
-            The page to fetch from the endpoint (will handle up to 200 forms per page)
+            The page to fetch from the endpoint (will handle up to FORMS_PAGE_SIZE forms per page)
         :return: (list, int)
             A tuple of the list of forms returned and the number of pages available to query.
         :raises ScriptError:
             If a non-OK status code is received from Typeform
         """
-        forms_response = requests.get(
+        forms_response = self.request(
+            'GET',
             f'{self.TYPEFORM_API}',
-            auth=self.token_auth,
             params={
                 'page': page,
-                'page_size': 200
+                'page_size': self.FORMS_PAGE_SIZE
             }
         )
 
-        if forms_response.status_code != requests.codes.ok:
-            raise ScriptError(f'Failed to get list of forms: {forms_response.reason} - {forms_response.status_code}')
+        return self.parse_forms_page(forms_response)
 
-        json_response = self.decode_json(forms_response)
-
-        return json_response['items'], json_response['page_count']
-
-    def get_form_responses_by_page(self, form_id, page):
+    def get_form_responses_by_page(self, form_id, before=None, since=None):
         """
-        Make an HTTP GET request for a single page of a forms' responses. Up to 1000 per page.
+        Make an HTTP GET request for a single page of a forms' responses. Up to response_page_size (max 1000) per page.
         API docs: https://developer.typeform.com/responses/reference/retrieve-responses/#retrieve-responses
 
+        Pages are addressed with the `before` token cursor: each page is requested with the token of the last response
+        on the previous page, so the pages keep advancing even while responses are being deleted.
+
         :param form_id: str
             The Typeform form's identifier
-        :param page: int
-            The page number to request
-        :return: (list, int)
-            A tuple containing the list of response IDs and the number of pages available to query.
+        :param before: str
+            The token of the last response on the previous page, or None to request the first page
+        :param since: str
+            Only list responses submitted at or after this UTC time (YYYY-MM-DDTHH:MM:SS), or None for all of them
+        :return: (list, str)
+            A tuple containing the list of response IDs and the cursor for the next page (None on the last page).
         :raises ScriptError:
             If a non-OK status code is received from Typeform
         """
-        response = requests.get(
+        response = self.request(
+            'GET',
             f'{self.TYPEFORM_API}/{form_id}/responses',
-            auth=self.token_auth,
-            params={
-                'page_size': 1000,
-            }
+            params=self.responses_page_params(before, since)
         )
 
-        if response.status_code != requests.codes.ok:
-            raise ScriptError(f'Failed to retrieve responses for form: {form_id} - {response.status_code}')
+        return self.parse_responses_page(form_id, response)
 
-        json_response = self.decode_json(response)
+    def count_form_responses(self, form_id, since=None):
+        """
+        Ask Typeform how many responses a form has, without listing them: a page of a single response carries the
+        total in `total_items`.
 
-        # map the responses so we only have their IDs & Convert the map generator object into a proper list
-        response_ids = list(map(lambda item: item['response_id'], json_response['items']))
+        :param form_id: str
+            The Typeform form's identifier
+        :param since: str
+            Only count responses submitted at or after this UTC time (YYYY-MM-DDTHH:MM:SS), or None for all of them
+        :return: int
+        :raises ScriptError:
+            If the response has a non-OK status code or an invalid payload
+        """
+        params = {'page_size': 1}
+        if since is not None:
+            params['since'] = since
 
-        return response_ids, json_response['page_count']
+        response = self.request('GET', f'{self.TYPEFORM_API}/{form_id}/responses', params=params)
+        if response.status_code != requests.codes.ok:
+            raise ScriptError(
+                f'Failed to count responses for form: {form_id} - {response.status_code}', response.status_code
+            )
+
+        return self.decode_json(response)['total_items']
 
     def get_form_id_list(self):
         """
@@ -136,6 +630,16 @@ class DeleteResponses:
         :return: list
             A list of form ID strings
         """
+        # map the list of forms into just form IDs and convert the map into a list.
+        return list(map(lambda form_item: form_item['id'], self.get_form_list()))
+
+    def get_form_list(self):
+        """
+        Fetch all forms in the account, one page at a time, concatenating all the pages together into a single list.
+
+        :return: list
+            A list of the form objects returned by the forms listing
+        """
         form_list = []
 
         response_forms, page_count = self.get_forms_by_page(1)
@@ -146,8 +650,43 @@ class DeleteResponses:
                 response_forms, _ = self.get_forms_by_page(next_page)
                 form_list.extend(response_forms)
 
-        # map the list of forms into just form IDs and convert the map into a list.
-        return list(map(lambda form_item: form_item['id'], form_list))
+        return form_list
+
+    def iter_response_pages(self, form_id, before=None, since=None):
+        """
+        Paginate through a form's responses using token cursors, visiting every response exactly once.
+
+        Pages are fetched lazily: the next page is only requested once the caller asks for it, so at most a single page
+        of response IDs is held in memory.
+
+        :param form_id: str
+            The string identifier for a form, whose responses will be requested
+        :param before: str
+            A cursor returned by a previous page to resume from, or None to start at the first page
+        :param since: str
+            Only list responses submitted at or after this UTC time (YYYY-MM-DDTHH:MM:SS), or None for all of them
+        :return: generator
+            Yields a (list, str) tuple for every page: the response ID strings on the page and the cursor for the next
+            page, which is None for the last page
+        """
+        while True:
+            response_ids, before = self.get_form_responses_by_page(form_id, before, since)
+            yield response_ids, before
+
+            if before is None:
+                return
+
+    def iter_form_responses(self, form_id):
+        """
+        Lazily fetch a form's responses one page at a time.
+
+        :param form_id: str
+            The string identifier for a form, whose responses will be requested
+        :return: generator
+            Yields a list of response ID strings for every page of responses
+        """
+        for response_ids, _ in self.iter_response_pages(form_id):
+            yield response_ids
 
     def get_form_responses(self, form_id):
         """
@@ -158,17 +697,7 @@ class DeleteResponses:
         :return: list
             A list of string identifiers representing every response in a form
         """
-        response_ids = []
-
-        responses, page_count = self.get_form_responses_by_page(form_id, 1)
-        response_ids.extend(responses)
-
-        if page_count > 1:
-            for current_page in range(2, page_count + 1):
-                responses, _ = self.get_form_responses_by_page(form_id, current_page)
-                response_ids.extend(responses)
-
-        return response_ids
+        return list(chain.from_iterable(self.iter_form_responses(form_id)))
 
     def delete_responses(self, form_id, response_ids):
         """
@@ -184,71 +713,267 @@ class DeleteResponses:
         :raises ScriptError:
             If a non-OK status code is received from Typeform
         """
-        del_response = requests.delete(
+        del_response = self.request(
+            'DELETE',
             f'{self.TYPEFORM_API}/{form_id}/responses',
-            auth=self.token_auth,
             params={
                 'included_tokens': response_ids
             }
         )
 
-        if del_response.status_code != requests.codes.ok:
-            raise ScriptError(f'Failed to delete responses for form: {form_id} - {del_response.status_code}')
+        self.check_delete_response(form_id, del_response)
 
-    def delete_form_responses(self, form_id, response_ids):
+    def delete_form_responses(self, form_id, response_ids, on_progress=None):
         """
-        Delete all responses for a form in batches of 25 ids (The request to delete responses has IDs in the query, so limiting it to something reasonably small)
+        Delete all responses for a form in batches. The request to delete responses has IDs in the query, so batches
+        are sized by delete_batch_sizer to keep the URL within limits.
 
         :param form_id:
             The string identifier of a Typeform form
         :param response_ids:
-            A list of all response ID strings for the given Typeform form
+            An iterable of all response ID strings for the given Typeform form. It is consumed lazily, so a generator
+            can be passed to delete responses as they are fetched.
+        :param on_progress: callable
+            Called with the total number of responses deleted so far after every successful batch
+        :return: None
+        :raises ScriptError:
+            If a batch can't be deleted, even after shrinking it
+        """
+        sizer = self.delete_batch_sizer
+        base_url = f'{self.TYPEFORM_API}/{form_id}/responses'
+        response_ids = iter(response_ids)
+        pending = deque()
+        num_deleted = 0
+
+        while True:
+            # Only pull as many IDs as the next batch can hold, so pages are still fetched lazily
+            for response_id in response_ids:
+                pending.append(response_id)
+                if len(pending) >= sizer.limit:
+                    break
+
+            if not pending:
+                break
+
+            to_del, url_length = sizer.take_batch(pending, base_url)
+            try:
+                self.delete_responses(form_id, to_del)
+            except ScriptError as err:
+                if not sizer.failed(err.status_code, len(to_del), url_length):
+                    raise
+                # Put the batch back to be retried in smaller pieces
+                pending.extendleft(reversed(to_del))
+                continue
+
+            sizer.succeeded()
+            num_deleted += len(to_del)
+            if on_progress is not None:
+                on_progress(num_deleted)
+
+        print(f'Deleted {num_deleted} responses from form {form_id}')
+
+    def purge_form(self, form_id):
+        """
+        Delete every response for a single form, streaming each page of response IDs into the delete batches as it
+        arrives rather than collecting them all first. Progress is saved to the checkpoint, if there is one, and a
+        form that was part way through in a previous run resumes from its saved cursor.
+
+        :param form_id: str
+            The string identifier of a Typeform form
+        :return: None
+        """
+        progress = FormProgress(self.checkpoint, form_id)
+        since = self.purge_state.get_since(form_id) if self.purge_state is not None else None
+
+        def form_responses():
+            for response_ids, next_cursor in self.iter_response_pages(form_id, progress.resume_cursor, since):
+                yield from response_ids
+                progress.page_listed(len(response_ids), next_cursor)
+
+        self.delete_form_responses(form_id, form_responses(), on_progress=progress.deleted)
+        progress.done()
+        if self.purge_state is not None:
+            self.purge_state.mark_purged(form_id, progress.started_at)
+
+    def purge_forms(self, form_id_list):
+        """
+        Purge the responses of every form in form_id_list, using up to `concurrency` worker threads.
+
+        Forms are handed to the workers in order, one whenever a worker is free. Once a worker raises a ScriptError no
+        more forms are started, and the error is re-raised here when the forms in progress are done, matching the
+        sequential behaviour of stopping at the first failure.
+
+        :param form_id_list: list
+            A list of form ID strings
         :return: None
+        :raises ScriptError:
+            If purging any of the forms fails
+        """
+        if self.concurrency == 1:
+            for form_id in form_id_list:
+                self.purge_form(form_id)
+            return
+
+        form_ids = iter(form_id_list)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Forms aren't queued up front, so none can be picked up after a failure
+            running = {executor.submit(self.purge_form, form_id) for form_id in islice(form_ids, self.concurrency)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                errors.extend(future.exception() for future in done if future.exception() is not None)
+                if not errors:
+                    running |= {executor.submit(self.purge_form, form_id) for form_id in islice(form_ids, len(done))}
+
+        if errors:
+            raise errors[0]
+
+    def plan(self):
         """
-        num_to_delete = len(response_ids)
-        while len(response_ids) > 0:
-            to_del = response_ids[:25]
-            response_ids = response_ids[25:]
-            self.delete_responses(form_id, to_del)
+        Work out what a purge would do with the current settings, without deleting anything. The forms are listed and
+        selected as for a purge, then the responses of each form are counted with one request, up to `concurrency` at
+        once. The checkpoint is ignored and neither it nor the purge state is saved.
 
-        print(f'Deleted {num_to_delete} responses from form {form_id}')
+        :return: PurgePlan
+        :raises ScriptError:
+            If listing the forms or counting their responses fails
+        """
+        form_list = self.get_form_list()
+        form_id_list = self.select_form_ids(form_list)
+
+        def count(form_id):
+            since = self.purge_state.get_since(form_id) if self.purge_state is not None else None
+            return self.count_form_responses(form_id, since)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            response_counts = dict(zip(form_id_list, executor.map(count, form_id_list)))
+
+        num_requests = self.read_limiter.acquired + self.delete_limiter.acquired
+        return PurgePlan(
+            response_counts,
+            num_form_pages=max(1, math.ceil(len(form_list) / self.FORMS_PAGE_SIZE)),
+            response_page_size=self.response_page_size,
+            batch_sizer=self.delete_batch_sizer,
+            base_url=self.TYPEFORM_API,
+            concurrency=self.concurrency,
+            read_rate=self.read_limiter.rate,
+            delete_rate=self.delete_limiter.rate,
+            request_seconds=self.request_seconds / num_requests if num_requests else 0.0
+        )
 
     def execute(self):
         """
         Kicks off the chain of calls that glues every step together.
 
-        1. Fetch all forms (by page if necessary)
+        1. Fetch all forms (by page if necessary), leaving out untouched forms in incremental mode, or carrying on with
+           the forms of an unfinished run
         2. For each form, fetch all responses (by page if necessary)
-        3. For each form, delete all responses (in batches of 25)
+        3. For each form, delete all responses (in batches sized to fit the URL) as each page of responses arrives
 
-        :return: None
+        Steps 2 and 3 run for up to `concurrency` forms at once.
+
+        :return: bool
+            Whether the purge went through, or failed part way
         """
         try:
             # Get the list of form IDs
-            form_id_list = self.get_form_id_list()
+            with self.step('list forms'):
+                form_list = self.get_form_list()
 
-            if len(form_id_list) == 0:
+            if len(form_list) == 0:
                 print('No forms in account')
-                exit(0)
+                return True
+
+            form_id_list = self.get_form_ids_to_purge(form_list)
 
             # For each form, fetch the list of response IDs and delete them
-            for form_id in form_id_list:
-                form_responses = self.get_form_responses(form_id)
-                self.delete_form_responses(form_id, form_responses)
+            with self.step('purge forms'):
+                self.purge_forms(self.get_unfinished_form_ids(form_id_list))
+
+            # Everything is done, so the next run should start from scratch
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
+            return True
         except ScriptError as err:
             print(f'Failed to execute: {err.message}')
+            return False
+        finally:
+            # Keep the high-water marks of the forms that were purged, even if the run failed part way
+            if self.purge_state is not None:
+                self.purge_state.save()
+            print(self.get_timing_summary())
 
 
-if __name__ == '__main__':
-    # If the script is called directly, instantiates and executes the process
-    if 'TYPEFORM_AUTH_TOKEN' not in os.environ:
+def get_options(environ, concurrency=1):
+    """
+    Read the purge's settings from the environment variables listed in the README
+
+    :param environ: dict
+        The environment variables configuring the purge
+    :param concurrency: int
+        The concurrency to use when TYPEFORM_CONCURRENCY isn't set
+    :return: dict
+        The keyword arguments to create a DeleteResponses (or AsyncDeleteResponses) with, besides the auth token
+    """
+    return {
+        'concurrency': runtime.get_setting(environ, 'TYPEFORM_CONCURRENCY', int, concurrency),
+        'max_retries': runtime.get_setting(environ, 'TYPEFORM_MAX_RETRIES', int, 5),
+        'response_page_size': runtime.get_setting(
+            environ, 'TYPEFORM_RESPONSE_PAGE_SIZE', int, DeleteResponses.MAX_RESPONSE_PAGE_SIZE
+        ),
+        'delete_batch_size': runtime.get_setting(environ, 'TYPEFORM_DELETE_BATCH_SIZE', int),
+        'read_rate': runtime.get_setting(environ, 'TYPEFORM_READ_RATE', float, DeleteResponses.DEFAULT_READ_RATE),
+        'delete_rate': runtime.get_setting(environ, 'TYPEFORM_DELETE_RATE', float, DeleteResponses.DEFAULT_DELETE_RATE),
+        'checkpoint': Checkpoint(environ['TYPEFORM_CHECKPOINT_FILE']) if 'TYPEFORM_CHECKPOINT_FILE' in environ
+        else None,
+        'purge_state': PurgeState(environ['TYPEFORM_STATE_FILE']) if 'TYPEFORM_STATE_FILE' in environ else None,
+    }
+
+
+def main(argv=None, environ=os.environ, today=date.today):
+    """
+    Purge the responses of every form in the Typeform account
+
+    :param argv: list
+        The command line arguments, defaults to sys.argv
+    :param environ: dict
+        The environment variables configuring the purge, as listed in the README
+    :param today: function
+        Returns today's date. The purge only runs on Mondays, but it can be planned any day.
+    """
+    parser = argparse.ArgumentParser(description='Delete the responses of every form in the Typeform account')
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='print how many requests the purge would send and how long it would take, without deleting anything'
+    )
+    options = parser.parse_args(argv)
+
+    if 'TYPEFORM_AUTH_TOKEN' not in environ:
         print('You must set TYPEFORM_AUTH_TOKEN')
         exit(1)
 
-    # Check the day of the week
-    if not datetime.today().weekday() == 0:
+    if options.plan:
+        delete_responses = DeleteResponses(environ['TYPEFORM_AUTH_TOKEN'], **get_options(environ))
+        try:
+            print(delete_responses.plan().get_report())
+        except ScriptError as err:
+            print(f'Failed to plan: {err.message}')
+            exit(1)
+        return
+
+    if not runtime.should_run(runtime.MONDAY, today):
         print('This task runs only on Monday')
-        exit(0)
+        return
+
+    task_run = runtime.TaskRun.from_environ('typeform', environ)
+    delete_responses = DeleteResponses(environ['TYPEFORM_AUTH_TOKEN'], task_run=task_run, **get_options(environ))
+    succeeded = delete_responses.execute()
+    task_run.finish('ok' if succeeded else 'error')
+    if not succeeded:
+        sys.exit(1)
 
-    delete_responses = DeleteResponses(os.environ['TYPEFORM_AUTH_TOKEN'])
-    delete_responses.execute()
+
+if __name__ == '__main__':
+    # If the script is called directly, instantiates and executes the process
+    main()
@@ -0,0 +1,169 @@
+import math
+
+
+def format_duration(seconds):
+    """
+    :param seconds: float
+    :return: str
+        The duration in hours, minutes and seconds, e.g. "1h 02m 05s"
+    """
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}h {minutes:02d}m {seconds:02d}s'
+    if minutes:
+        return f'{minutes}m {seconds:02d}s'
+    return f'{seconds}s'
+
+
+class PurgePlan:
+    """
+    A projection of the requests a purge will send and how long it will take, worked out from the number of responses
+    in each form rather than from their IDs.
+
+    The runtime is the slowest of three bounds: the reads at the read rate, the deletes at the delete rate, and every
+    request at the average latency measured while counting the responses, spread over the workers. Retries aren't
+    accounted for, so a throttled purge will take longer.
+    """
+
+    # Typeform response tokens are 32 characters long, which is what decides how many fit in a delete URL
+    ESTIMATED_TOKEN_LENGTH = 32
+
+    def __init__(self, response_counts, num_form_pages, response_page_size, batch_sizer, base_url, concurrency=1,
+                 read_rate=None, delete_rate=None, request_seconds=0.0):
+        """
+        :param response_counts: dict
+            The number of responses to delete in each form to purge, by form ID
+        :param num_form_pages: int
+            The number of pages of forms listed
+        :param response_page_size: int
+            How many responses are listed per page
+        :param batch_sizer: DeleteBatchSizer
+            How the deletes will be batched. It isn't changed.
+        :param base_url: str
+            The forms endpoint, which the delete URLs start with
+        :param concurrency: int
+            The number of forms purged at once
+        :param read_rate: float
+            The most GET requests sent per second, or None for no limit
+        :param delete_rate: float
+            The most DELETE requests sent per second, or None for no limit
+        :param request_seconds: float
+            The average time Typeform took to answer a request
+        """
+        self.response_counts = response_counts
+        self.num_form_pages = num_form_pages
+        self.response_page_size = response_page_size
+        self.batch_sizer = batch_sizer
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.read_rate = read_rate
+        self.delete_rate = delete_rate
+        self.request_seconds = request_seconds
+
+        self.num_list_requests = sum(self.get_list_requests(count) for count in response_counts.values())
+        self.num_delete_requests = self.get_delete_requests()
+
+    @property
+    def num_responses(self):
+        return sum(self.response_counts.values())
+
+    @property
+    def num_reads(self):
+        return self.num_form_pages + self.num_list_requests
+
+    @property
+    def num_requests(self):
+        return self.num_reads + self.num_delete_requests
+
+    def get_list_requests(self, num_responses):
+        """
+        :return: int
+            The number of pages it takes to list a form's responses. Even a form without responses takes one.
+        """
+        return max(1, math.ceil(num_responses / self.response_page_size))
+
+    def get_max_url_batch(self, form_id):
+        """
+        :return: int
+            The most response tokens that fit in a form's delete URL
+        """
+        sizer = self.batch_sizer
+        url_length = len(f'{self.base_url}/{form_id}/responses')
+        id_length = sizer.PARAM_OVERHEAD + self.ESTIMATED_TOKEN_LENGTH
+        return max(1, (sizer.max_url_length - url_length) // id_length)
+
+    def get_delete_requests(self):
+        """
+        Replay the batch sizes the purge will use. In adaptive mode, the batch size doubles after every delete until it
+        fills the URL, and carries over from one form to the next.
+
+        :return: int
+            The number of DELETE requests the purge will send, if none of them fail
+        """
+        sizer = self.batch_sizer
+        if not sizer.adaptive:
+            return sum(math.ceil(count / sizer.limit) for count in self.response_counts.values())
+
+        limit = sizer.limit
+        num_requests = 0
+        for form_id, remaining in self.response_counts.items():
+            max_url_batch = self.get_max_url_batch(form_id)
+            while remaining > 0:
+                batch_size = min(limit, max_url_batch)
+                # Once the batches fill the URL they stop changing, so the rest of the form can be counted at once
+                if batch_size == max_url_batch:
+                    num_requests += math.ceil(remaining / batch_size)
+                    limit = min(limit * 2, sizer.MAX_BATCH_SIZE)
+                    break
+                remaining -= batch_size
+                num_requests += 1
+                limit = min(limit * 2, sizer.MAX_BATCH_SIZE)
+
+        return num_requests
+
+    def get_runtime(self):
+        """
+        :return: (float, str)
+            The estimated duration of the purge in seconds, and what limits it
+        """
+        workers = max(1, min(self.concurrency, len(self.response_counts)))
+        bounds = [(self.num_requests * self.request_seconds / workers, 'Typeform response times')]
+        if self.read_rate is not None:
+            bounds.append((self.num_reads / self.read_rate, f'the read rate of {self.read_rate:g}/s'))
+        if self.delete_rate is not None:
+            bounds.append((self.num_delete_requests / self.delete_rate, f'the delete rate of {self.delete_rate:g}/s'))
+
+        return max(bounds, key=lambda bound: bound[0])
+
+    def get_largest_forms(self, limit=5):
+        """
+        :return: list
+            The (form ID, number of responses) of the forms with the most responses, largest first
+        """
+        largest = sorted(self.response_counts.items(), key=lambda item: item[1], reverse=True)
+        return [(form_id, count) for form_id, count in largest[:limit] if count > 0]
+
+    def get_report(self):
+        """
+        :return: str
+        """
+        sizer = self.batch_sizer
+        batches = 'adaptive batches' if sizer.adaptive else f'batches of {sizer.limit}'
+        seconds, limited_by = self.get_runtime()
+        lines = [
+            f'Purge plan: {len(self.response_counts)} forms, {self.num_responses} responses',
+            f'  {self.num_reads} read requests ({self.num_form_pages} pages of forms, '
+            f'{self.num_list_requests} pages of responses of up to {self.response_page_size})',
+            f'  {self.num_delete_requests} delete requests in {batches}',
+            f'  {self.num_requests} requests in total',
+            f'  Estimated runtime: {format_duration(seconds)} with a concurrency of {self.concurrency}, '
+            f'limited by {limited_by}',
+        ]
+
+        largest = self.get_largest_forms()
+        if largest:
+            lines.append('Largest forms:')
+            lines.extend(f'  {form_id}: {count} responses' for form_id, count in largest)
+
+        return '\n'.join(lines)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import runtime
+
+
+class PurgeState:
+    """
+    Per-form high-water marks from previous purges, kept in a JSON file, for incremental runs.
+
+    For every form it records the form's `last_updated_at` as listed when it was purged and when that purge started.
+    An incremental run uses them to:
+    - skip forms that can't have received a response since they were purged: forms that are closed (not public) and
+      haven't been changed since, as reopening a form updates it
+    - only list responses submitted since the last purge, using the Responses API's `since` filter
+    """
+
+    # Deleted responses aren't listed anyway, so reaching back a little before the last purge costs nothing and covers
+    # any drift between our clock and Typeform's
+    SINCE_MARGIN = timedelta(hours=1)
+
+    def __init__(self, path):
+        """
+        :param path: str
+            The state file. It is loaded if it exists and created when the state is saved otherwise.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.forms = {}
+        # last_updated_at of the forms listed in this run, recorded against them once they are purged
+        self.listed = {}
+
+        if os.path.exists(path):
+            with open(path) as state_file:
+                self.forms = json.load(state_file)
+
+    def select_forms(self, forms):
+        """
+        Pick the forms that need purging from the forms listing, and forget about forms that no longer exist
+
+        :param forms: list
+            The form objects returned by the forms listing
+        :return: list
+            The IDs of the forms that could have new responses
+        """
+        with self.lock:
+            self.listed = {form['id']: form.get('last_updated_at') for form in forms}
+            self.forms = {form_id: state for form_id, state in self.forms.items() if form_id in self.listed}
+
+        return [form['id'] for form in forms if not self.is_untouched(form)]
+
+    def is_untouched(self, form):
+        state = self.forms.get(form['id'])
+        if state is None:
+            return False
+
+        is_public = form.get('settings', {}).get('is_public', True)
+        return not is_public and state['last_updated_at'] == form.get('last_updated_at')
+
+    def get_since(self, form_id):
+        """
+        :param form_id: str
+            The string identifier of a Typeform form
+        :return: str
+            The value for the `since` filter when listing the form's responses, or None to list them all
+        """
+        with self.lock:
+            state = self.forms.get(form_id)
+
+        if state is None:
+            return None
+
+        since = datetime.fromisoformat(state['purged_at']) - self.SINCE_MARGIN
+        return since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+    def mark_purged(self, form_id, purged_at):
+        """
+        :param form_id: str
+            The string identifier of a Typeform form that has just been purged
+        :param purged_at: datetime
+            When the purge of the form started
+        """
+        with self.lock:
+            self.forms[form_id] = {
+                'last_updated_at': self.listed.get(form_id),
+                'purged_at': purged_at.isoformat(),
+            }
+
+    def save(self):
+        with self.lock:
+            runtime.write_json_atomic(self.path, self.forms, indent=2, sort_keys=True)
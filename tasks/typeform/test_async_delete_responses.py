@@ -0,0 +1,100 @@
+import unittest
+from datetime import date
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from async_delete_responses import AsyncDeleteResponses, main
+from delete_responses import DeleteResponses, ScriptError
+from typeform_stub import TypeformStub
+
+auth_token = 'test-auth-token'
+
+
+class TestAsyncDeleteResponses(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stub = TypeformStub(auth_token, forms={'a': 2500, 'b': 1, 'c': 0, 'd': 130}).start()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def make_engine(self, token=auth_token, **kwargs):
+        engine = AsyncDeleteResponses(token, **kwargs)
+        engine.TYPEFORM_API = self.stub.api_url
+        return engine
+
+    async def test_execute_deletes_every_response(self):
+        engine = self.make_engine(concurrency=3, response_page_size=100)
+        with patch('builtins.print') as mock_print:
+            await engine.execute()
+        for form_id in ['a', 'b', 'c', 'd']:
+            self.assertEqual(self.stub.remaining_responses(form_id), 0)
+        mock_print.assert_any_call('Deleted 2500 responses from form a')
+        mock_print.assert_any_call('Deleted 0 responses from form c')
+
+    async def test_execute_fixed_batches(self):
+        engine = self.make_engine(delete_batch_size=25)
+        with patch('builtins.print'):
+            await engine.execute()
+        # ceil(2500 / 25) + 1 + ceil(130 / 25)
+        self.assertEqual(self.stub.request_counts[('DELETE', 'responses')], 100 + 1 + 6)
+        self.assertEqual(engine.delete_limiter.acquired, 100 + 1 + 6)
+
+    async def test_iter_response_pages(self):
+        engine = self.make_engine(response_page_size=1000)
+        async with engine:
+            pages = [page async for page in engine.iter_response_pages('a')]
+        self.assertEqual([len(response_ids) for response_ids, _ in pages], [1000, 1000, 500])
+        self.assertIsNone(pages[-1][1])
+
+    async def test_execute_reports_errors(self):
+        engine = self.make_engine(token='wrong-token')
+        with patch('builtins.print') as mock_print:
+            await engine.execute()
+        mock_print.assert_any_call('Failed to execute: Failed to get list of forms: Forbidden - 403')
+
+    async def test_get_form_list_uses_forms_page_size(self):
+        engine = self.make_engine()
+        engine.FORMS_PAGE_SIZE = 3
+        async with engine:
+            form_list = await engine.get_form_list()
+        self.assertEqual(sorted(form['id'] for form in form_list), ['a', 'b', 'c', 'd'])
+        self.assertEqual(self.stub.request_counts[('GET', 'forms')], 2)
+
+    async def test_delete_responses_raises(self):
+        engine = self.make_engine()
+        async with engine:
+            with self.assertRaises(ScriptError) as context:
+                await engine.delete_responses('missing', ['1'])
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_only_async_methods(self):
+        engine = self.make_engine()
+        # Nothing is sent with requests, so neither its session nor the threaded methods are inherited
+        self.assertFalse(hasattr(engine, 'session'))
+        self.assertFalse(hasattr(engine, 'plan'))
+        self.assertFalse(hasattr(engine, 'get_form_responses'))
+
+
+class TestAsyncMain(unittest.TestCase):
+    @patch('builtins.print')
+    @patch('async_delete_responses.AsyncDeleteResponses.execute')
+    def test_main_exits_with_error_when_purge_fails(self, mock_execute, mock_print):
+        mock_execute.return_value = False
+        with self.assertRaises(SystemExit) as context:
+            main([], {'TYPEFORM_AUTH_TOKEN': auth_token}, today=lambda: date(2019, 12, 30))
+        self.assertEqual(context.exception.code, 1)
+
+
+class TestDeleteResponsesAgainstStub(unittest.TestCase):
+    def test_execute_deletes_every_response(self):
+        with TypeformStub(auth_token, forms={'a': 1200, 'b': 7}) as stub:
+            delete_responses = DeleteResponses(auth_token, concurrency=2)
+            delete_responses.TYPEFORM_API = stub.api_url
+            with patch('builtins.print'):
+                delete_responses.execute()
+            self.assertEqual(stub.remaining_responses('a'), 0)
+            self.assertEqual(stub.remaining_responses('b'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
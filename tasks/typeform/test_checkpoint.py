@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from checkpoint import Checkpoint, FormProgress
+from delete_responses import DeleteResponses, ScriptError
+from typeform_stub import TypeformStub
+
+auth_token = 'test-auth-token'
+
+
+class TestCheckpoint(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'checkpoint.jsonl')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_reload(self):
+        checkpoint = Checkpoint(self.path)
+        checkpoint.save_form_ids(['a', 'b', 'c'])
+        checkpoint.save_cursor('a', 'token-1')
+        checkpoint.mark_done('a')
+        checkpoint.save_cursor('b', 'token-2')
+        checkpoint.save_cursor('b', 'token-3')
+
+        reloaded = Checkpoint(self.path)
+        self.assertEqual(reloaded.form_ids, ['a', 'b', 'c'])
+        self.assertEqual(reloaded.completed, {'a'})
+        self.assertEqual(reloaded.cursors, {'b': 'token-3'})
+
+    def test_ignores_partial_line(self):
+        checkpoint = Checkpoint(self.path)
+        checkpoint.mark_done('a')
+        with open(self.path, 'a') as checkpoint_file:
+            checkpoint_file.write('{"form": "b", "do')
+
+        self.assertEqual(Checkpoint(self.path).completed, {'a'})
+
+    def test_clear(self):
+        checkpoint = Checkpoint(self.path)
+        checkpoint.mark_done('a')
+        checkpoint.clear()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(checkpoint.completed, set())
+
+    def test_form_progress_saves_cursor_once_page_is_deleted(self):
+        checkpoint = Checkpoint(self.path)
+        progress = FormProgress(checkpoint, 'a')
+        progress.page_listed(10, 'cursor-1')
+        progress.page_listed(10, 'cursor-2')
+        progress.deleted(8)
+        self.assertNotIn('a', checkpoint.cursors)
+        progress.deleted(16)
+        self.assertEqual(checkpoint.cursors['a'], 'cursor-1')
+        progress.deleted(20)
+        self.assertEqual(checkpoint.cursors['a'], 'cursor-2')
+        # a resumed purge of the form keeps the start time of this one
+        self.assertEqual(FormProgress(Checkpoint(self.path), 'a').started_at, progress.started_at)
+        progress.done()
+        self.assertEqual(Checkpoint(self.path).completed, {'a'})
+
+    def test_resume_after_failure(self):
+        with TypeformStub(auth_token, forms={'a': 300, 'b': 500, 'c': 10}) as stub:
+            checkpoint = Checkpoint(self.path)
+            delete_responses = DeleteResponses(
+                auth_token, response_page_size=100, delete_batch_size=100, checkpoint=checkpoint
+            )
+            delete_responses.TYPEFORM_API = stub.api_url
+
+            original_delete_responses = DeleteResponses.delete_responses
+            calls = []
+
+            def fail_on_form_b_third_batch(instance, form_id, response_ids):
+                calls.append(form_id)
+                if calls.count('b') == 3:
+                    raise ScriptError('Failed to delete responses for form: b - 500', status_code=500)
+                original_delete_responses(instance, form_id, response_ids)
+
+            with patch('builtins.print'):
+                with patch.object(DeleteResponses, 'delete_responses', fail_on_form_b_third_batch):
+                    delete_responses.execute()
+
+            self.assertEqual(stub.remaining_responses('a'), 0)
+            self.assertEqual(stub.remaining_responses('b'), 300)
+            self.assertEqual(stub.remaining_responses('c'), 10)
+            forms_requests = stub.request_counts[('GET', 'forms')]
+            responses_requests = stub.request_counts[('GET', 'responses')]
+
+            resumed = DeleteResponses(
+                auth_token, response_page_size=100, delete_batch_size=100, checkpoint=Checkpoint(self.path)
+            )
+            resumed.TYPEFORM_API = stub.api_url
+            with patch('builtins.print') as mock_print:
+                resumed.execute()
+
+            mock_print.assert_any_call('Resuming from checkpoint: 1 forms already purged')
+            mock_print.assert_any_call('Deleted 300 responses from form b')
+            for form_id in ['a', 'b', 'c']:
+                self.assertEqual(stub.remaining_responses(form_id), 0)
+            # the forms were listed again, form a was skipped and form b resumed at its third page
+            self.assertEqual(stub.request_counts[('GET', 'forms')], forms_requests + 1)
+            self.assertEqual(stub.request_counts[('GET', 'responses')], responses_requests + 3 + 1)
+            self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,18 @@
+import threading
 import unittest
+from datetime import date
 from unittest import TestCase
 from unittest.mock import Mock, patch, call
 
 from delete_responses import (
+    DeleteBatchSizer,
     DeleteResponses,
     TokenAuth,
-    ScriptError
+    ScriptError,
+    RateLimiter,
+    get_retry_delay,
+    main,
+    runtime
 )
 
 auth_token = 'test-auth-token'
@@ -17,9 +24,16 @@ mock_multi_page_return_values = [
     (mock_forms_page_2, 3),
     (mock_forms_page_3, 3)
 ]
-mock_form_responses_page_1 = [{'response_id': '1'}, {'response_id': '2'}, {'response_id': '3'}]
-mock_form_responses_page_2 = [{'response_id': '4'}, {'response_id': '5'}, {'response_id': '6'}]
-mock_form_responses_page_3 = [{'response_id': '7'}, {'response_id': '8'}, {'response_id': '9'}]
+mock_form_responses_page_1 = [
+    {'response_id': '1', 'token': '1'}, {'response_id': '2', 'token': '2'}, {'response_id': '3', 'token': '3'}
+]
+mock_form_responses_page_2 = [
+    {'response_id': '4', 'token': '4'}, {'response_id': '5', 'token': '5'}, {'response_id': '6', 'token': '6'}
+]
+mock_form_responses_page_3 = [
+    {'response_id': '7', 'token': '7'}, {'response_id': '8', 'token': '8'}, {'response_id': '9', 'token': '9'}
+]
+# page_count counts the pages remaining from the requested cursor
 mock_form_responses_return_values = [
     {
         'items': mock_form_responses_page_1,
@@ -27,15 +41,41 @@ mock_form_responses_return_values = [
     },
     {
         'items': mock_form_responses_page_2,
-        'page_count': 3
+        'page_count': 2
     },
     {
         'items': mock_form_responses_page_3,
-        'page_count': 3
+        'page_count': 1
     }
 ]
 
 
+class FakeResponsesEndpoint:
+    """
+    Stand-in for the Responses API listing endpoint, honouring the page_size and before parameters
+    """
+    def __init__(self, num_responses):
+        # newest first, like the Responses API's default ordering
+        self.tokens = [f'token-{i}' for i in reversed(range(num_responses))]
+        self.requested_params = []
+
+    def __call__(self, method, url, params=None, **kwargs):
+        self.requested_params.append(dict(params))
+        start = 0
+        if 'before' in params:
+            start = self.tokens.index(params['before']) + 1
+        remaining = self.tokens[start:]
+        page_size = params['page_size']
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = {
+            'total_items': len(remaining),
+            'page_count': -(-len(remaining) // page_size),
+            'items': [{'response_id': token, 'token': token} for token in remaining[:page_size]]
+        }
+        return response
+
+
 class TestDeleteResponses(TestCase):
     def test_token_auth(self):
         test_value = 'test_token'
@@ -70,7 +110,7 @@ class TestDeleteResponses(TestCase):
         mock_get_forms_by_page.assert_has_calls(calls)
         self.assertEqual(form_list, ['1', '2', '3', '4', '5', '6'])
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_forms_by_page_raises_err(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 403
@@ -78,7 +118,7 @@ class TestDeleteResponses(TestCase):
         delete_responses = DeleteResponses(auth_token)
         self.assertRaises(ScriptError, delete_responses.get_forms_by_page, 1)
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_forms_by_page_bad_json(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -87,7 +127,7 @@ class TestDeleteResponses(TestCase):
         delete_responses = DeleteResponses(auth_token)
         self.assertRaises(ScriptError, delete_responses.get_forms_by_page, 1)
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_form_responses_one_page(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -101,7 +141,7 @@ class TestDeleteResponses(TestCase):
         mock_get.assert_called_once()
         self.assertEqual(response_list, ['1', '2', '3'])
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_form_responses_form_multi_page(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -112,7 +152,7 @@ class TestDeleteResponses(TestCase):
         self.assertEqual(mock_get.call_count, 3)
         self.assertEqual(response_list, ['1', '2', '3', '4', '5', '6', '7', '8', '9'])
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_form_responses_by_page_raises_err(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 403
@@ -120,7 +160,7 @@ class TestDeleteResponses(TestCase):
         delete_responses = DeleteResponses(auth_token)
         self.assertRaises(ScriptError, delete_responses.get_form_responses, 1)
 
-    @patch('requests.get')
+    @patch('requests.Session.request')
     def test_get_form_responses_by_page_bad_json(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -131,7 +171,7 @@ class TestDeleteResponses(TestCase):
 
     # TODO: test delete_all_form_responses and deleteresponses
 
-    @patch('requests.delete')
+    @patch('requests.Session.request')
     def test_delete_form_responses(self, mock_delete):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -144,7 +184,7 @@ class TestDeleteResponses(TestCase):
 
     @patch('delete_responses.DeleteResponses.delete_responses')
     def test_delete_form_responses_batched(self, mock_delete_responses):
-        delete_responses = DeleteResponses(auth_token)
+        delete_responses = DeleteResponses(auth_token, delete_batch_size=25)
         response_ids = list(map(str, range(1, 300)))
         try:
             delete_responses.delete_form_responses('1', response_ids)
@@ -152,7 +192,7 @@ class TestDeleteResponses(TestCase):
             self.fail('delete_responses.delete_form_responses() raised an exception unexpectedly')
         self.assertEqual(mock_delete_responses.call_count, 12)
 
-    @patch('requests.delete')
+    @patch('requests.Session.request')
     def test_delete_responses_raises(self, mock_get):
         mock_response = Mock()
         mock_response.status_code = 403
@@ -160,6 +200,321 @@ class TestDeleteResponses(TestCase):
         delete_responses = DeleteResponses(auth_token)
         self.assertRaises(ScriptError, delete_responses.delete_responses, '1', ['1', '2', '3'])
 
+    def test_concurrency_must_be_positive(self):
+        self.assertRaises(ScriptError, DeleteResponses, auth_token, concurrency=0)
+
+    @patch('delete_responses.DeleteResponses.delete_form_responses')
+    @patch('delete_responses.DeleteResponses.iter_response_pages')
+    @patch('delete_responses.DeleteResponses.get_form_list')
+    def test_execute_concurrent(self, mock_get_form_list, mock_iter_response_pages, mock_delete_form_responses):
+        form_ids = ['1', '2', '3', '4', '5', '6']
+        mock_get_form_list.return_value = [{'id': form_id} for form_id in form_ids]
+        mock_iter_response_pages.side_effect = lambda form_id, before, since: iter(
+            [([f'{form_id}-a'], f'{form_id}-a'), ([f'{form_id}-b'], None)]
+        )
+        deleted = {}
+        mock_delete_form_responses.side_effect = lambda form_id, response_ids, on_progress: deleted.update(
+            {form_id: list(response_ids)}
+        )
+        delete_responses = DeleteResponses(auth_token, concurrency=3)
+        delete_responses.execute()
+        self.assertEqual(mock_delete_form_responses.call_count, 6)
+        self.assertEqual(deleted, {form_id: [f'{form_id}-a', f'{form_id}-b'] for form_id in form_ids})
+
+    @patch('builtins.print')
+    @patch('delete_responses.DeleteResponses.delete_form_responses')
+    @patch('delete_responses.DeleteResponses.iter_form_responses')
+    @patch('delete_responses.DeleteResponses.get_form_list')
+    def test_execute_concurrent_reports_error(self, mock_get_form_list, mock_iter_form_responses,
+                                              mock_delete_form_responses, mock_print):
+        mock_get_form_list.return_value = [{'id': '1'}, {'id': '2'}]
+        mock_iter_form_responses.return_value = iter([['1']])
+        mock_delete_form_responses.side_effect = ScriptError('Failed to delete responses for form: 2 - 500')
+        delete_responses = DeleteResponses(auth_token, concurrency=2)
+        delete_responses.execute()
+        mock_print.assert_any_call('Failed to execute: Failed to delete responses for form: 2 - 500')
+
+    @patch('delete_responses.DeleteResponses.purge_form')
+    def test_purge_forms_stops_starting_forms_after_an_error(self, mock_purge_form):
+        first_form_can_finish = threading.Event()
+
+        def purge_form(form_id):
+            if form_id == '1':
+                first_form_can_finish.wait(5)
+            elif form_id == '2':
+                raise ScriptError('Failed to delete responses for form: 2 - 500')
+
+        mock_purge_form.side_effect = purge_form
+        delete_responses = DeleteResponses(auth_token, concurrency=2)
+        # Form 1 is still in progress when form 2 fails, which mustn't start any more forms
+        threading.Timer(0.2, first_form_can_finish.set).start()
+        with self.assertRaises(ScriptError):
+            delete_responses.purge_forms(['1', '2', '3', '4', '5'])
+        self.assertEqual([c.args[0] for c in mock_purge_form.call_args_list], ['1', '2'])
+
+    @patch('delete_responses.DeleteResponses.delete_responses')
+    @patch('delete_responses.DeleteResponses.get_form_responses_by_page')
+    def test_purge_form_streams_pages(self, mock_get_form_responses_by_page, mock_delete_responses):
+        events = []
+        pages = [list(map(str, range(0, 30))), list(map(str, range(30, 60)))]
+
+        def get_page(form_id, before, since):
+            page = 1 if before is None else 2
+            events.append(('get', page))
+            return pages[page - 1], 'cursor' if page == 1 else None
+
+        mock_get_form_responses_by_page.side_effect = get_page
+        mock_delete_responses.side_effect = lambda form_id, response_ids: events.append(('delete', response_ids[0]))
+        delete_responses = DeleteResponses(auth_token, delete_batch_size=25)
+        delete_responses.purge_form('1')
+        # the second page is only fetched once the full batches from the first page have been deleted
+        self.assertEqual(events, [('get', 1), ('delete', '0'), ('get', 2), ('delete', '25'), ('delete', '50')])
+
+    @patch('requests.Session.request')
+    def test_get_form_responses_by_page_sends_cursor(self, mock_request):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'items': mock_form_responses_page_2, 'page_count': 2}
+        mock_request.return_value = mock_response
+        delete_responses = DeleteResponses(auth_token, response_page_size=3)
+        response_ids, next_cursor = delete_responses.get_form_responses_by_page('1', before='3')
+        self.assertEqual(mock_request.call_args.kwargs['params'], {'page_size': 3, 'before': '3'})
+        self.assertEqual(response_ids, ['4', '5', '6'])
+        self.assertEqual(next_cursor, '6')
+
+    def test_response_page_size_range(self):
+        self.assertRaises(ScriptError, DeleteResponses, auth_token, response_page_size=0)
+        self.assertRaises(ScriptError, DeleteResponses, auth_token, response_page_size=1001)
+
+    @patch('requests.Session.request')
+    def test_iter_response_pages_visits_every_response_once(self, mock_request):
+        for num_responses, page_size in [(0, 10), (1, 10), (10, 10), (2501, 1000), (95, 7)]:
+            endpoint = FakeResponsesEndpoint(num_responses)
+            mock_request.side_effect = endpoint
+            delete_responses = DeleteResponses(auth_token, response_page_size=page_size)
+            pages = list(delete_responses.iter_response_pages('1'))
+            visited = [response_id for response_ids, _ in pages for response_id in response_ids]
+            self.assertEqual(sorted(visited), sorted(endpoint.tokens))
+            self.assertEqual(len(visited), len(set(visited)))
+            self.assertEqual(len(pages), max(1, -(-num_responses // page_size)))
+            self.assertIsNone(pages[-1][1])
+
+    @patch('requests.Session.request')
+    def test_iter_response_pages_resumes_from_cursor(self, mock_request):
+        endpoint = FakeResponsesEndpoint(30)
+        mock_request.side_effect = endpoint
+        delete_responses = DeleteResponses(auth_token, response_page_size=10)
+        pages = list(delete_responses.iter_response_pages('1', before=endpoint.tokens[9]))
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(pages[0][0], endpoint.tokens[10:20])
+        self.assertEqual(endpoint.requested_params[0], {'page_size': 10, 'before': endpoint.tokens[9]})
+
+    def test_delete_form_responses_accepts_generator(self):
+        delete_responses = DeleteResponses(auth_token, delete_batch_size=25)
+        with patch.object(delete_responses, 'delete_responses') as mock_delete_responses:
+            delete_responses.delete_form_responses('1', (str(i) for i in range(51)))
+        self.assertEqual([len(c.args[1]) for c in mock_delete_responses.call_args_list], [25, 25, 1])
+
+    @patch('delete_responses.DeleteResponses.delete_responses')
+    def test_delete_form_responses_adaptive_grows(self, mock_delete_responses):
+        delete_responses = DeleteResponses(auth_token)
+        delete_responses.delete_form_responses('1', list(map(str, range(1, 300))))
+        self.assertEqual([len(c.args[1]) for c in mock_delete_responses.call_args_list], [25, 50, 100, 124])
+
+    @patch('delete_responses.DeleteResponses.delete_responses')
+    def test_delete_form_responses_adaptive_url_budget(self, mock_delete_responses):
+        delete_responses = DeleteResponses(auth_token, max_delete_url_length=1000)
+        response_ids = [f'{i:032d}' for i in range(100)]
+        delete_responses.delete_form_responses('1', response_ids)
+        base_url = f'{DeleteResponses.TYPEFORM_API}/1/responses'
+        for batch_call in mock_delete_responses.call_args_list:
+            batch = batch_call.args[1]
+            url_length = len(base_url) + sum(len('?included_tokens=') + len(response_id) for response_id in batch)
+            self.assertLessEqual(url_length, 1000)
+        deleted = [response_id for c in mock_delete_responses.call_args_list for response_id in c.args[1]]
+        self.assertEqual(deleted, response_ids)
+
+    @patch('delete_responses.DeleteResponses.delete_responses')
+    def test_delete_form_responses_adaptive_shrinks(self, mock_delete_responses):
+        def delete(form_id, response_ids):
+            if len(response_ids) > 30:
+                raise ScriptError(f'Failed to delete responses for form: {form_id} - 414', status_code=414)
+
+        mock_delete_responses.side_effect = delete
+        delete_responses = DeleteResponses(auth_token)
+        response_ids = list(map(str, range(200)))
+        delete_responses.delete_form_responses('1', response_ids)
+        deleted = [
+            response_id
+            for c in mock_delete_responses.call_args_list if len(c.args[1]) <= 30
+            for response_id in c.args[1]
+        ]
+        self.assertEqual(deleted, response_ids)
+        self.assertLess(delete_responses.delete_batch_sizer.max_url_length, DeleteBatchSizer.DEFAULT_MAX_URL_LENGTH)
+
+    @patch('delete_responses.DeleteResponses.delete_responses')
+    def test_delete_form_responses_fixed_does_not_shrink(self, mock_delete_responses):
+        mock_delete_responses.side_effect = ScriptError('Failed to delete responses for form: 1 - 429', status_code=429)
+        delete_responses = DeleteResponses(auth_token, delete_batch_size=25)
+        self.assertRaises(ScriptError, delete_responses.delete_form_responses, '1', list(map(str, range(50))))
+        mock_delete_responses.assert_called_once()
+
+    def test_delete_batch_size_range(self):
+        self.assertRaises(ScriptError, DeleteResponses, auth_token, delete_batch_size=0)
+        self.assertRaises(ScriptError, DeleteResponses, auth_token, delete_batch_size=1001)
+
+    def test_session_uses_token_auth(self):
+        delete_responses = DeleteResponses(auth_token, concurrency=20)
+        self.assertIs(delete_responses.session.auth, delete_responses.token_auth)
+        adapter = delete_responses.session.get_adapter(DeleteResponses.TYPEFORM_API)
+        self.assertEqual(adapter._pool_maxsize, 20)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_request_retries_throttled(self, mock_request, mock_sleep):
+        throttled = Mock()
+        throttled.status_code = 429
+        throttled.headers = {'Retry-After': '3'}
+        unavailable = Mock()
+        unavailable.status_code = 503
+        unavailable.headers = {}
+        ok = Mock()
+        ok.status_code = 200
+        mock_request.side_effect = [throttled, unavailable, ok]
+        delete_responses = DeleteResponses(auth_token, backoff_factor=0.5)
+        response = delete_responses.request('DELETE', 'https://example.com')
+        self.assertIs(response, ok)
+        self.assertEqual(mock_request.call_count, 3)
+        mock_sleep.assert_has_calls([call(3.0), call(1.0)])
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_request_gives_up_after_max_retries(self, mock_request, mock_sleep):
+        throttled = Mock()
+        throttled.status_code = 429
+        throttled.headers = {}
+        mock_request.return_value = throttled
+        delete_responses = DeleteResponses(auth_token, max_retries=2)
+        self.assertRaises(ScriptError, delete_responses.delete_responses, '1', ['1'])
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_get_retry_delay(self):
+        self.assertEqual(get_retry_delay({}, 0, 0.5), 0.5)
+        self.assertEqual(get_retry_delay({}, 3, 0.5), 4.0)
+        self.assertEqual(get_retry_delay({'Retry-After': '7'}, 3, 0.5), 7.0)
+        self.assertEqual(get_retry_delay({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, 0, 0.5), 0.0)
+
+    def test_rate_limiter_spaces_requests(self):
+        now = [100.0]
+        limiter = RateLimiter(rate=2, clock=lambda: now[0])
+        self.assertEqual([limiter.reserve() for _ in range(4)], [0.0, 0.5, 1.0, 1.5])
+        self.assertEqual(limiter.wait_seconds, 3.0)
+        # after the queued requests have gone out and the bucket has refilled, there's no wait
+        now[0] += 10
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.acquired, 5)
+
+    def test_rate_limiter_burst(self):
+        now = [0.0]
+        limiter = RateLimiter(rate=1, burst=3, clock=lambda: now[0])
+        self.assertEqual([limiter.reserve() for _ in range(4)], [0.0, 0.0, 0.0, 1.0])
+
+    def test_rate_limiter_unlimited(self):
+        limiter = RateLimiter()
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(limiter.acquired, 3)
+        self.assertRaises(ScriptError, RateLimiter, 0)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_request_uses_separate_budgets(self, mock_request, mock_sleep):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_request.return_value = mock_response
+        delete_responses = DeleteResponses(auth_token, read_rate=1, delete_rate=4)
+        for _ in range(3):
+            delete_responses.request('GET', 'https://example.com')
+        for _ in range(3):
+            delete_responses.request('DELETE', 'https://example.com')
+        self.assertEqual(delete_responses.read_limiter.acquired, 3)
+        self.assertEqual(delete_responses.delete_limiter.acquired, 3)
+        self.assertAlmostEqual(delete_responses.read_limiter.wait_seconds, 3.0, places=1)
+        self.assertAlmostEqual(delete_responses.delete_limiter.wait_seconds, 0.75, places=1)
+        self.assertEqual(mock_sleep.call_count, 4)
+        self.assertIn('on 6 requests', delete_responses.get_timing_summary())
+
+    @patch('builtins.print')
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_task_run_counts_retries(self, mock_request, mock_sleep, mock_print):
+        throttled = Mock(status_code=429, headers={})
+        ok = Mock(status_code=200, headers={})
+        mock_request.side_effect = [throttled, throttled, ok]
+        task_run = runtime.TaskRun('typeform')
+        delete_responses = DeleteResponses(auth_token, task_run=task_run)
+        with delete_responses.step('list forms'):
+            delete_responses.request('GET', DeleteResponses.TYPEFORM_API)
+        self.assertEqual(task_run.num_retries, 2)
+        self.assertEqual(task_run.steps[0]['retries'], 2)
+
+    @patch('builtins.print')
+    @patch('delete_responses.DeleteResponses.execute')
+    def test_main_only_runs_on_monday(self, mock_execute, mock_print):
+        main([], {'TYPEFORM_AUTH_TOKEN': auth_token}, today=lambda: date(2020, 1, 2))
+        mock_print.assert_called_once_with('This task runs only on Monday')
+        mock_execute.assert_not_called()
+
+        mock_execute.return_value = True
+        main([], {'TYPEFORM_AUTH_TOKEN': auth_token, 'TYPEFORM_CONCURRENCY': '4'}, today=lambda: date(2019, 12, 30))
+        mock_execute.assert_called_once_with()
+        self.assertIn('"status": "ok"', mock_print.call_args.args[0])
+
+    @patch('builtins.print')
+    @patch('delete_responses.DeleteResponses.execute')
+    def test_main_exits_with_error_when_purge_fails(self, mock_execute, mock_print):
+        mock_execute.return_value = False
+        with self.assertRaises(SystemExit) as context:
+            main([], {'TYPEFORM_AUTH_TOKEN': auth_token}, today=lambda: date(2019, 12, 30))
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn('"status": "error"', mock_print.call_args.args[0])
+
+    @patch('requests.Session.request')
+    def test_count_form_responses(self, mock_request):
+        endpoint = FakeResponsesEndpoint(2500)
+        mock_request.side_effect = endpoint
+        delete_responses = DeleteResponses(auth_token)
+        self.assertEqual(delete_responses.count_form_responses('1', since='2020-01-01T00:00:00'), 2500)
+        self.assertEqual(endpoint.requested_params, [{'page_size': 1, 'since': '2020-01-01T00:00:00'}])
+
+    @patch('requests.Session.request')
+    @patch('delete_responses.DeleteResponses.get_forms_by_page')
+    def test_plan(self, mock_get_forms_by_page, mock_request):
+        mock_get_forms_by_page.return_value = (mock_forms_page_1, 1)
+        endpoints = {'1': FakeResponsesEndpoint(2500), '2': FakeResponsesEndpoint(0)}
+        mock_request.side_effect = lambda method, url, **kwargs: endpoints[url.split('/')[-2]](method, url, **kwargs)
+        delete_responses = DeleteResponses(auth_token, concurrency=2, delete_batch_size=25, delete_rate=1.5)
+
+        plan = delete_responses.plan()
+
+        self.assertEqual(plan.response_counts, {'1': 2500, '2': 0})
+        # a page of forms, then 3 pages of responses for form 1 and an empty page for form 2
+        self.assertEqual(plan.num_reads, 5)
+        self.assertEqual(plan.num_delete_requests, 100)
+        self.assertEqual(plan.get_runtime()[1], 'the delete rate of 1.5/s')
+        count_call = call('GET', f'{DeleteResponses.TYPEFORM_API}/1/responses', params={'page_size': 1})
+        self.assertIn(count_call, mock_request.call_args_list)
+        self.assertTrue(all(c.args[0] == 'GET' for c in mock_request.call_args_list))
+
+    @patch('builtins.print')
+    @patch('delete_responses.DeleteResponses.execute')
+    @patch('delete_responses.DeleteResponses.plan')
+    def test_main_plan(self, mock_plan, mock_execute, mock_print):
+        mock_plan.return_value.get_report.return_value = 'Purge plan'
+        main(['--plan'], {'TYPEFORM_AUTH_TOKEN': auth_token}, today=lambda: date(2020, 1, 2))
+        mock_print.assert_called_once_with('Purge plan')
+        mock_execute.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import TestCase
+
+from delete_responses import DeleteBatchSizer, DeleteResponses
+from purge_plan import PurgePlan, format_duration
+
+
+def make_plan(response_counts, batch_size=None, **kwargs):
+    return PurgePlan(
+        response_counts,
+        num_form_pages=1,
+        response_page_size=1000,
+        batch_sizer=DeleteBatchSizer(batch_size),
+        base_url=DeleteResponses.TYPEFORM_API,
+        **kwargs
+    )
+
+
+class TestPurgePlan(TestCase):
+    def test_fixed_batches(self):
+        plan = make_plan({'a': 2500, 'b': 10, 'c': 0}, batch_size=25)
+        self.assertEqual(plan.num_list_requests, 3 + 1 + 1)
+        self.assertEqual(plan.num_delete_requests, 100 + 1)
+        self.assertEqual(plan.num_requests, 1 + 5 + 101)
+
+    def test_adaptive_batches(self):
+        plan = make_plan({'abc123': 1000})
+        max_url_batch = plan.get_max_url_batch('abc123')
+        url = f'{DeleteResponses.TYPEFORM_API}/abc123/responses'
+        self.assertLessEqual(len(url) + max_url_batch * (DeleteBatchSizer.PARAM_OVERHEAD + 32), 8000)
+        # 25, 50 and 100, then batches as big as the URL allows
+        remaining = 1000 - 25 - 50 - 100
+        self.assertEqual(plan.num_delete_requests, 3 + -(-remaining // max_url_batch))
+
+    def test_adaptive_batches_carry_over(self):
+        one_form = make_plan({'a': 100}).num_delete_requests
+        self.assertLess(make_plan({'a': 100, 'b': 100}).num_delete_requests, 2 * one_form)
+
+    def test_runtime(self):
+        plan = make_plan({'a': 2500}, batch_size=25, read_rate=0.5, delete_rate=1.5, request_seconds=0.2)
+        self.assertEqual(plan.get_runtime(), (100 / 1.5, 'the delete rate of 1.5/s'))
+
+        plan = make_plan({'a': 2500, 'b': 2500}, batch_size=25, concurrency=2, request_seconds=0.2)
+        self.assertEqual(plan.get_runtime(), ((1 + 6 + 200) * 0.2 / 2, 'Typeform response times'))
+
+    def test_report(self):
+        report = make_plan({'a': 5, 'b': 0, 'c': 2500}, batch_size=25, delete_rate=1.5).get_report()
+        self.assertIn('Purge plan: 3 forms, 2505 responses', report)
+        self.assertIn('101 delete requests in batches of 25', report)
+        self.assertIn('Estimated runtime: 1m 07s with a concurrency of 1, limited by the delete rate of 1.5/s', report)
+        self.assertTrue(report.endswith('Largest forms:\n  c: 2500 responses\n  a: 5 responses'))
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(4.4), '4s')
+        self.assertEqual(format_duration(125), '2m 05s')
+        self.assertEqual(format_duration(3725), '1h 02m 05s')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from checkpoint import Checkpoint
+from delete_responses import DeleteResponses, ScriptError
+from purge_state import PurgeState
+from typeform_stub import TypeformStub
+
+auth_token = 'test-auth-token'
+
+
+class TestPurgeState(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'state.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_select_forms(self):
+        state = PurgeState(self.path)
+        forms = [
+            {'id': 'open', 'last_updated_at': '2020-01-01T00:00:00Z', 'settings': {'is_public': True}},
+            {'id': 'closed', 'last_updated_at': '2020-01-01T00:00:00Z', 'settings': {'is_public': False}},
+            {'id': 'changed', 'last_updated_at': '2020-01-01T00:00:00Z', 'settings': {'is_public': False}},
+            {'id': 'gone', 'last_updated_at': '2020-01-01T00:00:00Z', 'settings': {'is_public': False}},
+        ]
+        # nothing has been purged yet, so every form needs purging
+        self.assertEqual(state.select_forms(forms), ['open', 'closed', 'changed', 'gone'])
+        for form in forms:
+            state.mark_purged(form['id'], datetime(2020, 6, 1, 12, 0, 0, tzinfo=timezone.utc))
+        state.save()
+
+        reloaded = PurgeState(self.path)
+        forms[2] = dict(forms[2], last_updated_at='2020-07-01T00:00:00Z')
+        self.assertEqual(reloaded.select_forms(forms[:3]), ['open', 'changed'])
+        self.assertNotIn('gone', reloaded.forms)
+
+    def test_get_since(self):
+        state = PurgeState(self.path)
+        self.assertIsNone(state.get_since('a'))
+        state.mark_purged('a', datetime(2020, 6, 1, 12, 30, 15, tzinfo=timezone.utc))
+        self.assertEqual(state.get_since('a'), '2020-06-01T11:30:15')
+
+    @patch('requests.Session.request')
+    def test_since_is_sent(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'items': [], 'page_count': 0}
+        delete_responses = DeleteResponses(auth_token, response_page_size=10)
+        list(delete_responses.iter_response_pages('a', since='2020-06-01T11:30:15'))
+        self.assertEqual(mock_request.call_args.kwargs['params'], {'page_size': 10, 'since': '2020-06-01T11:30:15'})
+
+    def test_incremental_run(self):
+        with TypeformStub(auth_token) as stub:
+            stub.add_form('open', 20)
+            stub.add_form('closed', 30, is_public=False)
+            stub.add_form('reopened', 40, is_public=False)
+
+            def run():
+                delete_responses = DeleteResponses(auth_token, purge_state=PurgeState(self.path))
+                delete_responses.TYPEFORM_API = stub.api_url
+                with patch('builtins.print') as mock_print:
+                    delete_responses.execute()
+                return mock_print
+
+            run()
+            self.assertEqual(stub.request_counts[('GET', 'responses')], 3)
+
+            stub.add_responses('open', 5)
+            stub.forms['reopened'].is_public = True
+            stub.forms['reopened'].last_updated_at = datetime.now(timezone.utc)
+            stub.add_responses('reopened', 6)
+            mock_print = run()
+
+            mock_print.assert_any_call('Skipping 1 forms with no new responses since they were last purged')
+            mock_print.assert_any_call('Deleted 5 responses from form open')
+            mock_print.assert_any_call('Deleted 6 responses from form reopened')
+            self.assertEqual(stub.request_counts[('GET', 'responses')], 3 + 2)
+            for form_id in ['open', 'closed', 'reopened']:
+                self.assertEqual(stub.remaining_responses(form_id), 0)
+
+    def test_resumed_run_records_last_updated_at(self):
+        checkpoint_path = os.path.join(self.tmp_dir.name, 'checkpoint.jsonl')
+        with TypeformStub(auth_token) as stub:
+            stub.add_form('closed', 30, is_public=False)
+            stub.add_form('open', 20)
+            stub.add_form('gone', 5)
+
+            def run():
+                delete_responses = DeleteResponses(
+                    auth_token, checkpoint=Checkpoint(checkpoint_path), purge_state=PurgeState(self.path)
+                )
+                delete_responses.TYPEFORM_API = stub.api_url
+                with patch('builtins.print'):
+                    return delete_responses.execute()
+
+            original_delete_responses = DeleteResponses.delete_responses
+
+            def fail_on_form_open(instance, form_id, response_ids):
+                if form_id == 'open':
+                    raise ScriptError('Failed to delete responses for form: open - 500', status_code=500)
+                original_delete_responses(instance, form_id, response_ids)
+
+            with patch.object(DeleteResponses, 'delete_responses', fail_on_form_open):
+                self.assertFalse(run())
+
+            del stub.forms['gone']
+            self.assertTrue(run())
+
+            self.assertEqual(stub.remaining_responses('open'), 0)
+            with open(self.path) as state_file:
+                forms = json.load(state_file)
+            # the resumed run left out the deleted form and kept the high-water marks of the listing
+            self.assertEqual(sorted(forms), ['closed', 'open'])
+            last_updated_at = stub.forms['open'].last_updated_at.isoformat()
+            self.assertEqual(forms['open']['last_updated_at'], last_updated_at)
+            self.assertEqual(forms['closed']['last_updated_at'], last_updated_at)
+
+    def test_resumed_form_keeps_the_failed_run_start(self):
+        checkpoint_path = os.path.join(self.tmp_dir.name, 'checkpoint.jsonl')
+        with TypeformStub(auth_token) as stub:
+            stub.add_form('a', 300)
+
+            def run(**kwargs):
+                delete_responses = DeleteResponses(
+                    auth_token, response_page_size=100, delete_batch_size=100, purge_state=PurgeState(self.path),
+                    **kwargs
+                )
+                delete_responses.TYPEFORM_API = stub.api_url
+                with patch('builtins.print'):
+                    return delete_responses.execute()
+
+            original_delete_responses = DeleteResponses.delete_responses
+            calls = []
+
+            def fail_on_third_batch(instance, form_id, response_ids):
+                calls.append(form_id)
+                if len(calls) == 3:
+                    raise ScriptError('Failed to delete responses for form: a - 500', status_code=500)
+                original_delete_responses(instance, form_id, response_ids)
+
+            started_at = datetime.now(timezone.utc)
+            with patch.object(DeleteResponses, 'delete_responses', fail_on_third_batch):
+                self.assertFalse(run(checkpoint=Checkpoint(checkpoint_path)))
+
+            # submitted after the failed run listed the form, so the resumed run's cursor is past them
+            stub.add_responses('a', 5)
+            # the resumed run starts well past the margin `since` reaches back by
+            with patch('checkpoint.datetime', wraps=datetime) as mock_datetime:
+                mock_datetime.now.return_value = started_at + timedelta(hours=2)
+                self.assertTrue(run(checkpoint=Checkpoint(checkpoint_path)))
+            self.assertEqual(stub.remaining_responses('a'), 5)
+
+            with open(self.path) as state_file:
+                purged_at = datetime.fromisoformat(json.load(state_file)['a']['purged_at'])
+            self.assertGreaterEqual(purged_at, started_at)
+            self.assertLess(purged_at - started_at, timedelta(minutes=1))
+
+            # so the next incremental run still lists and deletes them
+            self.assertTrue(run())
+            self.assertEqual(stub.remaining_responses('a'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
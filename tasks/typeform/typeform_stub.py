@@ -0,0 +1,296 @@
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubForm:
+    """
+    The responses of a single form held by the stub, newest first like the Responses API lists them
+    """
+    def __init__(self, form_id, num_responses, is_public=True):
+        self.form_id = form_id
+        self.is_public = is_public
+        self.last_updated_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.tokens = []
+        # Negated submission timestamps, in the same order as tokens so they ascend and can be bisected
+        self.negated_timestamps = []
+        # Cursors stay valid after their response is deleted, so tokens are never removed from the index
+        self.token_index = {}
+        # Sorted positions of deleted responses, for counting what's left after a cursor
+        self.deleted_positions = []
+        self.deleted = set()
+        self.add_responses(num_responses)
+
+    def add_responses(self, num_responses):
+        """
+        Submit num_responses new responses now, newer than any the form already has
+        """
+        start = len(self.tokens)
+        now = datetime.now(timezone.utc).timestamp()
+        new_positions = list(reversed(range(start, start + num_responses)))
+        # New responses go to the front, so every existing position shifts along by num_responses
+        self.tokens = [f'{self.form_id}-{i}' for i in new_positions] + self.tokens
+        self.negated_timestamps = [-(now + i / 1e6) for i in new_positions] + self.negated_timestamps
+        self.token_index = {token: position for position, token in enumerate(self.tokens)}
+        self.deleted_positions = [position + num_responses for position in self.deleted_positions]
+
+    def submitted_at(self, token):
+        return datetime.fromtimestamp(-self.negated_timestamps[self.token_index[token]], timezone.utc)
+
+    @property
+    def live_count(self):
+        return len(self.tokens) - len(self.deleted)
+
+    def page(self, page_size, before=None, since=None):
+        """
+        Return the live tokens on the page after the before cursor, and the number of live responses from the cursor
+        on, only counting responses submitted at or after since
+        """
+        start = 0 if before is None else self.token_index[before] + 1
+        end = len(self.tokens)
+        if since is not None:
+            end = bisect_right(self.negated_timestamps, -since.timestamp())
+        num_deleted = bisect_left(self.deleted_positions, end) - bisect_left(self.deleted_positions, start)
+        remaining = max(0, end - start - num_deleted)
+
+        items = []
+        position = start
+        while position < end and len(items) < page_size:
+            token = self.tokens[position]
+            if token not in self.deleted:
+                items.append(token)
+            position += 1
+
+        return items, remaining
+
+    def delete(self, tokens):
+        for token in tokens:
+            if token in self.token_index and token not in self.deleted:
+                self.deleted.add(token)
+                insort(self.deleted_positions, self.token_index[token])
+
+
+class TypeformStub:
+    """
+    An in-memory stand-in for the parts of the Typeform Create and Responses APIs the task uses, served over HTTP on
+    localhost. It implements:
+
+    GET /forms?page=&page_size=
+    GET /forms/{form_id}/responses?page_size=&before=&since=
+    DELETE /forms/{form_id}/responses?included_tokens=
+
+    Every request can be slowed down by a fixed latency, and a share of them can be answered with 429 Too Many Requests
+    to exercise retries. GET /_stats reports request counts and how many responses are left, for use from another
+    process.
+
+    Use it as a context manager, and point a client at `api_url`.
+    """
+
+    def __init__(self, auth_token='stub-token', forms=None, latency=0.0, throttle_rate=0.0, retry_after=0, seed=0):
+        """
+        :param auth_token: str
+            The bearer token requests must carry
+        :param forms: dict
+            The number of responses to create for each form ID
+        :param latency: float
+            Seconds to wait before answering each request
+        :param throttle_rate: float
+            The fraction of requests, between 0 and 1, to answer with a 429
+        :param retry_after: int
+            The Retry-After header to send with a 429, in seconds
+        :param seed: int
+            Seeds the choice of which requests are throttled, so runs are repeatable
+        """
+        self.auth_token = auth_token
+        self.forms = {}
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_counts = Counter()
+        self.server = None
+        self.thread = None
+
+        for form_id, num_responses in (forms or {}).items():
+            self.add_form(form_id, num_responses)
+
+    def add_form(self, form_id, num_responses=0, is_public=True):
+        with self.lock:
+            self.forms[form_id] = StubForm(form_id, num_responses, is_public)
+
+    def add_responses(self, form_id, num_responses):
+        with self.lock:
+            self.forms[form_id].add_responses(num_responses)
+
+    def remaining_responses(self, form_id):
+        with self.lock:
+            return self.forms[form_id].live_count
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'requests': {f'{method} {endpoint}': count for (method, endpoint), count in self.request_counts.items()},
+                'remaining_responses': sum(form.live_count for form in self.forms.values()),
+            }
+
+    def should_throttle(self):
+        with self.lock:
+            throttle = self.random.random() < self.throttle_rate
+            if throttle:
+                self.request_counts[('THROTTLED', '429')] += 1
+            return throttle
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/forms'
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, method, path, query, headers):
+        """
+        Route a request to the fake API
+
+        :return: (int, dict)
+            The status code and JSON payload to respond with
+        """
+        parts = path.strip('/').split('/')
+        endpoint = 'forms' if len(parts) == 1 else 'responses'
+        with self.lock:
+            self.request_counts[(method, endpoint)] += 1
+
+        if headers.get('Authorization') != f'Bearer {self.auth_token}':
+            return 403, {'code': 'AUTHENTICATION_FAILED'}
+
+        if parts[0] != 'forms' or len(parts) not in (1, 3) or (len(parts) == 3 and parts[2] != 'responses'):
+            return 404, {'code': 'NOT_FOUND'}
+
+        if len(parts) == 1 and method == 'GET':
+            return self.list_forms(query)
+
+        form_id = parts[1]
+        with self.lock:
+            form = self.forms.get(form_id)
+        if form is None:
+            return 404, {'code': 'FORM_NOT_FOUND'}
+
+        if method == 'GET':
+            return self.list_responses(form, query)
+        if method == 'DELETE':
+            return self.delete_responses(form, query)
+
+        return 405, {'code': 'METHOD_NOT_ALLOWED'}
+
+    def list_forms(self, query):
+        page = int(query.get('page', ['1'])[0])
+        page_size = int(query.get('page_size', ['10'])[0])
+        with self.lock:
+            forms = list(self.forms.values())
+            items = [
+                {
+                    'id': form.form_id,
+                    'last_updated_at': form.last_updated_at.isoformat(),
+                    'settings': {'is_public': form.is_public},
+                }
+                for form in forms[(page - 1) * page_size:page * page_size]
+            ]
+
+        return 200, {
+            'total_items': len(forms),
+            'page_count': max(1, ceil(len(forms) / page_size)),
+            'items': items,
+        }
+
+    def list_responses(self, form, query):
+        page_size = int(query.get('page_size', ['25'])[0])
+        before = query.get('before', [None])[0]
+        since = query.get('since', [None])[0]
+        if since is not None:
+            since = datetime.strptime(since, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+        with self.lock:
+            if before is not None and before not in form.token_index:
+                return 400, {'code': 'INVALID_TOKEN'}
+            tokens, remaining = form.page(page_size, before, since)
+            items = [
+                {'response_id': token, 'token': token, 'submitted_at': form.submitted_at(token).isoformat()}
+                for token in tokens
+            ]
+
+        return 200, {
+            'total_items': remaining,
+            'page_count': ceil(remaining / page_size),
+            'items': items,
+        }
+
+    def delete_responses(self, form, query):
+        tokens = [token for value in query.get('included_tokens', []) for token in value.split(',')]
+        if not tokens:
+            return 400, {'code': 'VALIDATION_ERROR'}
+
+        with self.lock:
+            form.delete(tokens)
+
+        return 200, {}
+
+    def make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, so don't let Nagle hold the body back on keep-alive connections
+            disable_nagle_algorithm = True
+
+            def respond(self):
+                url = urlsplit(self.path)
+                headers = {}
+                if url.path == '/_stats':
+                    status, payload = 200, stub.get_stats()
+                else:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if stub.should_throttle():
+                        status, payload = 429, {'code': 'TOO_MANY_REQUESTS'}
+                        headers['Retry-After'] = str(stub.retry_after)
+                    else:
+                        status, payload = stub.handle(self.command, url.path, parse_qs(url.query), self.headers)
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = respond
+            do_DELETE = respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler